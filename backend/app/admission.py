@@ -0,0 +1,217 @@
+"""
+Бюджети маршрутів і скидання навантаження, коли БД не встигає.
+
+Кожен запит отримує бюджет за шаблоном маршруту: statement_timeout, який
+ставиться на кожну транзакцію (SET LOCAL, лише PostgreSQL), і пріоритет.
+Низькопріоритетні маршрути (звіти, масові операції, синхронізація) не
+допускаються, коли їх уже забагато, коли пул з'єднань майже вичерпано або
+коли БД нещодавно не вклалась у тайм-аут, - вони отримують 503 з Retry-After
+раніше, ніж почнуть гальмувати інтерактивні читання розкладу.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .config import settings
+from .db.database import engine_for_tenant
+from .db.tenant import current_tenant
+
+INTERACTIVE = "interactive"
+LOW = "low"
+
+# SQLSTATE query_canceled: statement_timeout або скасування запиту
+_QUERY_CANCELED = "57014"
+
+
+@dataclass(frozen=True)
+class Budget:
+    route: str
+    priority: str
+    statement_timeout_ms: int
+
+
+current_budget: ContextVar[Optional[Budget]] = ContextVar("current_budget", default=None)
+
+
+def _matches(route: str, patterns) -> Optional[str]:
+    return next((p for p in patterns if fnmatchcase(route, p)), None)
+
+
+def budget_for(route: str) -> Budget:
+    """route - "METHOD /шаблон/{param}", як у журналі повільних запитів."""
+    priority = LOW if _matches(route, settings.ADMISSION_LOW_PRIORITY_ROUTES) else INTERACTIVE
+    override = _matches(route, settings.DB_ROUTE_STATEMENT_TIMEOUTS_MS)
+    if override is not None:
+        timeout = settings.DB_ROUTE_STATEMENT_TIMEOUTS_MS[override]
+    elif priority == LOW:
+        timeout = settings.DB_LOW_PRIORITY_STATEMENT_TIMEOUT_MS
+    else:
+        timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    return Budget(route, priority, timeout)
+
+
+def is_statement_timeout(exc: OperationalError) -> bool:
+    return getattr(exc.orig, "pgcode", None) == _QUERY_CANCELED
+
+
+def pool_usage(tenant_id: Optional[str]) -> tuple[int, int]:
+    """(зайнято з'єднань, місткість пулу з overflow) для бази орендаря."""
+    pool = engine_for_tenant(tenant_id).pool
+    checked_out = getattr(pool, "checkedout", None)
+    if checked_out is None:
+        return 0, 0
+    return checked_out(), pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+
+
+class LoadMetrics:
+    """Лічильники скинутих і перерваних за тайм-аутом запитів по маршрутах у межах процесу."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.in_flight = {INTERACTIVE: 0, LOW: 0}
+        self.shed: dict[str, dict[str, int]] = {}
+        self.statement_timeouts: dict[str, int] = {}
+        self.pool_timeouts: dict[str, int] = {}
+        self.last_timeout_at: Optional[float] = None
+
+    def enter(self, priority: str) -> None:
+        with self._lock:
+            self.in_flight[priority] += 1
+
+    def leave(self, priority: str) -> None:
+        with self._lock:
+            self.in_flight[priority] -= 1
+
+    def record_shed(self, route: str, reason: str) -> None:
+        with self._lock:
+            per_route = self.shed.setdefault(route, {})
+            per_route[reason] = per_route.get(reason, 0) + 1
+
+    def record_timeout(self, route: str, kind: str) -> None:
+        counters = self.statement_timeouts if kind == "statement" else self.pool_timeouts
+        with self._lock:
+            counters[route] = counters.get(route, 0) + 1
+            self.last_timeout_at = time.monotonic()
+
+    def under_pressure(self) -> bool:
+        last = self.last_timeout_at
+        return last is not None and time.monotonic() - last < settings.ADMISSION_PRESSURE_SECONDS
+
+    def shed_reason(self, tenant_id: Optional[str]) -> Optional[str]:
+        """Чому новий низькопріоритетний запит не варто допускати (None - допускаємо)."""
+        limit = settings.ADMISSION_LOW_PRIORITY_CONCURRENCY
+        if limit and self.in_flight[LOW] >= limit:
+            return "concurrency"
+        checked_out, capacity = pool_usage(tenant_id)
+        if capacity and checked_out >= capacity * settings.ADMISSION_POOL_SHED_RATIO:
+            return "pool"
+        if self.under_pressure():
+            return "db_timeouts"
+        return None
+
+    def snapshot(self) -> dict:
+        checked_out, capacity = pool_usage(None)
+        with self._lock:
+            return {
+                "in_flight": dict(self.in_flight),
+                "pool": {"checked_out": checked_out, "capacity": capacity},
+                "under_pressure": self.under_pressure(),
+                "shed": {route: dict(reasons) for route, reasons in self.shed.items()},
+                "statement_timeouts": dict(self.statement_timeouts),
+                "pool_timeouts": dict(self.pool_timeouts),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.shed.clear()
+            self.statement_timeouts.clear()
+            self.pool_timeouts.clear()
+            self.last_timeout_at = None
+
+
+load_metrics = LoadMetrics()
+
+
+def _leaf_routes(routes) -> list:
+    # Підключені роутери в нових версіях FastAPI - обгортки без path; розгортаємо їх до самих маршрутів
+    leaves = []
+    for route in routes:
+        if getattr(route, "path", None) is not None:
+            leaves.append(route)
+        elif getattr(route, "original_router", None) is not None:
+            leaves.extend(_leaf_routes(route.original_router.routes))
+    return leaves
+
+
+def _route_template(scope: Scope) -> str:
+    # Маршрут шукаємо так само, як роутер, але до виконання обробника
+    app = scope["app"]
+    routes = getattr(app.state, "admission_routes", None)
+    if routes is None:
+        routes = app.state.admission_routes = _leaf_routes(app.router.routes)
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return f"{scope['method']} {route.path}"
+    return f"{scope['method']} {scope['path']}"
+
+
+class AdmissionMiddleware:
+    """Визначає бюджет запиту і скидає низькопріоритетні запити під навантаженням."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = budget_for(_route_template(scope))
+        if budget.priority == LOW:
+            reason = load_metrics.shed_reason(current_tenant.get())
+            if reason is not None:
+                load_metrics.record_shed(budget.route, reason)
+                await _send_busy(send)
+                return
+
+        token = current_budget.set(budget)
+        load_metrics.enter(budget.priority)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            load_metrics.leave(budget.priority)
+            current_budget.reset(token)
+
+
+def busy_headers() -> dict[str, str]:
+    return {"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)}
+
+
+async def _send_busy(send: Send) -> None:
+    body = json.dumps({"detail": "Server is busy, retry later"}).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    headers += [(k.lower().encode(), v.encode()) for k, v in busy_headers().items()]
+    await send({"type": "http.response.start", "status": 503, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session: Session, transaction, connection) -> None:
+    budget = current_budget.get()
+    if budget is None or budget.statement_timeout_ms <= 0 or connection.dialect.name != "postgresql":
+        return
+    # SET LOCAL діє до кінця транзакції, тож з'єднання повертається в пул без нього
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(budget.statement_timeout_ms)}")
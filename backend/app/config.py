@@ -6,6 +6,134 @@ class Settings(BaseSettings):
     JWT_ALG: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MIN: int = 60
 
+    # Орендар для токенів без claim tid і запитів без X-Tenant-ID;
+    # окремі бази для великих орендарів: {"tenant": "postgresql://..."}
+    DEFAULT_TENANT: str = "default"
+    TENANT_DATABASE_URLS: dict[str, str] = {}
+
+    # Обмеження спроб входу (token bucket): місткість і поповнення за хвилину
+    LOGIN_ACCOUNT_BURST: int = 5
+    LOGIN_ACCOUNT_PER_MINUTE: float = 5
+    LOGIN_IP_BURST: int = 20
+    LOGIN_IP_PER_MINUTE: float = 30
+    # Адреси або мережі зворотних проксі, яким довіряємо X-Forwarded-For
+    # (без них усі клієнти за проксі потрапляють в один кошик IP)
+    TRUSTED_PROXIES: list[str] = []
+
+    # Збережені відповіді для повторів з Idempotency-Key; MAX_BODY_BYTES
+    # обмежує і збережену відповідь, і тіло запиту, яке читається для відбитка
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 1_000_000
+
+    # Стиснення відповідей (байти, нижче яких тіло не стискається)
+    COMPRESSION_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+
+    # Максимальна довжина діапазону для читання розкладу (днів)
+    SCHEDULE_MAX_RANGE_DAYS: int = 366
+
+    # Скільки років наперед тримати готові партиції work_entries
+    WORK_ENTRY_PARTITION_YEARS_AHEAD: int = 1
+
+    # Річна норма відпустки (робочих днів) і надбавка за стаж: +1 день за кожні STEP років, не більше MAX
+    LEAVE_BASE_DAYS: float = 24
+    LEAVE_SENIORITY_STEP_YEARS: int = 5
+    LEAVE_SENIORITY_MAX_DAYS: int = 5
+
+    # Масовий імпорт працівників: потоки для bcrypt (0 - кількість ядер) і розмір пакета INSERT
+    IMPORT_HASH_WORKERS: int = 0
+    IMPORT_BATCH_SIZE: int = 1000
+    # Найбільша кількість рядків одного CSV (файл зберігається в параметрах задачі)
+    IMPORT_MAX_ROWS: int = 50_000
+
+    # Фонові задачі: кількість воркерів і розмір порції днів між комітами
+    JOB_WORKERS: int = 2
+    JOB_CHUNK_DAYS: int = 31
+    # Оренда задачі в роботі: воркер продовжує її кожні JOB_HEARTBEAT_SECONDS,
+    # задачі з простроченою орендою вважаються перерваними
+    JOB_LEASE_SECONDS: int = 60
+    JOB_HEARTBEAT_SECONDS: int = 15
+
+    # Журнал повільних запитів (0 - вимкнено) і вибіркові EXPLAIN для SELECT: за
+    # замовчуванням GENERIC_PLAN без значень параметрів; ANALYZE виконує запит зі
+    # справжніми параметрами, тож вмикається явно і лише там, де це допустимо
+    SLOW_QUERY_MS: float = 200
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.0
+    SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS: int = 300
+    SLOW_QUERY_EXPLAIN_ANALYZE: bool = False
+
+    # Трудові норми для записів розкладу (0 - правило вимкнено). Відпочинок перевіряється
+    # між сусідніми днями, тож має сенс до 24 годин
+    LABOR_RULES_ENABLED: bool = True
+    LABOR_MAX_WEEKLY_HOURS: float = 40
+    LABOR_MIN_REST_HOURS: float = 12
+    LABOR_MAX_CONSECUTIVE_DAYS: int = 6
+
+    # Пул з'єднань: скільки чекати на вільне з'єднання, перш ніж відповісти 503
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 5
+
+    # Бюджети маршрутів: statement_timeout на транзакцію (мс, 0 - без обмеження, лише PostgreSQL);
+    # DB_ROUTE_STATEMENT_TIMEOUTS_MS - окремі значення за шаблоном "METHOD /шлях/{param}" (fnmatch)
+    DB_STATEMENT_TIMEOUT_MS: int = 5000
+    DB_LOW_PRIORITY_STATEMENT_TIMEOUT_MS: int = 30000
+    DB_ROUTE_STATEMENT_TIMEOUTS_MS: dict[str, int] = {}
+
+    # Скидання навантаження: низькопріоритетні маршрути отримують 503, коли їх більше CONCURRENCY (0 - без ліміту),
+    # коли зайнято POOL_SHED_RATIO пулу або протягом PRESSURE_SECONDS після тайм-ауту БД
+    ADMISSION_LOW_PRIORITY_ROUTES: list[str] = [
+        "GET /leave/report",
+        "GET /department/coverage",
+        "GET /sync",
+        "POST /employee/import",
+        "PUT /schedule/range/*",
+        "POST /schedule/batch",
+        "POST /schedule/copy/*",
+        "POST /schedule/roll-forward",
+        "POST /jobs/*",
+    ]
+    ADMISSION_LOW_PRIORITY_CONCURRENCY: int = 4
+    ADMISSION_POOL_SHED_RATIO: float = 0.8
+    ADMISSION_PRESSURE_SECONDS: float = 30
+    ADMISSION_RETRY_AFTER_SECONDS: int = 10
+
+    # Профілювання окремих запитів (заголовок X-Profile або випадкова вибірка)
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_FILES: int = 200
+
+    # Підписка на розклад (ICS): вікно днів від сьогодні, кеш стрічок і підказка клієнтам, як часто опитувати.
+    # ICS_SECRET підписує URL стрічок (порожній - використовується JWT_SECRET); зміна секрету відкликає всі URL
+    ICS_SECRET: str = ""
+    ICS_PAST_DAYS: int = 30
+    ICS_FUTURE_DAYS: int = 90
+    ICS_CACHE_MAX_USERS: int = 10000
+    ICS_CACHE_TTL_SECONDS: int = 3600
+    ICS_MAX_AGE_SECONDS: int = 900
+
+    # Outbox побічних ефектів: диспетчер у процесі API (або окремо: python -m app.outbox run),
+    # розмір порції, повтори з паузою BASE*2^n (не більше MAX) і необов'язковий вебхук
+    OUTBOX_DISPATCHER_ENABLED: bool = True
+    OUTBOX_POLL_SECONDS: float = 5
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BASE_SECONDS: float = 5
+    OUTBOX_RETRY_MAX_SECONDS: float = 600
+    OUTBOX_WEBHOOK_URL: str = ""
+    OUTBOX_WEBHOOK_TIMEOUT_SECONDS: float = 5
+
+    # Push-події: "memory" для одного воркера, "postgres" (LISTEN/NOTIFY) для кількох
+    EVENT_BROKER: str = "memory"
+    SSE_HEARTBEAT_SECONDS: int = 15
+    SSE_QUEUE_SIZE: int = 256
+
     model_config = SettingsConfigDict(env_file="backend/.env", extra="ignore")
 
 settings = Settings()
@@ -1 +1,2 @@
-from .database import Base, engine, get_db
\ No newline at end of file
+from .database import Base, engine, get_db
+from . import changes, history, absences, week_hours
@@ -0,0 +1,175 @@
+"""
+Підтримка індексу відсутностей (absences).
+
+Схвалені проміжки - це розклад, згорнутий у проміжки: після кожного
+flush, що торкнувся днів відсутності, проміжки користувача навколо цих
+днів перебудовуються з work_entries. Дні, покриті схваленою заявкою того
+ж типу, отримують source=request і посилання на заявку, решта - manual.
+Вихідні (off) з розкладу в індекс не потрапляють, якщо це не схвалена заявка.
+Заявки на розгляді - окремі рядки status=pending, їх ведуть обробники заявок.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, event, func, insert, inspect, literal, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models.absence import Absence
+from .models.service_request import ServiceRequest
+from .models.work_entry import WorkEntry
+
+# Типи днів розкладу, що завжди означають відсутність
+ABSENCE_TYPES = ("vacation", "sick", "trip")
+REQUEST_TYPES = ("off", "vacation", "sick")
+
+_DAY = timedelta(days=1)
+
+
+def _is_absence_type(value: Optional[str]) -> bool:
+    return value in ABSENCE_TYPES or value in REQUEST_TYPES
+
+
+def refresh_absences(connection: Connection, tenant_id: str, user_id: int, first_day: date, last_day: date) -> None:
+    """
+    Перебудовує схвалені проміжки користувача, що перетинають [first_day, last_day]
+    або прилягають до нього. Для масових SQL-операцій, які оминають ORM,
+    викликається явно з тим самим з'єднанням.
+    """
+    # Розширюємо вікно на всі збережені проміжки, яких торкається зміна, - їх буде перезібрано цілком
+    while True:
+        lo, hi = connection.execute(
+            select(func.min(Absence.start_date), func.max(Absence.end_date))
+            .where(Absence.user_id == user_id)
+            .where(Absence.status == "approved")
+            .where(Absence.start_date <= last_day + _DAY)
+            .where(Absence.end_date >= first_day - _DAY)
+        ).one()
+        if lo is None or (lo >= first_day and hi <= last_day):
+            break
+        first_day, last_day = min(first_day, lo), max(last_day, hi)
+
+    days = connection.execute(
+        select(WorkEntry.date, WorkEntry.type)
+        .where(WorkEntry.user_id == user_id)
+        .where(WorkEntry.date >= first_day)
+        .where(WorkEntry.date <= last_day)
+        .where(WorkEntry.type.in_(set(ABSENCE_TYPES) | set(REQUEST_TYPES)))
+        .order_by(WorkEntry.date)
+    ).all()
+    requests = connection.execute(
+        select(ServiceRequest.id, ServiceRequest.type, ServiceRequest.start_date, ServiceRequest.end_date)
+        .where(ServiceRequest.user_id == user_id)
+        .where(ServiceRequest.status == "approved")
+        .where(ServiceRequest.start_date <= last_day)
+        .where(ServiceRequest.end_date >= first_day)
+        .order_by(ServiceRequest.id)
+    ).all()
+
+    def request_for(day: date, kind: str) -> Optional[int]:
+        # Пізніша заявка перекриває ранішу, як і в розкладі
+        found = None
+        for r in requests:
+            if r.type == kind and r.start_date <= day <= r.end_date:
+                found = r.id
+        return found
+
+    spans: list[dict] = []
+    for day, kind in days:
+        request_id = request_for(day, kind)
+        if kind not in ABSENCE_TYPES and request_id is None:
+            continue
+        last = spans[-1] if spans else None
+        if last and last["end_date"] + _DAY == day and (last["type"], last["service_request_id"]) == (kind, request_id):
+            last["end_date"] = day
+            continue
+        spans.append({
+            "tenant_id": tenant_id,
+            "user_id": user_id,
+            "start_date": day,
+            "end_date": day,
+            "type": kind,
+            "source": "request" if request_id else "manual",
+            "status": "approved",
+            "service_request_id": request_id,
+        })
+
+    connection.execute(
+        delete(Absence)
+        .where(Absence.user_id == user_id)
+        .where(Absence.status == "approved")
+        .where(Absence.start_date <= last_day)
+        .where(Absence.end_date >= first_day)
+    )
+    if spans:
+        connection.execute(insert(Absence), spans)
+
+
+def refresh_absences_for(connection: Connection, keys: Iterable[tuple[str, int, date]]) -> None:
+    """Перебудовує проміжки для набору змінених днів (tenant_id, user_id, date)."""
+    by_user: dict[tuple[str, int], list[date]] = {}
+    for tenant_id, user_id, day in keys:
+        by_user.setdefault((tenant_id, user_id), []).append(day)
+    for (tenant_id, user_id), days in by_user.items():
+        refresh_absences(connection, tenant_id, user_id, min(days), max(days))
+
+
+def add_pending_absence(session: Session, req: ServiceRequest) -> None:
+    session.add(Absence(
+        user_id=req.user_id,
+        start_date=req.start_date,
+        end_date=req.end_date,
+        type=req.type,
+        source="request",
+        status="pending",
+        service_request_id=req.id,
+    ))
+
+
+def drop_pending_absence(session: Session, request_id: int) -> None:
+    """Заявку розглянуто: схвалені дні з'являться з розкладу, відхилені зникають."""
+    session.execute(
+        delete(Absence)
+        .where(Absence.service_request_id == request_id)
+        .where(Absence.status == "pending")
+        .execution_options(synchronize_session=False)
+    )
+
+
+def backfill_absences(conn: Connection) -> None:
+    """
+    Будує індекс для баз, створених до його появи (коли таблиця ще порожня).
+    Разовий крок старту (run_once) під блокуванням: паралельні воркери не
+    вставляють ті самі проміжки двічі.
+    """
+    if conn.execute(select(Absence.id).limit(1)).first() is not None:
+        return
+    users = conn.execute(
+        select(WorkEntry.tenant_id, WorkEntry.user_id, func.min(WorkEntry.date), func.max(WorkEntry.date))
+        .where(WorkEntry.type.in_(set(ABSENCE_TYPES) | set(REQUEST_TYPES)))
+        .group_by(WorkEntry.tenant_id, WorkEntry.user_id)
+    ).all()
+    for tenant_id, user_id, first_day, last_day in users:
+        refresh_absences(conn, tenant_id, user_id, first_day, last_day)
+    conn.execute(insert(Absence).from_select(
+        ["tenant_id", "user_id", "start_date", "end_date", "type", "source", "status", "service_request_id"],
+        select(
+            ServiceRequest.tenant_id, ServiceRequest.user_id, ServiceRequest.start_date, ServiceRequest.end_date,
+            ServiceRequest.type, literal("request"), literal("pending"), ServiceRequest.id,
+        ).where(ServiceRequest.status == "pending"),
+    ))
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_flushed_absences(session: Session, flush_context) -> None:
+    keys = []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, WorkEntry):
+            continue
+        old_types = inspect(obj).attrs.type.history.deleted or ()
+        if _is_absence_type(obj.type) or any(_is_absence_type(t) for t in old_types):
+            keys.append((obj.tenant_id, obj.user_id, obj.date))
+    if keys:
+        refresh_absences_for(session.connection(), keys)
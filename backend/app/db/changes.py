@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from sqlalchemy import event, func, insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models.change_log import ChangeLogEntry
+from .models.service_request import ServiceRequest
+from .models.work_entry import WorkEntry
+
+WORK_ENTRY = "work_entry"
+SERVICE_REQUEST = "service_request"
+
+
+def work_entry_change(user_id: int, entry_date, op: str) -> dict:
+    return {"entity": WORK_ENTRY, "op": op, "user_id": user_id, "entity_id": None, "date": entry_date}
+
+
+def service_request_change(request_id: int, user_id: int, op: str) -> dict:
+    return {"entity": SERVICE_REQUEST, "op": op, "user_id": user_id, "entity_id": request_id, "date": None}
+
+
+def _change_for(obj, op: str) -> dict | None:
+    if isinstance(obj, WorkEntry):
+        return work_entry_change(obj.user_id, obj.date, op)
+    if isinstance(obj, ServiceRequest):
+        return service_request_change(obj.id, obj.user_id, op)
+    return None
+
+
+def flushed_changes(session: Session) -> list[dict]:
+    """
+    Зміни записів розкладу та заявок у поточному flush.
+    Викликається з after_flush, коли new/dirty/deleted ще не очищені.
+    """
+    changes = []
+    for obj in session.new:
+        changes.append(_change_for(obj, "upsert"))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            changes.append(_change_for(obj, "upsert"))
+    for obj in session.deleted:
+        changes.append(_change_for(obj, "delete"))
+    return [c for c in changes if c is not None]
+
+
+def record_changes(connection: Connection, changes: list[dict]) -> None:
+    """
+    Записує зміни в change_log. Для масових SQL-операцій, які оминають ORM,
+    викликається явно з тим самим з'єднанням, що й сама операція.
+    """
+    if not changes:
+        return
+    stmt = insert(ChangeLogEntry)
+    if connection.dialect.name == "postgresql":
+        stmt = stmt.values(txid=func.txid_current())
+    connection.execute(stmt, changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session: Session, flush_context) -> None:
+    record_changes(session.connection(), flushed_changes(session))
@@ -1,9 +1,50 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import threading
+from typing import Optional
+
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 from ..config import settings
+from .slow_queries import install_slow_query_log
+from .tenant import current_tenant
+
+def _make_engine(url: str) -> Engine:
+    pool = {}
+    if make_url(url).get_backend_name() != "sqlite":
+        pool = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        }
+    eng = create_engine(url, pool_pre_ping=True, **pool)
+    install_slow_query_log(eng)
+    return eng
+
+engine = _make_engine(settings.DATABASE_URL)
+
+# Великі орендарі можуть мати окрему базу (TENANT_DATABASE_URLS), решта ділить основну
+_tenant_engines: dict[str, Engine] = {}
+_tenant_engines_lock = threading.Lock()
+
+def engine_for_tenant(tenant_id: Optional[str]) -> Engine:
+    url = settings.TENANT_DATABASE_URLS.get(tenant_id) if tenant_id else None
+    if not url:
+        return engine
+    with _tenant_engines_lock:
+        if tenant_id not in _tenant_engines:
+            _tenant_engines[tenant_id] = _make_engine(url)
+        return _tenant_engines[tenant_id]
+
+def all_engines() -> list[Engine]:
+    return [engine] + [engine_for_tenant(t) for t in settings.TENANT_DATABASE_URLS]
+
+class TenantSession(Session):
+    """Сесія, що виконує запити в базі орендаря поточного запиту."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        return engine_for_tenant(current_tenant.get())
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+SessionLocal = sessionmaker(class_=TenantSession, autoflush=False, autocommit=False)
 
 class Base(DeclarativeBase):
     pass
@@ -13,4 +54,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
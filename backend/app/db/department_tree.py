@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, literal, select, true
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, aliased
+
+from .models.department import Department, DepartmentClosure
+
+
+def subtree_ids(db: Session, department_id: int) -> list[int]:
+    return db.execute(
+        select(DepartmentClosure.descendant_id).where(DepartmentClosure.ancestor_id == department_id)
+    ).scalars().all()
+
+
+def attach_department(db: Session, department_id: int, parent_id: Optional[int]) -> None:
+    """Додає рядки замикання для нового (ще без нащадків) підрозділу. Без коміту."""
+    db.execute(insert(DepartmentClosure).values(ancestor_id=department_id, descendant_id=department_id, depth=0))
+    if parent_id is not None:
+        db.execute(insert(DepartmentClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(DepartmentClosure.ancestor_id, literal(department_id), DepartmentClosure.depth + 1)
+            .where(DepartmentClosure.descendant_id == parent_id),
+        ))
+
+
+def move_department(db: Session, department_id: int, parent_id: Optional[int]) -> None:
+    """
+    Переносить підрозділ з усім піддеревом під нового батька (None - в корінь).
+    Викликач перевіряє, що parent_id не лежить у піддереві. Без коміту.
+    """
+    subtree = subtree_ids(db, department_id)
+
+    # Розриваємо зв'язки піддерева з колишніми предками, внутрішні зв'язки лишаються
+    db.execute(
+        delete(DepartmentClosure)
+        .where(DepartmentClosure.descendant_id.in_(subtree))
+        .where(DepartmentClosure.ancestor_id.not_in(subtree))
+    )
+
+    if parent_id is not None:
+        # Кожен предок нового батька x кожен вузол піддерева
+        above = aliased(DepartmentClosure)
+        below = aliased(DepartmentClosure)
+        db.execute(insert(DepartmentClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+            .select_from(above)
+            .join(below, true())
+            .where(above.descendant_id == parent_id)
+            .where(below.ancestor_id == department_id),
+        ))
+
+
+def backfill_department_closure(conn: Connection) -> None:
+    """
+    Перебудовує замикання з departments.parent_id, якщо якийсь підрозділ
+    не має власного рядка (бази, створені до появи ієрархії).
+    """
+    departments = conn.execute(select(func.count()).select_from(Department)).scalar_one()
+    self_rows = conn.execute(
+        select(func.count()).select_from(DepartmentClosure).where(DepartmentClosure.depth == 0)
+    ).scalar_one()
+    if departments == self_rows:
+        return
+
+    parents = dict(conn.execute(select(Department.id, Department.parent_id)).all())
+    rows = []
+    for department_id in parents:
+        ancestor, depth = department_id, 0
+        while ancestor is not None and depth <= len(parents):
+            rows.append({"ancestor_id": ancestor, "descendant_id": department_id, "depth": depth})
+            ancestor, depth = parents.get(ancestor), depth + 1
+
+    conn.execute(delete(DepartmentClosure))
+    if rows:
+        conn.execute(insert(DepartmentClosure), rows)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import event, exists, insert, literal, or_, select, tuple_, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models.work_entry import WorkEntry
+from .models.work_entry_history import WorkEntryVersion
+
+# valid_from для записів, що існували до появи історії
+HISTORY_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Скільки ключів (user_id, date) закривати одним UPDATE
+_CLOSE_CHUNK = 500
+
+
+def work_entry_version(entry) -> dict:
+    """Значення запису розкладу для нової версії (ORM-об'єкт або будь-що з тими ж атрибутами)."""
+    return {
+        "user_id": entry.user_id,
+        "date": entry.date,
+        "type": entry.type,
+        "start_time": entry.start_time,
+        "end_time": entry.end_time,
+        "title": entry.title,
+    }
+
+
+def record_work_entry_versions(
+        connection: Connection,
+        upserts: list[dict],
+        deleted: Iterable[tuple[int, date]] = (),
+        at: Optional[datetime] = None,
+) -> None:
+    """
+    Закриває поточні версії змінених днів і відкриває нові для upserts.
+    Для масових SQL-операцій, які оминають ORM, викликається явно
+    з тим самим з'єднанням, що й сама операція.
+    """
+    at = at or datetime.now(timezone.utc)
+    keys = list({(r["user_id"], r["date"]) for r in upserts} | set(deleted))
+    if not keys:
+        return
+
+    for start in range(0, len(keys), _CLOSE_CHUNK):
+        connection.execute(
+            update(WorkEntryVersion)
+            .where(tuple_(WorkEntryVersion.user_id, WorkEntryVersion.date).in_(keys[start:start + _CLOSE_CHUNK]))
+            .where(WorkEntryVersion.valid_to.is_(None))
+            .values(valid_to=at)
+        )
+    if upserts:
+        connection.execute(insert(WorkEntryVersion), [{**r, "valid_from": at, "valid_to": None} for r in upserts])
+
+
+def entries_as_of(
+        db: Session,
+        user_id: int,
+        first_day: date,
+        end_exclusive: date,
+        as_of: datetime,
+) -> list[WorkEntryVersion]:
+    """Розклад користувача в діапазоні дат таким, яким він був на момент as_of."""
+    if as_of.tzinfo is None:
+        as_of = as_of.replace(tzinfo=timezone.utc)
+    return db.execute(
+        select(WorkEntryVersion)
+        .where(WorkEntryVersion.user_id == user_id)
+        .where(WorkEntryVersion.date >= first_day)
+        .where(WorkEntryVersion.date < end_exclusive)
+        .where(WorkEntryVersion.valid_from <= as_of)
+        .where(or_(WorkEntryVersion.valid_to.is_(None), WorkEntryVersion.valid_to > as_of))
+        .order_by(WorkEntryVersion.date.asc())
+    ).scalars().all()
+
+
+def backfill_work_entry_history(conn: Connection) -> None:
+    """
+    Відкриває початкові версії для записів розкладу, яких ще немає в історії.
+    Разовий крок старту (run_once): повний anti-join по розкладу не повторюється.
+    """
+    has_current = (
+        select(WorkEntryVersion.id)
+        .where(WorkEntryVersion.user_id == WorkEntry.user_id)
+        .where(WorkEntryVersion.date == WorkEntry.date)
+        .where(WorkEntryVersion.valid_to.is_(None))
+    )
+    conn.execute(insert(WorkEntryVersion).from_select(
+        ["user_id", "date", "type", "start_time", "end_time", "title", "valid_from"],
+        select(
+            WorkEntry.user_id, WorkEntry.date, WorkEntry.type,
+            WorkEntry.start_time, WorkEntry.end_time, WorkEntry.title,
+            literal(HISTORY_EPOCH, WorkEntryVersion.valid_from.type),
+        ).where(~exists(has_current)),
+    ))
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_versions(session: Session, flush_context) -> None:
+    upserts = [work_entry_version(obj) for obj in session.new if isinstance(obj, WorkEntry)]
+    upserts += [
+        work_entry_version(obj)
+        for obj in session.dirty
+        if isinstance(obj, WorkEntry) and session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [(obj.user_id, obj.date) for obj in session.deleted if isinstance(obj, WorkEntry)]
+    if upserts or deleted:
+        record_work_entry_versions(session.connection(), upserts, deleted)
@@ -0,0 +1,35 @@
+"""
+Підготовка бази під час старту процесу.
+
+Старт виконує кожен воркер кожного процесу, тож підготовка йде в одній
+транзакції під advisory-блокуванням (PostgreSQL): воркери проходять її по
+черзі. Разові кроки (перебудова похідних таблиць для старих баз) після
+успіху лишають позначку в maintenance_runs і більше не запускаються -
+наступні старти лише перевіряють позначку.
+"""
+from __future__ import annotations
+
+from typing import Callable
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.engine import Connection
+
+from .models.maintenance import MaintenanceRun
+
+# Ключ pg_advisory_xact_lock для підготовки бази під час старту
+STARTUP_LOCK_KEY = 0x48524D01
+
+
+def lock_startup(conn: Connection) -> None:
+    """Блокування до кінця транзакції; у SQLite записи й так послідовні."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": STARTUP_LOCK_KEY})
+
+
+def run_once(conn: Connection, name: str, step: Callable[[Connection], object]) -> bool:
+    """Виконує крок, якщо його ще не позначено як виконаний. Викликається під lock_startup."""
+    if conn.execute(select(MaintenanceRun.name).where(MaintenanceRun.name == name)).first() is not None:
+        return False
+    step(conn)
+    conn.execute(insert(MaintenanceRun).values(name=name))
+    return True
@@ -1,5 +1,13 @@
 from .user import User
-from .department import Department
+from .department import Department, DepartmentClosure
 from .profile import EmployeeProfile
 from .work_entry import WorkEntry
-from .service_request import ServiceRequest
\ No newline at end of file
+from .work_entry_history import WorkEntryVersion
+from .service_request import ServiceRequest
+from .change_log import ChangeLogEntry
+from .job import Job
+from .leave import Holiday, LeaveLedgerEntry
+from .outbox import OutboxMessage
+from .absence import Absence
+from .work_week import WorkWeekHours
+from .maintenance import MaintenanceRun
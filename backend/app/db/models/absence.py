@@ -0,0 +1,31 @@
+from datetime import date
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Date, ForeignKey, Index
+from ..database import Base
+from ..tenant import TenantScoped
+
+class Absence(TenantScoped, Base):
+    """
+    Стислий індекс відсутностей: суцільні проміжки днів одного типу
+    замість рядка на кожен день. Схвалені проміжки виводяться з розкладу
+    (app.db.absences), заявки на розгляді - з самих заявок.
+    """
+    __tablename__ = "absences"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    type: Mapped[str] = mapped_column(String(16), nullable=False) # vacation, sick, trip, off (лише заявки)
+    source: Mapped[str] = mapped_column(String(16), nullable=False) # request, manual
+    status: Mapped[str] = mapped_column(String(16), nullable=False) # approved, pending
+    service_request_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("service_requests.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+
+    __table_args__ = (
+        # "Хто відсутній у [from, to]": end_date >= from відсікає минуле, start_date <= to - решту
+        Index("ix_absences_tenant_end_start", "tenant_id", "end_date", "start_date"),
+        Index("ix_absences_user_start", "user_id", "start_date"),
+    )
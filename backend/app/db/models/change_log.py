@@ -0,0 +1,27 @@
+from datetime import date, datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, Integer, String, Date, DateTime, Index, func
+from ..database import Base
+
+class ChangeLogEntry(Base):
+    __tablename__ = "change_log"
+
+    # Номер зміни в межах транзакції. Номери видаються при INSERT, а не при коміті,
+    # тож самі по собі курсором синхронізації не є - див. txid
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # txid_current() транзакції, що записала зміну (у SQLite записи послідовні - 0).
+    # Курсор синхронізації - (txid, id) серед транзакцій, старших за xmin знімка
+    txid: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+
+    entity: Mapped[str] = mapped_column(String(32), nullable=False) # work_entry, service_request
+    op: Mapped[str] = mapped_column(String(16), nullable=False) # upsert, delete
+
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    entity_id: Mapped[int | None] = mapped_column(Integer, nullable=True) # id заявки
+    date: Mapped[date | None] = mapped_column(Date, nullable=True) # дата запису розкладу
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_change_log_user_txid_id", "user_id", "txid", "id"),
+    )
@@ -1,19 +1,35 @@
 from __future__ import annotations
-from sqlalchemy import Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Integer, String, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 from ..database import Base
+from ..tenant import TenantScoped
 
 
-class Department(Base):
+class Department(TenantScoped, Base):
     __tablename__ = "departments"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    name: Mapped[str] = mapped_column(String(128), nullable=False, unique=True)
-    manager_user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    name: Mapped[str] = mapped_column(String(128), nullable=False)
+    manager_user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    parent_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("departments.id", ondelete="SET NULL"), nullable=True, index=True)
 
     manager = relationship("User", foreign_keys=[manager_user_id], lazy="joined")
     employees = relationship("EmployeeProfile", back_populates="department")
 
     __table_args__ = (
-        UniqueConstraint("name", name="uq_departments_name"),
+        UniqueConstraint("tenant_id", "name", name="uq_departments_tenant_name"),
+        Index("ix_departments_tenant_manager", "tenant_id", "manager_user_id"),
     )
+
+
+class DepartmentClosure(Base):
+    """
+    Транзитивне замикання дерева підрозділів: рядок на кожну пару
+    (предок, нащадок), включно з (id, id, 0). Піддерево будь-якої глибини -
+    один індексований join без рекурсії.
+    """
+    __tablename__ = "department_closure"
+
+    ancestor_id: Mapped[int] = mapped_column(Integer, ForeignKey("departments.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(Integer, ForeignKey("departments.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,31 @@
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import JSON, Boolean, Float, Integer, String, Text, ForeignKey, DateTime, Index, func
+from ..database import Base
+from ..tenant import TenantScoped
+
+class Job(TenantScoped, Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_by: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued") # queued, running, succeeded, failed, cancelled
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0) # 0..1
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    params: Mapped[dict] = mapped_column(JSON, nullable=False)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Поки задача виконується, воркер продовжує оренду; прострочена оренда - воркер зник
+    lease_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_created_by_created_at", "created_by", "created_at"),
+        Index("ix_jobs_status", "status"),
+    )
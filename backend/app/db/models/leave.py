@@ -0,0 +1,44 @@
+from datetime import date, datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Date, ForeignKey, DateTime, Numeric, Index, UniqueConstraint, func
+from ..database import Base
+from ..tenant import TenantScoped
+
+class Holiday(TenantScoped, Base):
+    __tablename__ = "holidays"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    date: Mapped[date] = mapped_column(Date, nullable=False)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "date", name="uq_holidays_tenant_date"),
+    )
+
+
+class LeaveLedgerEntry(Base):
+    """
+    Рух днів відпустки за рік. Від'ємні days - використані дні (схвалені заявки),
+    додатні - ручні коригування (перенесення залишку, компенсації).
+    Річне нарахування не зберігається, а рахується з work_start_date.
+    """
+    __tablename__ = "leave_ledger"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    kind: Mapped[str] = mapped_column(String(16), nullable=False) # vacation, adjustment
+    days: Mapped[float] = mapped_column(Numeric(6, 2, asdecimal=False), nullable=False)
+    service_request_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("service_requests.id", ondelete="SET NULL"), nullable=True
+    )
+    note: Mapped[str | None] = mapped_column(String, nullable=True)
+
+    created_by: Mapped[int | None] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Баланс за рік - одна агрегація по (year, user_id) для всієї організації
+        Index("ix_leave_ledger_year_user", "year", "user_id"),
+    )
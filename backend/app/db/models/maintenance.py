@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime, func
+from ..database import Base
+
+class MaintenanceRun(Base):
+    """
+    Позначка виконаного разового кроку підготовки бази (перебудова похідних
+    таблиць для баз, створених до їх появи). Див. app.db.maintenance.
+    """
+    __tablename__ = "maintenance_runs"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import JSON, Integer, String, Text, DateTime, Index, func
+from ..database import Base
+from ..tenant import TenantScoped
+
+class OutboxMessage(TenantScoped, Base):
+    """
+    Побічний ефект зміни (рядок аудиту, сповіщення, вебхук), записаний
+    у тій самій транзакції, що й сама зміна. Доставляє app.outbox.
+    """
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    topic: Mapped[str] = mapped_column(String(32), nullable=False) # schedule_change, profile_change
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Невдала доставка відкладається з наростаючою паузою; після OUTBOX_MAX_ATTEMPTS повідомлення лишається для розбору
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Приймачі, які вже отримали повідомлення: повтор після збою іншого приймача їх оминає
+    delivered_sinks: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+
+    __table_args__ = (
+        Index("ix_outbox_available", "available_at", "id"),
+        # id - ключ для дедуплікації в приймачів, тож не повторюється і після видалення рядків
+        {"sqlite_autoincrement": True},
+    )
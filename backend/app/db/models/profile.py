@@ -1,24 +1,77 @@
 from datetime import date, datetime
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy import Integer, String, Date, ForeignKey, DateTime, func
+from sqlalchemy import DDL, Integer, String, Date, ForeignKey, ForeignKeyConstraint, DateTime, Index, UniqueConstraint, event, func, literal_column
 from ..database import Base
+from ..tenant import TenantScoped
 
-class EmployeeProfile(Base):
+class EmployeeProfile(TenantScoped, Base):
     __tablename__ = "employee_profiles"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    email: Mapped[str] = mapped_column(ForeignKey("users.email", ondelete="CASCADE"), unique=True, index=True, nullable=False)
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
 
     full_name: Mapped[str] = mapped_column(String, nullable=False)
     birth_date: Mapped[date | None] = mapped_column(Date, nullable=True)
-    employee_number: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    employee_number: Mapped[str] = mapped_column(String, nullable=False)
     position: Mapped[str] = mapped_column(String, nullable=False)
     work_start_date: Mapped[date | None] = mapped_column(Date, nullable=True)
 
-    department_id: Mapped[int] = mapped_column(Integer, ForeignKey("departments.id", ondelete="SET NULL"), nullable=True, index=True)
+    department_id: Mapped[int] = mapped_column(Integer, ForeignKey("departments.id", ondelete="SET NULL"), nullable=True)
     department = relationship("Department", back_populates="employees", lazy="joined")
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Лічильник версій для оптимістичних блокувань (If-Match, StaleDataError)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
 
-    user = relationship("User", back_populates="profile", primaryjoin="EmployeeProfile.email == User.email",)
+    user = relationship(
+        "User",
+        back_populates="profile",
+        primaryjoin="and_(EmployeeProfile.tenant_id == User.tenant_id, EmployeeProfile.email == User.email)",
+    )
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["tenant_id", "email"], ["users.tenant_id", "users.email"],
+            ondelete="CASCADE", name="fk_employee_profiles_user",
+        ),
+        UniqueConstraint("tenant_id", "email", name="uq_employee_profiles_tenant_email"),
+        UniqueConstraint("tenant_id", "employee_number", name="uq_employee_profiles_tenant_number"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+
+def profile_sort_key():
+    return func.lower(EmployeeProfile.full_name)
+
+
+def profile_search_text():
+    # Вираз має збігатися з індексом ix_employee_profiles_search_trgm, інакше індекс не буде використано,
+    # тому роздільник - літерал, а не параметр запиту
+    sep = literal_column("' '")
+    return func.lower(
+        EmployeeProfile.full_name + sep + EmployeeProfile.email + sep
+        + EmployeeProfile.employee_number + sep + EmployeeProfile.position
+    )
+
+
+# Сортування списку підрозділу і keyset-пагінація пошуку: (tenant_id, department_id, lower(full_name), id)
+Index(
+    "ix_employee_profiles_department_name",
+    EmployeeProfile.tenant_id, EmployeeProfile.department_id, profile_sort_key(), EmployeeProfile.id,
+)
+Index("ix_employee_profiles_name", EmployeeProfile.tenant_id, profile_sort_key(), EmployeeProfile.id)
+
+# Пошук підрядка по імені, email, табельному номеру і посаді (pg_trgm)
+Index(
+    "ix_employee_profiles_search_trgm",
+    profile_search_text().label("search_text"),
+    postgresql_using="gin",
+    postgresql_ops={"search_text": "gin_trgm_ops"},
+)
+
+event.listen(
+    EmployeeProfile.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
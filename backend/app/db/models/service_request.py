@@ -1,13 +1,14 @@
 from datetime import date, datetime
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy import Integer, String, Date, ForeignKey, DateTime, func
+from sqlalchemy import Integer, String, Date, ForeignKey, DateTime, Index, func
 from ..database import Base
+from ..tenant import TenantScoped
 
-class ServiceRequest(Base):
+class ServiceRequest(TenantScoped, Base):
     __tablename__ = "service_requests"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     type: Mapped[str] = mapped_column(String(16), nullable=False) # off, vacation, sick
     start_date: Mapped[date] = mapped_column(Date, nullable=False)
@@ -17,5 +18,13 @@ class ServiceRequest(Base):
     
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Лічильник версій для оптимістичних блокувань (If-Match, StaleDataError)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
     
     user = relationship("User", lazy="joined")
+
+    __table_args__ = (
+        Index("ix_service_requests_tenant_user", "tenant_id", "user_id"),
+        Index("ix_service_requests_tenant_created", "tenant_id", "created_at"),
+    )
+    __mapper_args__ = {"version_id_col": version}
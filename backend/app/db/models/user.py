@@ -1,13 +1,19 @@
-from sqlalchemy import String
+from sqlalchemy import String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..database import Base
+from ..tenant import TenantScoped
 
-class User(Base):
+class User(TenantScoped, Base):
     __tablename__ = "users"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
+    email: Mapped[str] = mapped_column(String(255))
     password_hash: Mapped[str] = mapped_column(String(255))
     role: Mapped[str] = mapped_column(String(50), default="employee")  # employee | manager
 
-    profile = relationship("EmployeeProfile", back_populates="user", uselist=False, cascade="all,delete", primaryjoin="User.email == EmployeeProfile.email",)
\ No newline at end of file
+    profile = relationship("EmployeeProfile", back_populates="user", uselist=False, cascade="all,delete", primaryjoin="and_(User.tenant_id == EmployeeProfile.tenant_id, User.email == EmployeeProfile.email)",)
+
+    __table_args__ = (
+        # Email унікальний у межах орендаря; на цю пару посилаються профілі
+        UniqueConstraint("tenant_id", "email", name="uq_users_tenant_email"),
+    )
\ No newline at end of file
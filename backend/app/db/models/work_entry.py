@@ -1,26 +1,33 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, Date, ForeignKey, Integer, String, Text, Time, UniqueConstraint
+from sqlalchemy import Column, Date, ForeignKey, Integer, String, Text, Time
 from sqlalchemy.orm import relationship
 
 from ..database import Base
+from ..tenant import TenantScoped, current_tenant_id
 
 
-class WorkEntry(Base):
+class WorkEntry(TenantScoped, Base):
     __tablename__ = "work_entries"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Ключ партиції (date) має входити в первинний ключ, тож ключем є (tenant_id, user_id, date)
+    tenant_id = Column(String(64), primary_key=True, default=current_tenant_id)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True, index=True)
 
-    date = Column(Date, nullable=False, index=True)
     type = Column(String(16), nullable=False)
 
     start_time = Column(Time, nullable=True)
     end_time = Column(Time, nullable=True)
     title = Column(Text, nullable=True)
 
+    # Лічильник версій для оптимістичних блокувань (If-Match, StaleDataError)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     user = relationship("User", lazy="joined")
 
-    __table_args__ = (
-        UniqueConstraint("user_id", "date", name="uq_work_entries_user_date"),
-    )
+    __table_args__ = {
+        # Партиції за роками створює і архівує app.db.partitions
+        "postgresql_partition_by": "RANGE (date)",
+    }
+    __mapper_args__ = {"version_id_col": version}
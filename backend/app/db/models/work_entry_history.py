@@ -0,0 +1,36 @@
+from datetime import date, datetime, time
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, Integer, String, Text, Date, Time, DateTime, Index, text
+from ..database import Base
+
+class WorkEntryVersion(Base):
+    """
+    Версія запису розкладу, чинна в інтервалі [valid_from, valid_to).
+    valid_to = NULL - поточна версія; видалення лише закриває інтервал.
+    """
+    __tablename__ = "work_entry_history"
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    type: Mapped[str] = mapped_column(String(16), nullable=False)
+    start_time: Mapped[time | None] = mapped_column(Time, nullable=True)
+    end_time: Mapped[time | None] = mapped_column(Time, nullable=True)
+    title: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    valid_from: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    valid_to: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Стан на момент часу: (user_id, діапазон дат) і valid_from <= T, далі перевірка valid_to
+        Index("ix_work_entry_history_user_date_from", "user_id", "date", "valid_from"),
+        # Не більше однієї поточної версії на день
+        Index(
+            "uq_work_entry_history_current", "user_id", "date",
+            unique=True,
+            postgresql_where=text("valid_to IS NULL"),
+            sqlite_where=text("valid_to IS NULL"),
+        ),
+    )
@@ -0,0 +1,18 @@
+from datetime import date
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Date, ForeignKey
+from ..database import Base
+from ..tenant import TenantScoped, current_tenant_id
+
+class WorkWeekHours(TenantScoped, Base):
+    """
+    Відпрацьовані хвилини працівника за ISO-тиждень (week_start - понеділок).
+    Агрегат розкладу для перевірки тижневої норми без читання всіх днів тижня;
+    підтримує app.db.week_hours.
+    """
+    __tablename__ = "work_week_hours"
+
+    tenant_id: Mapped[str] = mapped_column(String(64), primary_key=True, default=current_tenant_id)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    week_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    minutes: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .models.outbox import OutboxMessage
+
+OUTBOX_PENDING_KEY = "outbox_pending"
+
+# Викликаються після коміту сесії, що додала повідомлення (будить диспетчер)
+_commit_callbacks: list[Callable[[], None]] = []
+
+
+def on_outbox_commit(callback: Callable[[], None]) -> None:
+    _commit_callbacks.append(callback)
+
+
+def enqueue(session: Session, topic: str, payload: dict) -> None:
+    """Додає повідомлення в outbox у поточній транзакції сесії - воно з'явиться лише разом зі зміною."""
+    session.add(OutboxMessage(topic=topic, payload=payload))
+    session.info[OUTBOX_PENDING_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_dispatcher(session: Session) -> None:
+    if session.info.pop(OUTBOX_PENDING_KEY, False):
+        for callback in _commit_callbacks:
+            callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(OUTBOX_PENDING_KEY, None)
@@ -0,0 +1,232 @@
+"""
+Партиціювання work_entries за роками (лише PostgreSQL).
+
+Поточні й наступні роки живуть в окремих партиціях, тож індекси і vacuum
+свіжих місяців не залежать від обсягу історії. Закриті роки можна
+від'єднати в архів: таблиця ущільнюється (CLUSTER) і замість B-tree
+отримує BRIN-індекс, а читати її можна через подання work_entries_archive.
+
+    python -m app.db.partitions ensure
+    python -m app.db.partitions archive 2021
+"""
+from __future__ import annotations
+
+import re
+import sys
+from datetime import date
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from .models.work_entry import WorkEntry
+
+PARENT = "work_entries"
+DEFAULT_PARTITION = "work_entries_default"
+ARCHIVE_VIEW = "work_entries_archive"
+
+_PARTITION_RE = re.compile(r"^work_entries_y(\d{4})$")
+_ARCHIVE_RE = re.compile(r"^work_entries_archive_y(\d{4})$")
+
+# Ключ у session.info: архівні роки, прочитані в поточній транзакції
+_ARCHIVED_INFO_KEY = "archived_years"
+
+
+class ClosedPeriodError(Exception):
+    def __init__(self, year: int) -> None:
+        super().__init__(f"Schedule for {year} is archived and cannot be changed")
+        self.year = year
+
+
+def partition_name(year: int) -> str:
+    return f"work_entries_y{year}"
+
+
+def archive_name(year: int) -> str:
+    return f"work_entries_archive_y{year}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT}
+    ).scalar()
+    return relkind == "p"
+
+
+def attached_years(conn: Connection) -> set[int]:
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:name)"
+    ), {"name": PARENT}).scalars()
+    return {int(m.group(1)) for m in map(_PARTITION_RE.match, names) if m}
+
+
+def load_archived_years(conn: Connection) -> set[int]:
+    names = conn.execute(text(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND relname LIKE 'work\\_entries\\_archive\\_y%'"
+    )).scalars()
+    return {int(m.group(1)) for m in map(_ARCHIVE_RE.match, names) if m}
+
+
+def archived_years(db: Session) -> set[int]:
+    """
+    Архівні роки бази, з якою працює сесія (запис у них заборонено). Архівує
+    окремий процес (python -m app.db.partitions archive), тож роки читаються
+    з каталогу раз на транзакцію, а не кешуються на весь час роботи процесу.
+    """
+    years = db.info.get(_ARCHIVED_INFO_KEY)
+    if years is None:
+        conn = db.connection()
+        years = load_archived_years(conn) if conn.dialect.name == "postgresql" else set()
+        db.info[_ARCHIVED_INFO_KEY] = years
+    return years
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_archived_years(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_ARCHIVED_INFO_KEY, None)
+
+
+def _create_year_partition(conn: Connection, year: int) -> None:
+    name = partition_name(year)
+    bounds = {"start": date(year, 1, 1), "end": date(year + 1, 1, 1)}
+
+    # Рядки цього року, що потрапили в default-партицію, переносимо в нову
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    conn.execute(text(
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    ))
+
+
+def ensure_work_entry_partitions(conn: Connection, today: date | None = None) -> list[int]:
+    """
+    Створює default-партицію і партиції на поточний та наступні
+    WORK_ENTRY_PARTITION_YEARS_AHEAD років, а також для років, рядки яких
+    осіли в default. Повертає створені роки.
+    """
+    if not is_partitioned(conn):
+        return []
+
+    # Кілька воркерів можуть стартувати одночасно
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('work_entries_partitions'))"))
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+
+    archived = load_archived_years(conn)
+
+    current = (today or date.today()).year
+    wanted = set(range(current, current + settings.WORK_ENTRY_PARTITION_YEARS_AHEAD + 1))
+    wanted |= {
+        int(y) for y in conn.execute(text(
+            f"SELECT DISTINCT extract(year FROM date)::int FROM {DEFAULT_PARTITION}"
+        )).scalars()
+    }
+
+    created = sorted(wanted - attached_years(conn) - archived)
+    for year in created:
+        _create_year_partition(conn, year)
+    return created
+
+
+def archive_work_entry_year(conn: Connection, year: int, today: date | None = None) -> None:
+    """
+    Від'єднує партицію закритого року, ущільнює її і перебудовує подання архіву.
+    Запис у цей рік після архівації відхиляється (CHECK на default-партиції).
+    """
+    if year >= (today or date.today()).year:
+        raise ValueError("Only closed (past) years can be archived")
+    if year not in attached_years(conn):
+        raise ValueError(f"Partition for {year} is not attached")
+
+    name, archive = partition_name(year), archive_name(year)
+    conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+    conn.execute(text(f"ALTER TABLE {name} RENAME TO {archive}"))
+
+    pkey = conn.execute(text(
+        "SELECT c.conname FROM pg_constraint c WHERE c.conrelid = to_regclass(:t) AND c.contype = 'p'"
+    ), {"t": archive}).scalar()
+    pkey_index = conn.execute(text(
+        "SELECT i.indexrelid::regclass::text FROM pg_index i WHERE i.indrelid = to_regclass(:t) AND i.indisprimary"
+    ), {"t": archive}).scalar()
+    conn.execute(text(f"CLUSTER {archive} USING {pkey_index}"))
+
+    # Після CLUSTER рядки впорядковані за (user_id, date) - BRIN достатньо і він у сотні разів менший
+    conn.execute(text(f"ALTER TABLE {archive} DROP CONSTRAINT {pkey}"))
+    for index_name in conn.execute(text(
+        "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = to_regclass(:t)"
+    ), {"t": archive}).scalars().all():
+        conn.execute(text(f"DROP INDEX {index_name}"))
+    conn.execute(text(f"CREATE INDEX {archive}_brin ON {archive} USING brin (user_id, date)"))
+
+    conn.execute(text(
+        f"ALTER TABLE {DEFAULT_PARTITION} ADD CONSTRAINT {DEFAULT_PARTITION}_not_{year} "
+        f"CHECK (date < '{date(year, 1, 1)}' OR date >= '{date(year + 1, 1, 1)}')"
+    ))
+
+    _rebuild_archive_view(conn)
+
+
+def _rebuild_archive_view(conn: Connection) -> None:
+    years = sorted(load_archived_years(conn))
+    conn.execute(text(f"DROP VIEW IF EXISTS {ARCHIVE_VIEW}"))
+    if years:
+        union = " UNION ALL ".join(
+            f"SELECT user_id, date, type, start_time, end_time, title FROM {archive_name(y)}" for y in years
+        )
+        conn.execute(text(f"CREATE VIEW {ARCHIVE_VIEW} AS {union}"))
+
+
+def read_archived_entries(db: Session, user_id: int, first_day: date, end_exclusive: date) -> list[WorkEntry]:
+    """Записи з архівних років у діапазоні. Повертає відокремлені (не в сесії) об'єкти WorkEntry."""
+    last_year = date.fromordinal(end_exclusive.toordinal() - 1).year
+    if not any(first_day.year <= y <= last_year for y in archived_years(db)):
+        return []
+
+    rows = db.execute(text(
+        f"SELECT user_id, date, type, start_time, end_time, title FROM {ARCHIVE_VIEW} "
+        "WHERE user_id = :user_id AND date >= :first_day AND date < :end_exclusive ORDER BY date"
+    ), {"user_id": user_id, "first_day": first_day, "end_exclusive": end_exclusive})
+    return [WorkEntry(**row._mapping) for row in rows]
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_archived_writes(session: Session, flush_context, instances) -> None:
+    years = {
+        obj.date.year for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, WorkEntry)
+    }
+    if not years:
+        return
+    closed = sorted(years & archived_years(session))
+    if closed:
+        raise ClosedPeriodError(closed[0])
+
+
+def main(argv: list[str]) -> None:
+    from .database import all_engines
+
+    command = argv[0] if argv else "ensure"
+    if command not in ("ensure", "archive") or (command == "archive" and len(argv) != 2):
+        print(__doc__)
+        return
+    # Кожна окрема база орендаря має власні партиції
+    for engine in all_engines():
+        with engine.begin() as conn:
+            if command == "ensure":
+                print(engine.url.render_as_string(), "created:", ensure_work_entry_partitions(conn) or "nothing")
+            else:
+                ensure_work_entry_partitions(conn)
+                archive_work_entry_year(conn, int(argv[1]))
+                print(engine.url.render_as_string(), "archived:", argv[1])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
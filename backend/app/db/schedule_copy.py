@@ -0,0 +1,153 @@
+"""
+Копіювання розкладу на боці БД: один INSERT ... SELECT ... ON CONFLICT на всю
+операцію замість читання і запису днів через ORM. Відповідність днів
+(цільовий день -> день-джерело) будується тут же, в Python: це не більше
+кількох сотень пар, а рядків розкладу - скільки завгодно.
+
+INSERT оминає ORM, тож журнал змін, події, історію версій, індекс
+відсутностей і тижневі години оновлюємо явно з рядків RETURNING.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import Date, Integer, func, literal, select, true, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from ..events import event_from_change, queue_events
+from .absences import refresh_absences_for
+from .changes import record_changes, work_entry_change
+from .history import record_work_entry_versions, work_entry_version
+from .models.work_entry import WorkEntry
+from .partitions import ClosedPeriodError, archived_years
+from .tenant import current_tenant_id
+from .week_hours import refresh_week_hours_for
+
+# Найдовше цільове вікно однієї операції, днів
+MAX_COPY_DAYS = 366
+
+
+def copy_date_pairs(
+        source_start: date,
+        source_end: date,
+        target_start: date,
+        target_end: date,
+        align_weekdays: bool = True,
+) -> list[tuple[date, date]]:
+    """
+    Пари (цільовий день, день-джерело). З вирівнюванням по днях тижня джерело
+    береться як шаблон із цілих тижнів і повторюється на все цільове вікно,
+    тож понеділок завжди копіюється в понеділок (жовтень -> листопад, тиждень ->
+    наступні N тижнів). Без вирівнювання - простий зсув на target_start - source_start.
+    ValueError, якщо цільове вікно довше за MAX_COPY_DAYS.
+    """
+    length = (source_end - source_start).days + 1
+    days = (target_end - target_start).days + 1
+    # Довжину вікна перевіряємо до того, як будувати список днів
+    if days > MAX_COPY_DAYS:
+        raise ValueError(f"Target period must not exceed {MAX_COPY_DAYS} days")
+    targets = [target_start + timedelta(days=i) for i in range(days)]
+
+    if not align_weekdays:
+        shift = target_start - source_start
+        return [(t, t - shift) for t in targets if source_start <= t - shift <= source_end]
+
+    period = length // 7 * 7
+    if period == 0:
+        raise ValueError("Weekday-aligned copy needs a source period of at least 7 days")
+    return [(t, source_start + timedelta(days=(t - source_start).days % period)) for t in targets]
+
+
+def _insert_for(db: Session):
+    return postgresql.insert if db.connection().dialect.name == "postgresql" else sqlite.insert
+
+
+def copy_work_entries(
+        db: Session,
+        pairs: list[tuple[date, date]],
+        source_user_ids: Select,
+        target_user_ids: Optional[Select] = None,
+        overwrite: bool = True,
+) -> tuple[list, int]:
+    """
+    Копіює записи розкладу одним SQL-запитом без коміту.
+
+    source_user_ids - підзапит з id працівників-джерел. Без target_user_ids
+    кожен копіює власний розклад (між періодами), інакше розклад єдиного
+    джерела розмножується на всіх target_user_ids. overwrite - як у
+    ScheduleRangeUpsertIn: наявні дні перезаписуються або пропускаються.
+    Повертає (записані рядки, кількість пропущених днів).
+    """
+    if not pairs:
+        return [], 0
+    closed = sorted({t.year for t, _ in pairs} & archived_years(db))
+    if closed:
+        raise ClosedPeriodError(closed[0])
+
+    tenant_id = current_tenant_id()
+    dates = union_all(*(
+        select(literal(t, Date).label("target_date"), literal(s, Date).label("source_date"))
+        for t, s in pairs
+    )).subquery("copy_dates")
+
+    src = WorkEntry.__table__
+    joined = src.join(dates, dates.c.source_date == src.c.date)
+    if target_user_ids is None:
+        user_col = src.c.user_id
+    else:
+        targets = target_user_ids.subquery("copy_targets")
+        joined = joined.join(targets, true())
+        user_col = targets.c[0]
+
+    source = (
+        select(
+            literal(tenant_id).label("tenant_id"),
+            user_col.label("user_id"),
+            dates.c.target_date,
+            src.c.type,
+            src.c.start_time,
+            src.c.end_time,
+            src.c.title,
+            literal(1, Integer).label("version"),
+        )
+        .select_from(joined)
+        # INSERT не проходить через фільтр орендаря в do_orm_execute, тож обмежуємо явно
+        .where(src.c.tenant_id == tenant_id)
+        .where(src.c.user_id.in_(source_user_ids))
+    )
+
+    stmt = _insert_for(db)(src).from_select(
+        ["tenant_id", "user_id", "date", "type", "start_time", "end_time", "title", "version"], source
+    )
+    keys = [src.c.tenant_id, src.c.user_id, src.c.date]
+    if overwrite:
+        stmt = stmt.on_conflict_do_update(index_elements=keys, set_={
+            "type": stmt.excluded.type,
+            "start_time": stmt.excluded.start_time,
+            "end_time": stmt.excluded.end_time,
+            "title": stmt.excluded.title,
+            "version": src.c.version + 1,
+        })
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+
+    # version = 1 лише у щойно вставлених рядках, тож created/updated видно без окремого читання
+    stmt = stmt.returning(src.c.user_id, src.c.date, src.c.type, src.c.start_time, src.c.end_time, src.c.title, src.c.version)
+
+    # Без overwrite пропущені дні в RETURNING не потрапляють - рахуємо їх як різницю
+    total = None if overwrite else db.execute(select(func.count()).select_from(source.subquery())).scalar_one()
+    rows = db.execute(stmt).all()
+    skipped = 0 if total is None else total - len(rows)
+
+    connection = db.connection()
+    changes = [work_entry_change(r.user_id, r.date, "upsert") for r in rows]
+    record_changes(connection, changes)
+    queue_events(db, [event_from_change(c) for c in changes])
+    record_work_entry_versions(connection, [work_entry_version(r) for r in rows])
+    keys = [(tenant_id, r.user_id, r.date) for r in rows]
+    refresh_absences_for(connection, keys)
+    refresh_week_hours_for(connection, keys)
+    return rows, skipped
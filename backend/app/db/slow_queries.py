@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..config import settings
+from .tenant import current_tenant
+
+log = logging.getLogger(__name__)
+
+QUERY_STARTS_KEY = "query_starts"
+
+# ASGI scope поточного запиту; маршрут (шаблон шляху) з'являється в ньому після роутингу
+current_scope: ContextVar[Optional[Scope]] = ContextVar("current_scope", default=None)
+
+# Розгорнутий IN (:p_1, :p_2, ...) - один шаблон незалежно від кількості значень
+_PLACEHOLDER = r"(?:%\(\w+\)s|%s|\?|:\w+|\$\d+)"
+_IN_LIST_RE = re.compile(rf"IN \({_PLACEHOLDER}(?:, {_PLACEHOLDER})*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+_EXPANDED_PARAM_RE = re.compile(r"^(.+)_\d+$")
+# Плейсхолдери psycopg2 для EXPLAIN (GENERIC_PLAN), який приймає лише $n
+_PYFORMAT_RE = re.compile(r"%\((\w+)\)s|%s|%%")
+# Значення в умовах плану: рядкові літерали і числа в рядках Cond/Filter
+_PLAN_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PLAN_CONDITION_RE = re.compile(r"(?:Cond|Filter): ")
+_PLAN_NUMBER_RE = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?(?![\w.])")
+
+
+class QueryRouteMiddleware:
+    """Робить маршрут поточного запиту доступним для журналу повільних запитів."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
+
+
+def current_route() -> Optional[str]:
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else scope['path']}"
+
+
+def normalize_sql(statement: str) -> str:
+    return _IN_LIST_RE.sub("IN (...)", _WHITESPACE_RE.sub(" ", statement).strip())
+
+
+def _type_name(value: Any) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+def parameters_shape(parameters: Any, executemany: bool) -> dict:
+    """Типи параметрів без значень; розгорнуті параметри IN згортаються в name_*: type xN."""
+    if executemany:
+        rows = list(parameters)
+        shape = parameters_shape(rows[0], False) if rows else {}
+        return {"executemany": len(rows), **shape}
+    if isinstance(parameters, dict):
+        shape: dict[str, str] = {}
+        expanded: dict[str, list[str]] = {}
+        for name, value in parameters.items():
+            m = _EXPANDED_PARAM_RE.match(name)
+            if m and f"{m.group(1)}_1" in parameters and f"{m.group(1)}_2" in parameters:
+                expanded.setdefault(f"{m.group(1)}_*", []).append(_type_name(value))
+            else:
+                shape[name] = _type_name(value)
+        for name, types in expanded.items():
+            shape[name] = f"{types[0]} x{len(types)}"
+        return shape
+    return {str(i): _type_name(v) for i, v in enumerate(parameters or ())}
+
+
+def generic_statement(statement: str) -> str:
+    """SQL з плейсхолдерами psycopg2, переписаний на $1, $2, ... (однакові імена - один номер)."""
+    numbers: dict[str, int] = {}
+    positional = 0
+
+    def replace(m: re.Match) -> str:
+        nonlocal positional
+        if m.group(0) == "%%":
+            return "%"
+        if m.group(1) is None:
+            positional += 1
+            return f"${positional}"
+        return f"${numbers.setdefault(m.group(1), len(numbers) + 1)}"
+
+    return _PYFORMAT_RE.sub(replace, statement)
+
+
+def redact_plan(plan: str) -> str:
+    """Прибирає з плану значення параметрів, що потрапили в умови (персональні дані)."""
+    lines = []
+    for line in _PLAN_STRING_RE.sub("'?'", plan).splitlines():
+        m = _PLAN_CONDITION_RE.search(line)
+        if m:
+            line = line[:m.end()] + _PLAN_NUMBER_RE.sub("?", line[m.end():])
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class SlowQueryLog:
+    """
+    Останні повільні запити і зведення за нормалізованим SQL в межах процесу,
+    окремо для кожного орендаря. Для вибірки повільних SELECT у PostgreSQL у
+    фоні знімається план - не частіше разу на SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS
+    для одного й того ж SQL. За замовчуванням це EXPLAIN (GENERIC_PLAN) без
+    значень параметрів; EXPLAIN (ANALYZE, BUFFERS) зі справжніми параметрами
+    виконується лише з SLOW_QUERY_EXPLAIN_ANALYZE, і значення з умов плану
+    все одно вирізаються.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.recent: deque[dict] = deque(maxlen=size)
+        # Ключ зведень і планів - (орендар, SQL); орендар None - службовий код
+        self.stats: dict[tuple[Optional[str], str], dict] = {}
+        self.plans: dict[tuple[Optional[str], str], dict] = {}
+        self._lock = threading.Lock()
+        self._explained_at: dict[tuple[Optional[str], str], float] = {}
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    def record(self, engine: Engine, statement: str, parameters: Any, executemany: bool, duration_ms: float) -> None:
+        sql = normalize_sql(statement)
+        tenant_id = current_tenant.get()
+        key = (tenant_id, sql)
+        entry = {
+            "tenant_id": tenant_id,
+            "sql": sql,
+            "parameters": parameters_shape(parameters, executemany),
+            "duration_ms": round(duration_ms, 2),
+            "route": current_route(),
+            "at": datetime.now(timezone.utc).isoformat(),
+        }
+        log.warning("Slow query %.1f ms [%s]: %s", duration_ms, entry["route"], sql)
+
+        with self._lock:
+            self.recent.append(entry)
+            stat = self.stats.get(key)
+            if stat is None:
+                if len(self.stats) >= settings.SLOW_QUERY_LOG_SIZE:
+                    # Витісняємо найрідше повільний запит
+                    del self.stats[min(self.stats, key=lambda k: self.stats[k]["count"])]
+                stat = self.stats[key] = {"sql": sql, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "routes": []}
+            stat["count"] += 1
+            stat["total_ms"] = round(stat["total_ms"] + duration_ms, 2)
+            stat["max_ms"] = max(stat["max_ms"], entry["duration_ms"])
+            if entry["route"] and entry["route"] not in stat["routes"]:
+                stat["routes"].append(entry["route"])
+
+            if self._should_explain(engine, key, executemany):
+                self._explained_at[key] = time.monotonic()
+                self._explainer.submit(self._explain, engine, key, statement, parameters)
+
+    def _should_explain(self, engine: Engine, key: tuple[Optional[str], str], executemany: bool) -> bool:
+        if engine.dialect.name != "postgresql" or executemany or not key[1].upper().startswith("SELECT"):
+            return False
+        if random.random() >= settings.SLOW_QUERY_EXPLAIN_RATE:
+            return False
+        last = self._explained_at.get(key)
+        return last is None or time.monotonic() - last >= settings.SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS
+
+    def _explain(self, engine: Engine, key: tuple[Optional[str], str], statement: str, parameters: Any) -> None:
+        # Окреме DBAPI-з'єднання в транзакції лише для читання, тож EXPLAIN не потрапляє в журнал
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute("SET TRANSACTION READ ONLY")
+            if settings.SLOW_QUERY_EXPLAIN_ANALYZE:
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+            else:
+                # План без значень параметрів і без виконання запиту (PostgreSQL 16+)
+                cursor.execute("EXPLAIN (GENERIC_PLAN) " + generic_statement(statement))
+            plan = redact_plan("\n".join(row[0] for row in cursor.fetchall()))
+            cursor.close()
+            raw.rollback()
+        except Exception:
+            log.exception("EXPLAIN failed for slow query: %s", key[1])
+            return
+        finally:
+            raw.close()
+
+        with self._lock:
+            self.plans[key] = {"plan": plan, "at": datetime.now(timezone.utc).isoformat()}
+            while len(self.plans) > settings.SLOW_QUERY_LOG_SIZE:
+                del self.plans[next(iter(self.plans))]
+
+    def snapshot(self, tenant_id: str, limit: int) -> dict:
+        """Зведення лише за запитами орендаря tenant_id."""
+        with self._lock:
+            own = [(key, s) for key, s in self.stats.items() if key[0] == tenant_id]
+            top = sorted(own, key=lambda item: item[1]["total_ms"], reverse=True)[:limit]
+            recent = [e for e in self.recent if e["tenant_id"] == tenant_id]
+            return {
+                "threshold_ms": settings.SLOW_QUERY_MS,
+                "top": [{**s, "routes": list(s["routes"]), "plan": self.plans.get(key)} for key, s in top],
+                "recent": recent[-limit:][::-1],
+            }
+
+    def clear(self, tenant_id: str) -> None:
+        with self._lock:
+            kept = [e for e in self.recent if e["tenant_id"] != tenant_id]
+            self.recent.clear()
+            self.recent.extend(kept)
+            for store in (self.stats, self.plans, self._explained_at):
+                for key in [k for k in store if k[0] == tenant_id]:
+                    del store[key]
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_LOG_SIZE)
+
+
+def install_slow_query_log(engine: Engine) -> None:
+    if settings.SLOW_QUERY_MS <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(QUERY_STARTS_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info[QUERY_STARTS_KEY].pop()) * 1000
+        if duration_ms >= settings.SLOW_QUERY_MS:
+            slow_query_log.record(conn.engine, statement, parameters, executemany, duration_ms)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        starts = context.connection.info.get(QUERY_STARTS_KEY) if context.connection is not None else None
+        if starts:
+            starts.pop()
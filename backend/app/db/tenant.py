@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import String, event
+from sqlalchemy.orm import Mapped, Session, mapped_column, with_loader_criteria
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..config import settings
+
+TENANT_HEADER = b"x-tenant-id"
+
+# Орендар поточного запиту або задачі; None - службовий код без обмеження (старт, міграції)
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+
+def current_tenant_id() -> str:
+    return current_tenant.get() or settings.DEFAULT_TENANT
+
+
+class TenantScoped:
+    """
+    Домішка для моделей, розділених за орендарями. Нові рядки отримують
+    орендаря поточного запиту, а всі ORM-запити до таких моделей
+    автоматично обмежуються ним (див. _limit_to_tenant).
+    """
+    tenant_id: Mapped[str] = mapped_column(String(64), nullable=False, default=current_tenant_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _limit_to_tenant(state) -> None:
+    tenant = current_tenant.get()
+    if tenant is None or state.is_column_load or state.is_relationship_load:
+        return
+    if state.is_select or state.is_update or state.is_delete:
+        state.statement = state.statement.options(
+            with_loader_criteria(TenantScoped, lambda cls: cls.tenant_id == tenant, include_aliases=True)
+        )
+
+
+def tenant_from_token(token: str) -> Optional[str]:
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALG])
+    except JWTError:
+        return None
+    return payload.get("tid") or settings.DEFAULT_TENANT
+
+
+class TenantMiddleware:
+    """
+    Визначає орендаря запиту: з claim tid токена, а для запитів без
+    токена (реєстрація, вхід) - із заголовка X-Tenant-ID. Заголовок не може
+    перевизначити орендаря дійсного токена.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        tenant = None
+        auth = headers.get(b"authorization", b"")
+        if auth[:7].lower() == b"bearer ":
+            tenant = tenant_from_token(auth[7:].decode("latin-1"))
+        if tenant is None:
+            tenant = headers.get(TENANT_HEADER, b"").decode("latin-1").strip() or settings.DEFAULT_TENANT
+
+        token = current_tenant.set(tenant)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant.reset(token)
@@ -0,0 +1,103 @@
+"""
+Підтримка агрегату work_week_hours: після кожного flush, що змінив записи
+розкладу, тижні цих днів перераховуються з work_entries - не більше семи
+рядків на тиждень, тож вартість пропорційна кількості змінених днів.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models.work_entry import WorkEntry
+from .models.work_week import WorkWeekHours
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def shift_minutes(start_time: Optional[time], end_time: Optional[time]) -> int:
+    """Тривалість зміни в хвилинах; дні без часу (вихідні, відпустки) - 0."""
+    if start_time is None or end_time is None:
+        return 0
+    return int((datetime.combine(date.min, end_time) - datetime.combine(date.min, start_time)).total_seconds() // 60)
+
+
+def refresh_week_hours(connection: Connection, tenant_id: str, user_id: int, weeks: Iterable[date]) -> None:
+    """
+    Перераховує тижні (понеділки) користувача. Для масових SQL-операцій,
+    які оминають ORM, викликається явно з тим самим з'єднанням.
+    """
+    weeks = sorted(set(weeks))
+    if not weeks:
+        return
+    days = [w + timedelta(days=i) for w in weeks for i in range(7)]
+    totals = dict.fromkeys(weeks, 0)
+    for day, start_time, end_time in connection.execute(
+        select(WorkEntry.date, WorkEntry.start_time, WorkEntry.end_time)
+        .where(WorkEntry.tenant_id == tenant_id)
+        .where(WorkEntry.user_id == user_id)
+        .where(WorkEntry.date.in_(days))
+    ):
+        totals[week_start(day)] += shift_minutes(start_time, end_time)
+
+    connection.execute(
+        delete(WorkWeekHours)
+        .where(WorkWeekHours.tenant_id == tenant_id)
+        .where(WorkWeekHours.user_id == user_id)
+        .where(WorkWeekHours.week_start.in_(weeks))
+    )
+    rows = [
+        {"tenant_id": tenant_id, "user_id": user_id, "week_start": w, "minutes": m}
+        for w, m in totals.items() if m
+    ]
+    if rows:
+        connection.execute(insert(WorkWeekHours), rows)
+
+
+def refresh_week_hours_for(connection: Connection, keys: Iterable[tuple[str, int, date]]) -> None:
+    """Перераховує тижні для набору змінених днів (tenant_id, user_id, date)."""
+    by_user: dict[tuple[str, int], set[date]] = {}
+    for tenant_id, user_id, day in keys:
+        by_user.setdefault((tenant_id, user_id), set()).add(week_start(day))
+    for (tenant_id, user_id), weeks in by_user.items():
+        refresh_week_hours(connection, tenant_id, user_id, weeks)
+
+
+def backfill_week_hours(conn: Connection) -> None:
+    """
+    Будує агрегат для баз, створених до його появи (коли таблиця ще порожня).
+    Разовий крок старту (run_once) під блокуванням: паралельні воркери не
+    вставляють ті самі ключі двічі.
+    """
+    if conn.execute(select(WorkWeekHours.user_id).limit(1)).first() is not None:
+        return
+    totals: dict[tuple[str, int, date], int] = {}
+    for tenant_id, user_id, day, start_time, end_time in conn.execute(
+        select(WorkEntry.tenant_id, WorkEntry.user_id, WorkEntry.date, WorkEntry.start_time, WorkEntry.end_time)
+        .where(WorkEntry.start_time.is_not(None))
+        .where(WorkEntry.end_time.is_not(None))
+    ):
+        key = (tenant_id, user_id, week_start(day))
+        totals[key] = totals.get(key, 0) + shift_minutes(start_time, end_time)
+    rows = [
+        {"tenant_id": t, "user_id": u, "week_start": w, "minutes": m}
+        for (t, u, w), m in totals.items() if m
+    ]
+    if rows:
+        conn.execute(insert(WorkWeekHours), rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_flushed_weeks(session: Session, flush_context) -> None:
+    keys = [
+        (obj.tenant_id, obj.user_id, obj.date)
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, WorkEntry)
+    ]
+    if keys:
+        refresh_week_hours_for(session.connection(), keys)
@@ -2,15 +2,20 @@ from __future__ import annotations
 
 from datetime import date
 
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 
 from .config import settings
 from .db.database import get_db
+from .db.models.department import Department, DepartmentClosure
+from .db.models.profile import EmployeeProfile
 from .db.models.user import User
+from .db.tenant import current_tenant_id
 
 bearer = HTTPBearer()
 
@@ -36,7 +41,14 @@ def get_current_user(
     except JWTError:
         raise _http_401()
 
-    user = db.execute(select(User).where(User.email == sub)).scalar_one_or_none()
+    # Орендаря сесії вже визначено з цього ж токена (TenantMiddleware); перевіряємо узгодженість
+    tenant_id = payload.get("tid") or settings.DEFAULT_TENANT
+    if tenant_id != current_tenant_id():
+        raise _http_401()
+
+    user = db.execute(
+        select(User).where(User.tenant_id == tenant_id).where(User.email == sub)
+    ).scalar_one_or_none()
     if not user:
         raise _http_401("User not found")
     return user
@@ -71,6 +83,59 @@ def assert_user_is_manager(db: Session, user_id: int) -> None:
         )
 
 
+def managed_department_ids(manager_id: int):
+    """Підзапит з id підрозділів, якими керує менеджер, разом з усіма їхніми підпідрозділами."""
+    return (
+        select(DepartmentClosure.descendant_id)
+        .join(Department, Department.id == DepartmentClosure.ancestor_id)
+        .where(Department.manager_user_id == manager_id)
+    )
+
+
+def visible_user_filter(column, user: User):
+    """
+    Умова на колонку з id користувача: працівник бачить лише себе,
+    менеджер - себе і працівників своїх підрозділів.
+    """
+    if user.role != "manager":
+        return column == user.id
+
+    department_users = (
+        select(User.id)
+        .join(EmployeeProfile, EmployeeProfile.email == User.email)
+        .where(EmployeeProfile.department_id.in_(managed_department_ids(user.id)))
+    )
+    return or_(column == user.id, column.in_(department_users))
+
+
+def if_match_version(if_match: Optional[str] = Header(None)) -> Optional[int]:
+    """Очікувана версія запису із заголовка If-Match ("3", W/"3" або 3); None - без перевірки."""
+    if if_match is None:
+        return None
+    value = if_match.strip().removeprefix("W/").strip('"')
+    if not value.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must be a record version")
+    return int(value)
+
+
+def check_version(obj, expected: Optional[int]) -> None:
+    """
+    412, якщо запис змінили після того, як клієнт його прочитав.
+    Версія 0 означає, що запису ще не має бути (створення без перезапису чужого).
+    """
+    if expected is None:
+        return
+    if (obj.version if obj is not None else 0) != expected:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Record was modified by someone else, reload it and retry",
+        )
+
+
+def version_etag(obj) -> str:
+    return f'"{obj.version}"'
+
+
 def month_bounds(month: str) -> tuple[date, date]:
     year = int(month[:4])
     mon = int(month[5:7])
@@ -0,0 +1,158 @@
+import gzip
+import json
+from datetime import date
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from .config import settings
+
+try:
+    import msgpack
+except ImportError:  # msgpack необов'язковий
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # brotli необов'язковий
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+COLUMNAR_MEDIA_TYPE = "application/vnd.hrm.columnar+json"
+
+# Поля, які в колонковому форматі кодуються словником (мало унікальних значень)
+DICTIONARY_FIELDS = ("type", "title", "status", "start_time", "end_time", "user_email", "user_full_name")
+# Поля з датами кодуються як зсув у днях від першої дати колонки
+DATE_FIELDS = ("date", "start_date", "end_date")
+
+
+def _parse_header(value: Optional[str]) -> list[tuple[str, float]]:
+    items = []
+    for part in (value or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            k, _, v = param.strip().partition("=")
+            if k == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        items.append((token, q))
+    return items
+
+
+def available_media_types() -> list[str]:
+    types = [JSON_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE]
+    if msgpack is not None:
+        types.append(MSGPACK_MEDIA_TYPE)
+    return types
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    supported = available_media_types()
+    best, best_q = JSON_MEDIA_TYPE, 0.0
+    for token, q in _parse_header(accept):
+        if token in supported and q > best_q:
+            best, best_q = token, q
+    return best
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    accepted = {token: q for token, q in _parse_header(accept_encoding) if q > 0}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _day_number(value: str) -> int:
+    # "YYYY-MM-DD" -> порядковий номер дня
+    return date.fromisoformat(value).toordinal()
+
+
+def to_columnar(rows: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Перетворює список однотипних записів у колонковий вигляд.
+
+    Назви полів передаються один раз, рядкові поля з малою кількістю значень
+    кодуються словником, а дати - зсувом у днях від першої дати колонки.
+    """
+    rows = list(rows)
+    fields = list(rows[0].keys()) if rows else []
+    columns: dict[str, Any] = {}
+    dictionaries: dict[str, list[Any]] = {}
+    date_bases: dict[str, str] = {}
+
+    for field in fields:
+        values = [row.get(field) for row in rows]
+
+        if field in DICTIONARY_FIELDS:
+            index: dict[Any, int] = {}
+            columns[field] = [index.setdefault(v, len(index)) for v in values]
+            dictionaries[field] = list(index)
+        elif field in DATE_FIELDS and all(isinstance(v, str) for v in values):
+            base = _day_number(values[0])
+            date_bases[field] = values[0]
+            columns[field] = [_day_number(v) - base for v in values]
+        else:
+            columns[field] = values
+
+    return {
+        "count": len(rows),
+        "fields": fields,
+        "columns": columns,
+        "dictionaries": dictionaries,
+        "date_bases": date_bases,
+    }
+
+
+def encode_body(data: Any, media_type: str, rows_key: Optional[str] = None) -> bytes:
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        if rows_key is None:
+            data = to_columnar(data)
+        else:
+            data = {**data, rows_key: to_columnar(data[rows_key])}
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(data, use_bin_type=True)
+
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def compress_body(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+    return body
+
+
+def negotiated_response(request: Request, content: Any, *, rows_key: Optional[str] = None) -> Response:
+    """
+    Формує відповідь у форматі, який клієнт вказав в Accept
+    (JSON, колонковий JSON або MessagePack), і стискає великі тіла
+    за Accept-Encoding (brotli або gzip).
+
+    rows_key: ключ зі списком записів для колонкового формату;
+    None означає, що самі дані є списком записів.
+    """
+    data = jsonable_encoder(content)
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    body = encode_body(data, media_type, rows_key)
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if len(body) >= settings.COMPRESSION_MIN_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding:
+            body = compress_body(body, encoding)
+            headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from typing import Callable, Iterator, Protocol
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .db.changes import flushed_changes
+from .db.database import engine
+from .db.tenant import current_tenant_id
+
+log = logging.getLogger(__name__)
+
+PENDING_EVENTS_KEY = "pending_events"
+
+# Частину подій могло бути втрачено (наприклад, під час перепідключення брокера)
+RESYNC = "resync"
+
+
+class Broker(Protocol):
+    """Транспорт подій між воркерами. Кожна опублікована подія доставляється всім підписникам."""
+
+    def publish(self, events: list[dict]) -> None: ...
+
+    def subscribe(self, callback: Callable[[dict], None]) -> None: ...
+
+
+class InProcessBroker:
+    """Доставка в межах одного процесу (один воркер uvicorn)."""
+
+    def __init__(self) -> None:
+        self._callbacks: list[Callable[[dict], None]] = []
+
+    def publish(self, events: list[dict]) -> None:
+        for ev in events:
+            for callback in self._callbacks:
+                callback(ev)
+
+    def subscribe(self, callback: Callable[[dict], None]) -> None:
+        self._callbacks.append(callback)
+
+
+class PostgresBroker:
+    """
+    Доставка між воркерами через LISTEN/NOTIFY тієї ж бази.
+    Кожен процес слухає канал в окремому потоці, тож подія,
+    опублікована будь-яким воркером, доходить до всіх.
+
+    Події одного коміту йдуть JSON-масивами в кількох NOTIFY на одному
+    з'єднанні й в одній транзакції. Розірване з'єднання слухача
+    відновлюється з наростаючою паузою, після чого підписники отримують
+    подію RESYNC - пропущене за цей час клієнти дочитують через /sync.
+    """
+
+    channel = "hrm_events"
+    # Межа payload у PostgreSQL - 8000 байт, лишаємо запас
+    max_payload_bytes = 7500
+    reconnect_delays = (1, 2, 5, 10, 30)
+
+    def __init__(self) -> None:
+        self._callbacks: list[Callable[[dict], None]] = []
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _payloads(self, events: list[dict]) -> Iterator[str]:
+        batch: list[str] = []
+        size = 2
+        for ev in events:
+            item = json.dumps(ev)
+            if batch and size + len(item) + 1 > self.max_payload_bytes:
+                yield f"[{','.join(batch)}]"
+                batch, size = [], 2
+            batch.append(item)
+            size += len(item) + 1
+        if batch:
+            yield f"[{','.join(batch)}]"
+
+    def publish(self, events: list[dict]) -> None:
+        payloads = [{"channel": self.channel, "payload": p} for p in self._payloads(events)]
+        if not payloads:
+            return
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), payloads)
+            conn.commit()
+
+    def subscribe(self, callback: Callable[[dict], None]) -> None:
+        self._callbacks.append(callback)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="event-broker", daemon=True)
+                self._thread.start()
+
+    def _deliver(self, ev: dict) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(ev)
+            except Exception:
+                log.exception("Event callback failed")
+
+    def _listen(self) -> None:
+        failures = 0
+        while True:
+            try:
+                self._listen_once(resync=failures > 0)
+            except Exception:
+                delay = self.reconnect_delays[min(failures, len(self.reconnect_delays) - 1)]
+                failures += 1
+                log.exception("Event listener connection lost, reconnecting in %s s", delay)
+                time.sleep(delay)
+
+    def _listen_once(self, resync: bool) -> None:
+        raw = engine.raw_connection()
+        try:
+            dbapi_conn = raw.driver_connection
+            dbapi_conn.autocommit = True
+            with dbapi_conn.cursor() as cur:
+                cur.execute(f"LISTEN {self.channel}")
+            if resync:
+                self._deliver({"type": RESYNC})
+            while True:
+                if select.select([dbapi_conn], [], [], 30) == ([], [], []):
+                    # Перевіряємо, що з'єднання живе, - інакше розрив помітимо лише з наступною подією
+                    with dbapi_conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    note = dbapi_conn.notifies.pop(0)
+                    for ev in json.loads(note.payload):
+                        self._deliver(ev)
+        finally:
+            raw.invalidate()
+
+
+class Subscription:
+    def __init__(self, tenant_id: str, user_id: int, visible_user_ids: set[int], loop: asyncio.AbstractEventLoop) -> None:
+        # id користувачів унікальні лише в межах бази, тож подію визначає пара (tenant_id, user_id)
+        self.tenant_id = tenant_id
+        self.user_id = user_id
+        self.visible_user_ids = visible_user_ids
+        self.loop = loop
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        # Черга переповнилась - клієнт має дочитати зміни через /sync
+        self.overflowed = False
+
+    def accepts(self, ev: dict) -> bool:
+        if ev.get("tenant_id") != self.tenant_id:
+            return False
+        return ev["user_id"] == self.user_id or ev["user_id"] in self.visible_user_ids
+
+    def offer(self, ev: dict) -> None:
+        if ev["type"] == RESYNC:
+            self.overflowed = True
+            return
+        try:
+            self.queue.put_nowait(ev)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventHub:
+    """Розсилає події з брокера відкритим потокам клієнтів, яким вони видимі."""
+
+    def __init__(self, broker: Broker) -> None:
+        self.broker = broker
+        self._subscriptions: set[Subscription] = set()
+        self._lock = threading.Lock()
+        broker.subscribe(self._dispatch)
+
+    def publish(self, events: list[dict]) -> None:
+        if not events:
+            return
+        try:
+            self.broker.publish(events)
+        except Exception:
+            # Зміна вже закомічена, клієнт наздожене її через /sync
+            log.exception("Failed to publish event")
+
+    def subscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.add(sub)
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(sub)
+
+    def _dispatch(self, ev: dict) -> None:
+        with self._lock:
+            if ev["type"] == RESYNC:
+                targets = list(self._subscriptions)
+            else:
+                targets = [sub for sub in self._subscriptions if sub.accepts(ev)]
+        for sub in targets:
+            sub.loop.call_soon_threadsafe(sub.offer, ev)
+
+
+def make_broker() -> Broker:
+    if settings.EVENT_BROKER == "postgres":
+        return PostgresBroker()
+    return InProcessBroker()
+
+
+hub = EventHub(make_broker())
+
+
+def event_from_change(change: dict) -> dict:
+    """Подія для зміни в базі поточного орендаря."""
+    return {
+        "type": change["entity"],
+        "tenant_id": current_tenant_id(),
+        "op": change["op"],
+        "user_id": change["user_id"],
+        "id": change["entity_id"],
+        "date": change["date"].isoformat() if change["date"] else None,
+    }
+
+
+def queue_events(session: Session, events: list[dict]) -> None:
+    """Відкладає події до коміту сесії (для масових SQL-операцій поза ORM)."""
+    session.info.setdefault(PENDING_EVENTS_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session: Session, flush_context) -> None:
+    queue_events(session, [event_from_change(ch) for ch in flushed_changes(session)])
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session: Session) -> None:
+    hub.publish(session.info.pop(PENDING_EVENTS_KEY, []))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session: Session) -> None:
+    session.info.pop(PENDING_EVENTS_KEY, None)
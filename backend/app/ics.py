@@ -0,0 +1,276 @@
+"""
+Підписка на розклад у форматі iCalendar (RFC 5545).
+
+Календарні застосунки опитують стрічку за постійним URL із підписаним
+токеном, тож кожне опитування має бути дешевим: стрічка зберігається
+в пам'яті по днях, після коміту змін розкладу (через ті ж події, що
+й /events/stream) перерендерюються лише змінені дні, а незмінена
+стрічка віддається як 304 за ETag / Last-Modified.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+
+from .config import settings
+from .db.changes import WORK_ENTRY
+from .events import RESYNC, hub
+
+PRODID = "-//HRM ESS//Schedule//UK"
+
+TYPE_SUMMARY = {
+    "shift": "Shift",
+    "off": "Day off",
+    "vacation": "Vacation",
+    "sick": "Sick leave",
+    "trip": "Business trip",
+    "other": "Other",
+}
+
+# Завантажує записи розкладу користувача за [first_day, end_exclusive)
+EntryLoader = Callable[[date, date], Iterable]
+
+
+def _secret() -> bytes:
+    return (settings.ICS_SECRET or settings.JWT_SECRET).encode()
+
+
+def _signature(tenant_id: str, user_id: int) -> str:
+    digest = hmac.new(_secret(), f"ics:{tenant_id}:{user_id}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")[:32]
+
+
+def feed_token(tenant_id: str, user_id: int) -> str:
+    return f"{tenant_id}.{user_id}.{_signature(tenant_id, user_id)}"
+
+
+def parse_feed_token(token: str) -> Optional[tuple[str, int]]:
+    """Повертає (орендар, користувач) для дійсного токена, інакше None."""
+    parts = token.rsplit(".", 2)
+    if len(parts) != 3 or not parts[1].isdigit():
+        return None
+    tenant_id, user_id = parts[0], int(parts[1])
+    if not hmac.compare_digest(parts[2], _signature(tenant_id, user_id)):
+        return None
+    return tenant_id, user_id
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Розбиває рядок довший за 75 октетів на рядки-продовження."""
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(raw):
+        end = min(start + limit, len(raw))
+        # Не розрізаємо багатобайтовий символ UTF-8
+        while end < len(raw) and (raw[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(raw[start:end].decode())
+        start, limit = end, 74
+    return "\r\n ".join(parts)
+
+
+def render_entry(user_id: int, entry, stamp: datetime) -> str:
+    """VEVENT для одного дня розкладу: зміна з часом або подія на весь день."""
+    day = entry.date
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{user_id}-{day:%Y%m%d}@hrm-ess",
+        f"DTSTAMP:{stamp:%Y%m%dT%H%M%SZ}",
+    ]
+    if entry.start_time is not None and entry.end_time is not None:
+        # Час без часового поясу ("плаваючий") - як його й вводять у розклад
+        lines += [
+            f"DTSTART:{day:%Y%m%d}T{entry.start_time:%H%M%S}",
+            f"DTEND:{day:%Y%m%d}T{entry.end_time:%H%M%S}",
+        ]
+    else:
+        lines += [
+            f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}",
+        ]
+    summary = entry.title or TYPE_SUMMARY.get(entry.type, entry.type)
+    lines.append(f"SUMMARY:{_escape(summary)}")
+    lines.append(f"CATEGORIES:{_escape(entry.type)}")
+    lines.append("TRANSP:OPAQUE" if entry.type == "shift" else "TRANSP:TRANSPARENT")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+def feed_window(today: Optional[date] = None) -> tuple[date, date]:
+    today = today or date.today()
+    return today - timedelta(days=settings.ICS_PAST_DAYS), today + timedelta(days=settings.ICS_FUTURE_DAYS + 1)
+
+
+@dataclass
+class Feed:
+    body: bytes
+    etag: str
+    last_modified: datetime
+
+
+@dataclass
+class _CachedFeed:
+    first_day: date
+    end_exclusive: date
+    # None - стрічку треба зібрати повністю
+    built_at: Optional[float]
+    # Відрендерені VEVENT по днях; днів без запису в словнику немає
+    days: dict[date, str] = field(default_factory=dict)
+    # Дні, змінені після рендеру
+    stale: set[date] = field(default_factory=set)
+    feed: Optional[Feed] = None
+    changed: bool = True
+    refresh_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class FeedCache:
+    """
+    Стрічки користувачів у пам'яті процесу. Інвалідація приходить
+    подіями брокера, тож з EVENT_BROKER=postgres вона доходить до всіх
+    воркерів. ICS_CACHE_TTL_SECONDS - запобіжник на випадок втрачених подій
+    і змін в обхід ORM без явних подій.
+    """
+
+    def __init__(self, max_users: int) -> None:
+        self.max_users = max_users
+        # user_id -> {tenant_id -> стрічка}; id користувачів різних баз можуть збігатися
+        self._feeds: OrderedDict[int, dict[str, _CachedFeed]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, tenant_id: str, user_id: int, day: Optional[date] = None) -> None:
+        with self._lock:
+            cached = self._feeds.get(user_id, {}).get(tenant_id)
+            if cached is not None:
+                if day is None:
+                    cached.built_at = None
+                elif cached.first_day <= day < cached.end_exclusive:
+                    cached.stale.add(day)
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            for feeds in self._feeds.values():
+                for cached in feeds.values():
+                    cached.built_at = None
+
+    def has(self, tenant_id: str, user_id: int) -> bool:
+        with self._lock:
+            return tenant_id in self._feeds.get(user_id, {})
+
+    def on_event(self, ev: dict) -> None:
+        if ev["type"] == RESYNC:
+            self.invalidate_all()
+            return
+        if ev["type"] != WORK_ENTRY:
+            return
+        self.invalidate(ev["tenant_id"], ev["user_id"], date.fromisoformat(ev["date"]) if ev["date"] else None)
+
+    def get(self, tenant_id: str, user_id: int, load: EntryLoader) -> Feed:
+        first_day, end_exclusive = feed_window()
+        with self._lock:
+            cached = self._feeds.get(user_id, {}).get(tenant_id)
+            if cached is None:
+                cached = _CachedFeed(first_day, end_exclusive, None)
+                self._feeds.setdefault(user_id, {})[tenant_id] = cached
+                while len(self._feeds) > self.max_users:
+                    self._feeds.popitem(last=False)
+            self._feeds.move_to_end(user_id)
+
+        # Одночасні опитування тієї ж стрічки чекають на одне оновлення
+        with cached.refresh_lock:
+            with self._lock:
+                dirty = self._take_dirty(cached, first_day, end_exclusive)
+
+            # Запит до БД - поза спільним блокуванням; подія, що прийде під час читання, знову позначить день
+            rendered: dict[date, str] = {}
+            if dirty:
+                stamp = datetime.now(timezone.utc)
+                try:
+                    entries = list(load(min(dirty), max(dirty) + timedelta(days=1)))
+                except BaseException:
+                    with self._lock:
+                        cached.stale |= dirty
+                    raise
+                for entry in entries:
+                    if entry.date in dirty:
+                        rendered[entry.date] = render_entry(user_id, entry, stamp)
+
+            with self._lock:
+                for day in dirty:
+                    old, block = cached.days.get(day), rendered.get(day)
+                    # DTSTAMP відрізняється завжди, тож порівнюємо без нього
+                    if _without_stamp(old) == _without_stamp(block):
+                        continue
+                    cached.changed = True
+                    if block is None:
+                        del cached.days[day]
+                    else:
+                        cached.days[day] = block
+                if cached.changed or cached.feed is None:
+                    cached.feed = self._assemble(cached)
+                    cached.changed = False
+                return cached.feed
+
+    @staticmethod
+    def _take_dirty(cached: _CachedFeed, first_day: date, end_exclusive: date) -> set[date]:
+        """Дні, які треба перечитати; викликається під блокуванням кешу."""
+        # Вікно зсунулось: старі дні відкидаємо, нові дочитуємо
+        for day in [d for d in cached.days if not first_day <= d < end_exclusive]:
+            del cached.days[day]
+            cached.changed = True
+        if cached.built_at is None or time.monotonic() - cached.built_at > settings.ICS_CACHE_TTL_SECONDS:
+            cached.built_at = time.monotonic()
+            dirty = set(_days(first_day, end_exclusive))
+        else:
+            dirty = {d for d in cached.stale if first_day <= d < end_exclusive}
+            dirty.update(
+                d for d in _days(first_day, end_exclusive)
+                if not cached.first_day <= d < cached.end_exclusive
+            )
+        cached.first_day, cached.end_exclusive = first_day, end_exclusive
+        cached.stale = set()
+        return dirty
+
+    @staticmethod
+    def _assemble(cached: _CachedFeed) -> Feed:
+        head = (
+            "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"
+            f"PRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n"
+            f"X-PUBLISHED-TTL:PT{max(1, settings.ICS_MAX_AGE_SECONDS // 60)}M\r\n"
+        )
+        body = (head + "".join(cached.days[d] for d in sorted(cached.days)) + "END:VCALENDAR\r\n").encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        # Last-Modified з точністю до секунди, як у HTTP-даті
+        return Feed(body, etag, datetime.now(timezone.utc).replace(microsecond=0))
+
+
+def _days(first_day: date, end_exclusive: date) -> list[date]:
+    return [first_day + timedelta(days=i) for i in range((end_exclusive - first_day).days)]
+
+
+def _without_stamp(block: Optional[str]) -> Optional[str]:
+    if block is None:
+        return None
+    return "".join(line for line in block.split("\r\n") if not line.startswith("DTSTAMP:"))
+
+
+feed_cache = FeedCache(settings.ICS_CACHE_MAX_USERS)
+hub.broker.subscribe(feed_cache.on_event)
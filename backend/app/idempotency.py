@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+IN_FLIGHT_POLL_SECONDS = 0.02
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+
+
+class IdempotencyBackend(Protocol):
+    def get(self, key: str) -> Optional[StoredResponse]: ...
+
+    def put(self, key: str, response: StoredResponse) -> None: ...
+
+
+class InMemoryIdempotencyBackend:
+    """Обмежене за кількістю (LRU) сховище відповідей з TTL в межах процесу."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._items: OrderedDict[str, StoredResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item.expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item
+
+    def put(self, key: str, response: StoredResponse) -> None:
+        with self._lock:
+            self._items[key] = response
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+class IdempotencyMiddleware:
+    """
+    Повтор запиту на запис з тим самим заголовком Idempotency-Key
+    отримує збережену відповідь першого виконання і не доходить до обробника.
+    Ключ діє в межах токена авторизації. Поки перше виконання триває,
+    повтори чекають на його результат.
+
+    Для відбитка тіло запиту читається в пам'ять повністю, тож воно
+    обмежене IDEMPOTENCY_MAX_BODY_BYTES: більші запити (потокове
+    завантаження CSV) з цим заголовком отримують 413 і надсилаються без нього.
+    """
+
+    def __init__(self, app: ASGIApp, backend: IdempotencyBackend | None = None) -> None:
+        self.app = app
+        self.backend = backend or InMemoryIdempotencyBackend(settings.IDEMPOTENCY_MAX_ENTRIES)
+        self._in_flight: set[str] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        declared = headers.get(b"content-length", b"")
+        limit = settings.IDEMPOTENCY_MAX_BODY_BYTES
+        body = None if declared.isdigit() and int(declared) > limit else await _read_body(receive, limit)
+        if body is None:
+            await _send_error(send, 413, b'{"detail":"Request body is too large for Idempotency-Key"}')
+            return
+
+        key = hashlib.sha256(headers.get(b"authorization", b"") + b"\0" + idempotency_key).hexdigest()
+        fingerprint = hashlib.sha256(
+            b"\0".join([scope["method"].encode(), scope["path"].encode(), scope["query_string"], body])
+        ).hexdigest()
+
+        while key in self._in_flight:
+            await asyncio.sleep(IN_FLIGHT_POLL_SECONDS)
+
+        stored = self.backend.get(key)
+        if stored is not None:
+            await self._replay(stored, fingerprint, send)
+            return
+
+        self._in_flight.add(key)
+        try:
+            await self._execute(scope, body, receive, send, key, fingerprint)
+        finally:
+            self._in_flight.discard(key)
+
+    async def _execute(self, scope: Scope, body: bytes, receive: Receive, send: Send, key: str, fingerprint: str) -> None:
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = 500
+        response_headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+
+        response_body = b"".join(chunks)
+        # 5xx і 429 не зберігаємо - повтор має виконатись заново
+        if status < 500 and status != 429 and len(response_body) <= settings.IDEMPOTENCY_MAX_BODY_BYTES:
+            self.backend.put(key, StoredResponse(
+                fingerprint=fingerprint,
+                status=status,
+                headers=response_headers,
+                body=response_body,
+                expires_at=time.monotonic() + settings.IDEMPOTENCY_TTL_SECONDS,
+            ))
+
+    async def _replay(self, stored: StoredResponse, fingerprint: str, send: Send) -> None:
+        if stored.fingerprint != fingerprint:
+            await _send_error(send, 422, b'{"detail":"Idempotency-Key was already used for a different request"}')
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": stored.headers + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
+
+
+async def _send_error(send: Send, status: int, body: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _read_body(receive: Receive, limit: int) -> Optional[bytes]:
+    """Тіло запиту; None, якщо воно довше за limit (решту не дочитуємо)."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
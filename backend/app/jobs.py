@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .db.database import SessionLocal
+from .db.models.job import Job
+from .db.tenant import current_tenant
+
+log = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    """
+    Передається обробнику задачі: звіт про прогрес і перевірка скасування.
+    payload - дані, передані в submit поза БД (None, якщо їх немає).
+    """
+
+    def __init__(self, job_id: str, user_id: int, payload=None) -> None:
+        self.job_id = job_id
+        self.user_id = user_id
+        self.payload = payload
+
+    def progress(self, done: int, total: int) -> None:
+        """Зберігає прогрес окремою короткою транзакцією. Кидає JobCancelled, якщо задачу скасовано."""
+        with SessionLocal() as db:
+            job = db.get(Job, self.job_id)
+            job.progress = done / total if total else 1.0
+            cancelled = job.cancel_requested
+            db.commit()
+        if cancelled:
+            raise JobCancelled()
+
+
+JobHandler = Callable[[JobContext, Session, dict], dict]
+HANDLERS: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    def register(fn: JobHandler) -> JobHandler:
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _lease_until() -> datetime:
+    return _now() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+
+def _database_tenants() -> list[Optional[str]]:
+    # Основна база (задачі всіх її орендарів) і окремі бази великих орендарів
+    return [None, *settings.TENANT_DATABASE_URLS]
+
+
+class JobRunner:
+    """
+    Виконує довгі операції в окремому пулі потоків, щоб HTTP-запит
+    повертався одразу. Кількість воркерів (JOB_WORKERS) обмежує навантаження
+    від масових операцій незалежно від інтерактивного трафіку.
+
+    Задачі спільні для всіх процесів: задачу атомарно забирає той, чий
+    UPDATE ... WHERE status = 'queued' спрацював першим, і поки вона
+    виконується, процес продовжує її оренду. Перерваними вважаються лише
+    задачі з простроченою орендою - ті, що виконують живі воркери, не чіпаємо.
+
+    Дані, яких не можна зберігати в jobs.params (паролі з імпорту), передаються
+    як payload лише в пам'яті процесу. Така задача з самого початку має оренду
+    і не береться іншими процесами; якщо процес зупиниться, оренда спливе і
+    задача завершиться помилкою, а дані зникнуть разом із процесом.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        # job_id -> tenant_id задач, які зараз виконує (або тримає в черзі з payload) цей процес
+        self._running: dict[str, str] = {}
+        # job_id -> payload задач, поставлених у чергу цим процесом
+        self._payloads: dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def submit(self, db: Session, kind: str, params: dict, user_id: int, payload=None) -> Job:
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job = Job(id=str(uuid.uuid4()), kind=kind, params=params, created_by=user_id, status="queued")
+        if payload is not None:
+            # Оренда в черзі: задачу не забере інший процес, а heartbeat цього її продовжує
+            job.lease_until = _lease_until()
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        if payload is not None:
+            with self._lock:
+                self._payloads[job.id] = payload
+                self._running[job.id] = job.tenant_id
+        self._executor.submit(self._run, job.id, job.tenant_id)
+        return job
+
+    def recover(self) -> None:
+        """
+        Під час старту процесу: задачі з простроченою орендою позначаються як
+        невдалі, черга запускається знову (зайву спробу забрати задачу відсіє
+        атомарний claim), далі оренди перевіряються у фоновому потоці.
+        """
+        self._sweep()
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _sweep(self, resubmit_queued: bool = True) -> None:
+        for tenant_id in _database_tenants():
+            token = current_tenant.set(tenant_id)
+            try:
+                with SessionLocal() as db:
+                    db.execute(
+                        update(Job)
+                        .where(or_(
+                            # Без оренди - задачі, запущені до її появи
+                            and_(Job.status == "running", or_(Job.lease_until.is_(None), Job.lease_until < _now())),
+                            # Задачі з payload, чий процес зупинився до їх запуску
+                            and_(Job.status == "queued", Job.lease_until < _now()),
+                        ))
+                        .values(status="failed", error="Interrupted: worker lease expired", finished_at=_now(), lease_until=None)
+                    )
+                    queued = []
+                    if resubmit_queued:
+                        queued = db.execute(
+                            select(Job.id, Job.tenant_id)
+                            .where(Job.status == "queued")
+                            .where(Job.lease_until.is_(None))
+                            .order_by(Job.created_at)
+                        ).all()
+                    db.commit()
+            except Exception:
+                log.exception("Failed to recover jobs")
+                continue
+            finally:
+                current_tenant.reset(token)
+            for job_id, job_tenant_id in queued:
+                self._executor.submit(self._run, job_id, job_tenant_id)
+
+    def _heartbeat_loop(self) -> None:
+        while True:
+            time.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            try:
+                self._renew_leases()
+            except Exception:
+                log.exception("Failed to renew job leases")
+            self._sweep(resubmit_queued=False)
+
+    def _renew_leases(self) -> None:
+        with self._lock:
+            by_tenant: dict[str, list[str]] = {}
+            for job_id, tenant_id in self._running.items():
+                by_tenant.setdefault(tenant_id, []).append(job_id)
+        for tenant_id, job_ids in by_tenant.items():
+            token = current_tenant.set(tenant_id)
+            try:
+                with SessionLocal() as db:
+                    db.execute(
+                        update(Job)
+                        .where(Job.id.in_(job_ids))
+                        .where(Job.status.in_(("queued", "running")))
+                        .values(lease_until=_lease_until())
+                    )
+                    db.commit()
+            finally:
+                current_tenant.reset(token)
+
+    def _run(self, job_id: str, tenant_id: str) -> None:
+        token = current_tenant.set(tenant_id)
+        try:
+            self._run_in_tenant(job_id, tenant_id)
+        finally:
+            current_tenant.reset(token)
+
+    def _claim(self, db: Session, job_id: str, local: bool):
+        """
+        Атомарно переводить задачу з черги в роботу; None - її вже забрав інший
+        воркер або скасовано. local - задача з payload цього процесу.
+        """
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .where(Job.status == "queued")
+            .where(Job.cancel_requested.is_(True))
+            .values(status="cancelled", finished_at=_now())
+        )
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .where(Job.status == "queued")
+            .where(Job.lease_until.is_not(None) if local else Job.lease_until.is_(None))
+            .values(status="running", started_at=_now(), lease_until=_lease_until())
+            .returning(Job.kind, Job.params, Job.created_by)
+        ).first()
+        db.commit()
+        return claimed
+
+    def _run_in_tenant(self, job_id: str, tenant_id: str) -> None:
+        with self._lock:
+            payload = self._payloads.pop(job_id, None)
+        try:
+            with SessionLocal() as db:
+                claimed = self._claim(db, job_id, local=payload is not None)
+            if claimed is None:
+                return
+            kind, params, user_id = claimed.kind, dict(claimed.params), claimed.created_by
+
+            with self._lock:
+                self._running[job_id] = tenant_id
+            ctx = JobContext(job_id, user_id, payload)
+            status, result, error = "succeeded", None, None
+            try:
+                with SessionLocal() as db:
+                    result = HANDLERS[kind](ctx, db, params)
+            except JobCancelled:
+                status = "cancelled"
+            except Exception as e:
+                log.exception("Job %s (%s) failed", job_id, kind)
+                status, error = "failed", str(e)
+
+            with SessionLocal() as db:
+                job = db.get(Job, job_id)
+                job.status = status
+                job.result = result
+                job.error = error
+                job.finished_at = _now()
+                job.lease_until = None
+                if status == "succeeded":
+                    job.progress = 1.0
+                db.commit()
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+
+runner = JobRunner(settings.JOB_WORKERS)
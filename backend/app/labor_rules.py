@@ -0,0 +1,158 @@
+"""
+Перевірка розкладу на відповідність трудовим нормам перед записом:
+тижнева норма годин, мінімальний відпочинок між змінами і найбільша
+кількість робочих днів поспіль.
+
+Історію не перечитуємо: години за тиждень беруться з агрегату
+work_week_hours, а для відпочинку і серій читаються лише дні в межах
+LABOR_MAX_CONSECUTIVE_DAYS навколо змінених. Вартість перевірки - O(змінених днів).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, time, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .db.models.work_entry import WorkEntry
+from .db.models.work_week import WorkWeekHours
+from .db.week_hours import shift_minutes, week_start
+
+_DAY = timedelta(days=1)
+_MINUTES_PER_DAY = 24 * 60
+
+
+@dataclass(frozen=True)
+class DayChange:
+    """Новий стан дня; без часу - неробочий день або видалений запис."""
+    user_id: int
+    date: date
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+
+    @property
+    def minutes(self) -> int:
+        return shift_minutes(self.start_time, self.end_time)
+
+
+def day_change(user_id: int, day: date, payload=None) -> DayChange:
+    """payload - схема з полями start_time, end_time; None - день видаляється."""
+    if payload is None:
+        return DayChange(user_id, day)
+    return DayChange(user_id, day, payload.start_time, payload.end_time)
+
+
+def _date_ranges(days: set[date]) -> list[tuple[date, date]]:
+    """Згортає набір дат у суцільні проміжки [first, last]."""
+    ranges: list[list[date]] = []
+    for d in sorted(days):
+        if ranges and ranges[-1][1] + _DAY == d:
+            ranges[-1][1] = d
+        else:
+            ranges.append([d, d])
+    return [(first, last) for first, last in ranges]
+
+
+def _minutes_of_day(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def _user_violations(db: Session, user_id: int, changed: dict[date, DayChange]) -> list[dict]:
+    max_week = round(settings.LABOR_MAX_WEEKLY_HOURS * 60)
+    min_rest = round(settings.LABOR_MIN_REST_HOURS * 60)
+    max_days = settings.LABOR_MAX_CONSECUTIVE_DAYS
+    reach = max(max_days, 1)
+
+    window = {d + timedelta(days=k) for d in changed for k in range(-reach, reach + 1)}
+    existing = {
+        day: (start_time, end_time)
+        for day, start_time, end_time in db.execute(
+            select(WorkEntry.date, WorkEntry.start_time, WorkEntry.end_time)
+            .where(WorkEntry.user_id == user_id)
+            .where(or_(*(and_(WorkEntry.date >= first, WorkEntry.date <= last) for first, last in _date_ranges(window))))
+        )
+    }
+
+    def times(day: date) -> tuple[Optional[time], Optional[time]]:
+        if day in changed:
+            return changed[day].start_time, changed[day].end_time
+        return existing.get(day, (None, None))
+
+    def working(day: date) -> bool:
+        start_time, end_time = times(day)
+        return start_time is not None and end_time is not None
+
+    violations = []
+
+    def violation(day: date, rule: str, detail: str) -> None:
+        violations.append({"user_id": user_id, "date": day.isoformat(), "rule": rule, "detail": detail})
+
+    if max_week:
+        weeks = {week_start(d) for d in changed}
+        stored = dict(db.execute(
+            select(WorkWeekHours.week_start, WorkWeekHours.minutes)
+            .where(WorkWeekHours.user_id == user_id)
+            .where(WorkWeekHours.week_start.in_(weeks))
+        ).all())
+        for week in sorted(weeks):
+            days = [d for d in changed if week_start(d) == week]
+            total = stored.get(week, 0) + sum(changed[d].minutes - shift_minutes(*existing.get(d, (None, None))) for d in days)
+            if total > max_week:
+                for d in sorted(days):
+                    if working(d):
+                        violation(d, "weekly_hours", f"{total / 60:g} h in the week of {week}, limit {max_week / 60:g} h")
+
+    for d in sorted(changed):
+        if not working(d):
+            continue
+
+        if min_rest:
+            # Нічних змін немає (start_time < end_time), тож відпочинок менший за добу можливий лише між сусідніми днями
+            for before, after in ((d - _DAY, d), (d, d + _DAY)):
+                if after != d and after in changed:
+                    continue  # цю пару перевірить наступний змінений день
+                if not (working(before) and working(after)):
+                    continue
+                rest = _MINUTES_PER_DAY - _minutes_of_day(times(before)[1]) + _minutes_of_day(times(after)[0])
+                if rest < min_rest:
+                    violation(d, "min_rest", f"{rest / 60:g} h of rest between {before} and {after}, minimum {min_rest / 60:g} h")
+
+        if max_days:
+            # Серію рахуємо лише в межах вікна: для порушення досить побачити max_days + 1 днів
+            streak = 1
+            for step in (-_DAY, _DAY):
+                cur = d + step
+                while working(cur) and abs((cur - d).days) <= reach:
+                    streak += 1
+                    cur += step
+            if streak > max_days:
+                violation(d, "max_consecutive_days", f"more than {max_days} working days in a row")
+
+    return violations
+
+
+def find_violations(db: Session, changes: list[DayChange]) -> list[dict]:
+    """Порушення норм по днях; для одного дня діє остання зміна."""
+    by_user: dict[int, dict[date, DayChange]] = {}
+    for change in changes:
+        by_user.setdefault(change.user_id, {})[change.date] = change
+    violations = []
+    for user_id, changed in by_user.items():
+        violations.extend(_user_violations(db, user_id, changed))
+    return violations
+
+
+def check_labor_rules(db: Session, changes: list[DayChange]) -> None:
+    """422 з переліком порушень по датах, якщо зміни розкладу порушують норми."""
+    if not settings.LABOR_RULES_ENABLED or not changes:
+        return
+    violations = find_violations(db, changes)
+    if violations:
+        raise HTTPException(
+            status_code=422,
+            detail={"message": "Schedule violates labor rules", "violations": violations},
+        )
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .db.models.leave import Holiday, LeaveLedgerEntry
+from .db.models.profile import EmployeeProfile
+from .db.models.service_request import ServiceRequest
+from .db.models.user import User
+
+# Робочі дні - пн-пт, крім святкових
+WEEKMASK = "1111100"
+
+
+def holiday_calendar(db: Session, first_day: date, end_exclusive: date) -> np.busdaycalendar:
+    holidays = db.execute(
+        select(Holiday.date).where(Holiday.date >= first_day).where(Holiday.date < end_exclusive)
+    ).scalars().all()
+    return np.busdaycalendar(weekmask=WEEKMASK, holidays=np.array(holidays, dtype="datetime64[D]"))
+
+
+def working_days(starts, ends, calendar: np.busdaycalendar) -> np.ndarray:
+    """Кількість робочих днів у кожному інтервалі [start, end] (обидві межі включно)."""
+    starts = np.asarray(starts, dtype="datetime64[D]")
+    ends = np.asarray(ends, dtype="datetime64[D]") + 1
+    return np.busday_count(starts, np.maximum(starts, ends), busdaycal=calendar)
+
+
+def year_bounds(year: int) -> tuple[np.datetime64, np.datetime64]:
+    return np.datetime64(date(year, 1, 1), "D"), np.datetime64(date(year + 1, 1, 1), "D")
+
+
+def annual_entitlement(work_start_dates, year: int, calendar: np.busdaycalendar) -> np.ndarray:
+    """
+    Річна норма днів відпустки для кожного працівника:
+    LEAVE_BASE_DAYS плюс день за кожні повні LEAVE_SENIORITY_STEP_YEARS стажу
+    (не більше LEAVE_SENIORITY_MAX_DAYS). У рік прийому - пропорційно
+    робочим дням від дати початку роботи. Без work_start_date - базова норма.
+    """
+    year_start, year_end = year_bounds(year)
+    starts = np.array(work_start_dates, dtype="datetime64[D]")
+    known = ~np.isnat(starts)
+    starts = np.where(known, starts, year_start)
+
+    service_years = np.floor((year_start - starts).astype(np.int64) / 365.2425).clip(min=0)
+    extra = (
+        np.minimum(service_years // settings.LEAVE_SENIORITY_STEP_YEARS, settings.LEAVE_SENIORITY_MAX_DAYS)
+        if settings.LEAVE_SENIORITY_STEP_YEARS > 0 else np.zeros(len(starts))
+    )
+
+    accrual_from = np.clip(starts, year_start, year_end)
+    share = np.busday_count(accrual_from, year_end, busdaycal=calendar) / max(
+        np.busday_count(year_start, year_end, busdaycal=calendar), 1
+    )
+    return np.round((settings.LEAVE_BASE_DAYS + extra) * share, 2)
+
+
+def balance_report(db: Session, year: int, users: Select) -> list[dict]:
+    """
+    Баланс відпусток за рік для користувачів з підзапиту users (select з id).
+    Три запити незалежно від кількості працівників: профілі, агрегат журналу,
+    заявки на розгляді; робочі дні рахуються векторно для всіх разом.
+    """
+    first_day, end_exclusive = date(year, 1, 1), date(year + 1, 1, 1)
+    calendar = holiday_calendar(db, first_day, end_exclusive)
+
+    people = db.execute(
+        select(User.id, EmployeeProfile.full_name, EmployeeProfile.department_id, EmployeeProfile.work_start_date)
+        .outerjoin(EmployeeProfile, EmployeeProfile.email == User.email)
+        .where(User.id.in_(users))
+        .order_by(User.id)
+    ).all()
+    if not people:
+        return []
+
+    user_ids = np.array([p[0] for p in people], dtype=np.int64)
+    entitlement = annual_entitlement([p[3] for p in people], year, calendar)
+
+    used = np.zeros(len(people))
+    adjustments = np.zeros(len(people))
+    for user_id, kind, days in db.execute(
+        select(LeaveLedgerEntry.user_id, LeaveLedgerEntry.kind, func.sum(LeaveLedgerEntry.days))
+        .where(LeaveLedgerEntry.year == year)
+        .where(LeaveLedgerEntry.user_id.in_(users))
+        .group_by(LeaveLedgerEntry.user_id, LeaveLedgerEntry.kind)
+    ):
+        i = np.searchsorted(user_ids, user_id)
+        if kind == "vacation":
+            used[i] -= float(days)
+        else:
+            adjustments[i] += float(days)
+
+    pending = np.zeros(len(people))
+    requests = db.execute(
+        select(ServiceRequest.user_id, ServiceRequest.start_date, ServiceRequest.end_date)
+        .where(ServiceRequest.type == "vacation")
+        .where(ServiceRequest.status == "pending")
+        .where(ServiceRequest.start_date < end_exclusive)
+        .where(ServiceRequest.end_date >= first_day)
+        .where(ServiceRequest.user_id.in_(users))
+    ).all()
+    if requests:
+        year_start, year_end = year_bounds(year)
+        starts = np.maximum(np.array([r[1] for r in requests], dtype="datetime64[D]"), year_start)
+        ends = np.minimum(np.array([r[2] for r in requests], dtype="datetime64[D]"), year_end - 1)
+        np.add.at(pending, np.searchsorted(user_ids, [r[0] for r in requests]), working_days(starts, ends, calendar))
+
+    balance = entitlement + adjustments - used
+    return [
+        {
+            "user_id": int(user_ids[i]),
+            "full_name": p[1],
+            "department_id": p[2],
+            "year": year,
+            "entitlement": float(entitlement[i]),
+            "adjustments": float(adjustments[i]),
+            "used": float(used[i]),
+            "pending": float(pending[i]),
+            "balance": round(float(balance[i]), 2),
+            "available": round(float(balance[i] - pending[i]), 2),
+        }
+        for i, p in enumerate(people)
+    ]
+
+
+def user_balance(db: Session, user_id: int, year: int) -> dict:
+    return balance_report(db, year, select(User.id).where(User.id == user_id))[0]
+
+
+def debit_vacation(db: Session, req: ServiceRequest, author: User) -> None:
+    """
+    Записує використані робочі дні схваленої відпустки в журнал (окремо
+    за кожен рік, якого вона торкається). Без коміту. Якщо днів не вистачає -
+    HTTP 400 і нічого не записується. Перевірка і списання серіалізуються
+    блокуванням рядка користувача.
+    """
+    if req.type != "vacation":
+        return
+
+    years = list(range(req.start_date.year, req.end_date.year + 1))
+    starts = [max(req.start_date, date(y, 1, 1)) for y in years]
+    ends = [min(req.end_date, date(y, 12, 31)) for y in years]
+    days = working_days(starts, ends, holiday_calendar(db, starts[0], date(years[-1] + 1, 1, 1)))
+
+    # Блокуємо рядок користувача до кінця транзакції: паралельні схвалення його відпусток
+    # перевіряють залишок по черзі й бачать списання одне одного
+    db.execute(select(User.id).where(User.id == req.user_id).with_for_update())
+
+    for year, n in zip(years, days):
+        balance = user_balance(db, req.user_id, year)["balance"]
+        if n > balance:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Недостатньо днів відпустки за {year}: потрібно {int(n)}, залишок {balance:g}",
+            )
+
+    db.add_all([
+        LeaveLedgerEntry(
+            user_id=req.user_id,
+            year=year,
+            kind="vacation",
+            days=-float(n),
+            service_request_id=req.id,
+            created_by=author.id,
+        )
+        for year, n in zip(years, days)
+        if n
+    ])
@@ -1,12 +1,28 @@
-import os
 from datetime import datetime
-from typing import Optional
+from sqlalchemy.orm import Session
 from .db.models.user import User
+from .db.outbox import enqueue
 
 LOG_FILE = "schedule_changes.log"
 PROFILE_LOG_FILE = "profile_changes.log"
 
+SCHEDULE_TOPIC = "schedule_change"
+PROFILE_TOPIC = "profile_change"
+
+def _person(user: User) -> dict:
+    return {"id": user.id, "email": user.email}
+
+def _format_schedule_change(at: str, author: dict, target: dict, date: str, action: str, details: str) -> str:
+    return (
+        f"[{at}] Автор: {author['email']} (ID: {author['id']}) | "
+        f"Співробітник: {target['email']} (ID: {target['id']}) | "
+        f"Дата: {date} | "
+        f"Дія: {action} | "
+        f"Деталі: {details}\n"
+    )
+
 def log_schedule_change(
+    db: Session,
     author: User,
     target_user: User,
     date: str,
@@ -14,7 +30,7 @@ def log_schedule_change(
     details: str
 ):
     """
-    Записує зміну в розкладі у файл логів.
+    Записує зміну в розкладі в журнал (через outbox, див. log_schedule_changes).
     
     author: користувач, який вніс зміни
     target_user: користувач, розклад якого змінено
@@ -22,40 +38,82 @@ def log_schedule_change(
     action: тип дії (створено, оновлено, видалено)
     details: деталі зміни (тип зміни, час і т.д.)
     """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = (
-        f"[{timestamp}] Автор: {author.email} (ID: {author.id}) | "
-        f"Співробітник: {target_user.email} (ID: {target_user.id}) | "
-        f"Дата: {date} | "
+    log_schedule_changes(db, author, [(target_user, date, action, details)])
+
+def log_schedule_changes(
+    db: Session,
+    author: User,
+    changes: list[tuple[User, str, str, str]]
+):
+    """
+    Ставить кілька змін у розкладі в outbox одним повідомленням.
+    Викликається до коміту: повідомлення комітиться разом зі зміною,
+    а у файл логів (та інші приймачі) його запише app.outbox.
+
+    changes: список (target_user, date, action, details)
+    """
+    if not changes:
+        return
+
+    enqueue(db, SCHEDULE_TOPIC, {
+        "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "author": _person(author),
+        "changes": [
+            {"target": _person(target), "date": date, "action": action, "details": details}
+            for target, date, action, details in changes
+        ],
+    })
+
+def _format_profile_change(at: str, author: dict, target: dict, action: str, details: str) -> str:
+    return (
+        f"[{at}] Автор: {author['email']} (ID: {author['id']}) | "
+        f"Співробітник: {target['email']} (ID: {target['id']}) | "
         f"Дія: {action} | "
         f"Деталі: {details}\n"
     )
-    
-    # Визначаємо шлях до файлу логів відносно кореня бекенду
-    # Оскільки ми в backend/app/logger.py, лог буде в корені бекенду
-    log_path = os.path.join(os.getcwd(), LOG_FILE)
-    
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(log_entry)
 
 def log_profile_change(
+    db: Session,
     author: User,
     target_user: User,
     action: str,
     details: str
 ):
     """
-    Записує зміну в профілі у файл логів.
+    Записує зміну в профілі в журнал (через outbox).
     """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = (
-        f"[{timestamp}] Автор: {author.email} (ID: {author.id}) | "
-        f"Співробітник: {target_user.email} (ID: {target_user.id}) | "
-        f"Дія: {action} | "
-        f"Деталі: {details}\n"
-    )
-    
-    log_path = os.path.join(os.getcwd(), PROFILE_LOG_FILE)
-    
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(log_entry)
+    log_profile_changes(db, author, [(target_user, action, details)])
+
+def log_profile_changes(
+    db: Session,
+    author: User,
+    changes: list[tuple[User, str, str]]
+):
+    """
+    Ставить кілька змін профілів в outbox одним повідомленням. Викликається до коміту.
+
+    changes: список (target_user, action, details)
+    """
+    if not changes:
+        return
+
+    enqueue(db, PROFILE_TOPIC, {
+        "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "author": _person(author),
+        "changes": [
+            {"target": _person(target), "action": action, "details": details}
+            for target, action, details in changes
+        ],
+    })
+
+def audit_lines(topic: str, payload: dict) -> tuple[str, list[str]]:
+    """Файл журналу і рядки для повідомлення outbox."""
+    if topic == SCHEDULE_TOPIC:
+        return LOG_FILE, [
+            _format_schedule_change(payload["at"], payload["author"], ch["target"], ch["date"], ch["action"], ch["details"])
+            for ch in payload["changes"]
+        ]
+    return PROFILE_LOG_FILE, [
+        _format_profile_change(payload["at"], payload["author"], ch["target"], ch["action"], ch["details"])
+        for ch in payload["changes"]
+    ]
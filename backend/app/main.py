@@ -1,26 +1,106 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm.exc import StaleDataError
 
-from .db.database import Base, engine
+from .admission import AdmissionMiddleware, busy_headers, is_statement_timeout, load_metrics
+from .config import settings
+from .db.database import Base, all_engines
 
 from .db import models
+from .db.absences import backfill_absences
+from .db.department_tree import backfill_department_closure
+from .db.history import backfill_work_entry_history
+from .db.maintenance import lock_startup, run_once
+from .db.week_hours import backfill_week_hours
+from .db.slow_queries import QueryRouteMiddleware
+from .db.tenant import TenantMiddleware
+from .db.partitions import ClosedPeriodError, ensure_work_entry_partitions
+from .idempotency import IdempotencyMiddleware
+from .jobs import runner
+from .outbox import dispatcher
+from .profiling import ProfilingMiddleware
 
-from .routers import auth, department, employee, schedule, service_request
+from .routers import absences, auth, calendar, department, diagnostics, employee, events, jobs, leave, schedule, service_request, sync
 
 app = FastAPI(title="HRM API")
 
-Base.metadata.create_all(bind=engine)
+for engine in all_engines():
+    with engine.begin() as conn:
+        # Воркери стартують одночасно - готуємо базу по черзі
+        lock_startup(conn)
+        Base.metadata.create_all(bind=conn)
+        ensure_work_entry_partitions(conn)
+        run_once(conn, "department_closure", backfill_department_closure)
+        run_once(conn, "work_entry_history", backfill_work_entry_history)
+        run_once(conn, "absences", backfill_absences)
+        run_once(conn, "work_week_hours", backfill_week_hours)
+runner.recover()
+if settings.OUTBOX_DISPATCHER_ENABLED:
+    dispatcher.start()
+    # Повідомлення, що лишились недоставленими до перезапуску
+    dispatcher.wake()
 
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(QueryRouteMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(AdmissionMiddleware)
+# Орендар має бути відомий до будь-якого звернення до БД
+app.add_middleware(TenantMiddleware)
+# Зовнішній шар: CORS-заголовки потрібні й відповідям, які внутрішні шари
+# формують самі (503 від скидання навантаження), а preflight не доходить до скидання
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Браузер дає клієнту прочитати лише перелічені заголовки відповіді
+    expose_headers=["Retry-After"],
 )
 
+
+@app.exception_handler(ClosedPeriodError)
+def closed_period_handler(request: Request, exc: ClosedPeriodError):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
+@app.exception_handler(StaleDataError)
+def stale_data_handler(request: Request, exc: StaleDataError):
+    # Запис змінили між читанням і комітом (version_id_col)
+    return JSONResponse(status_code=409, content={"detail": "Record was modified concurrently, reload it and retry"})
+
+
+def _route_of(request: Request) -> str:
+    route = request.scope.get("route")
+    return f"{request.method} {route.path if route is not None else request.url.path}"
+
+
+@app.exception_handler(PoolTimeoutError)
+def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    load_metrics.record_timeout(_route_of(request), "pool")
+    return JSONResponse(status_code=503, content={"detail": "Database is busy, retry later"}, headers=busy_headers())
+
+
+@app.exception_handler(OperationalError)
+def statement_timeout_handler(request: Request, exc: OperationalError):
+    if not is_statement_timeout(exc):
+        raise exc
+    load_metrics.record_timeout(_route_of(request), "statement")
+    return JSONResponse(status_code=503, content={"detail": "Request exceeded its database time budget"}, headers=busy_headers())
+
+
 app.include_router(auth.router)
 app.include_router(employee.router)
 app.include_router(department.router)
 app.include_router(schedule.router)
 app.include_router(service_request.router)
+app.include_router(sync.router)
+app.include_router(events.router)
+app.include_router(jobs.router)
+app.include_router(leave.router)
+app.include_router(absences.router)
+app.include_router(calendar.router)
+app.include_router(diagnostics.router)
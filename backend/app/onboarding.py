@@ -0,0 +1,293 @@
+"""
+Масовий імпорт працівників з CSV: користувачі разом із профілями.
+
+Колонки: email, password, role, full_name, birth_date, employee_number,
+position, work_start_date, department_id або department (назва).
+Профіль створюється, якщо заповнено хоча б одне його поле; тоді
+обов'язкові full_name, employee_number і position.
+
+    python -m app.onboarding employees.csv --author manager@example.com [--tenant acme] [--dry-run]
+
+Першого менеджера нового орендаря (самореєстрація там закрита, а імпорт
+потребує наявного менеджера) створює окрема команда; пароль запитується:
+
+    python -m app.onboarding --create-manager manager@example.com [--tenant acme]
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, Callable, Iterable, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .db.models.department import Department
+from .db.models.profile import EmployeeProfile
+from .db.models.user import User
+from .logger import log_profile_changes
+from .schemas import ProfileCreateIn, RegisterIn
+from .security import hash_password
+
+PROFILE_FIELDS = ("full_name", "birth_date", "employee_number", "position", "work_start_date", "department_id")
+REQUIRED_PROFILE_FIELDS = ("full_name", "employee_number", "position")
+
+# Звіт про прогрес: (оброблено, всього); JobContext.progress
+Progress = Callable[[int, int], None]
+
+
+class ImportTooLarge(Exception):
+    pass
+
+
+def _validation_messages(e: ValidationError) -> list[str]:
+    return [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+
+
+def _parse_row(raw: dict, departments: dict[str, int]) -> tuple[Optional[RegisterIn], Optional[ProfileCreateIn], list[str]]:
+    raw = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in raw.items() if k}
+    errors: list[str] = []
+
+    account = None
+    try:
+        account = RegisterIn(email=raw.get("email"), password=raw.get("password") or "", role=raw.get("role") or "employee")
+    except ValidationError as e:
+        errors += _validation_messages(e)
+
+    department = raw.get("department")
+    if department and not raw.get("department_id"):
+        if department not in departments:
+            errors.append(f"department: unknown department {department!r}")
+        else:
+            raw["department_id"] = departments[department]
+
+    profile = None
+    values = {f: raw[f] for f in PROFILE_FIELDS if raw.get(f)}
+    if values:
+        try:
+            profile = ProfileCreateIn(**values)
+        except ValidationError as e:
+            errors += _validation_messages(e)
+        errors += [f"{f}: required for a profile" for f in REQUIRED_PROFILE_FIELDS if not values.get(f)]
+
+    if account and len(account.password.encode("utf-8")) > 72:
+        errors.append("password: too long (max 72 bytes)")
+    return account, profile, errors
+
+
+def import_employees(
+        db: Session,
+        rows: Iterable[dict],
+        author: User,
+        dry_run: bool = False,
+        progress: Optional[Progress] = None,
+) -> dict:
+    """
+    Перевіряє всі рядки, хешує паролі паралельно і вставляє коректні рядки
+    пакетними INSERT в одній транзакції. Рядки з помилками пропускаються
+    й повертаються з номером рядка файлу (з урахуванням заголовка).
+    progress викликається після кожного пакета хешів; виняток з нього
+    (скасування задачі) перериває імпорт до коміту.
+    """
+    departments = dict(db.execute(select(Department.name, Department.id)).all())
+    department_ids = set(departments.values())
+
+    parsed = []
+    errors = []
+    for line, raw in enumerate(rows, start=2):
+        account, profile, row_errors = _parse_row(raw, departments)
+        if profile and profile.department_id is not None and profile.department_id not in department_ids:
+            row_errors.append(f"department_id: department {profile.department_id} not found")
+        if row_errors:
+            errors.append({"row": line, "email": raw.get("email"), "errors": row_errors})
+        else:
+            parsed.append((line, account, profile))
+
+    # Дублікати - і в межах файлу, і з наявними записами (один запит на колонку)
+    emails = [a.email for _, a, _ in parsed]
+    numbers = [p.employee_number for _, _, p in parsed if p]
+    taken_emails = set(db.execute(select(User.email).where(User.email.in_(emails))).scalars()) if emails else set()
+    taken_numbers = (
+        set(db.execute(select(EmployeeProfile.employee_number).where(EmployeeProfile.employee_number.in_(numbers))).scalars())
+        if numbers else set()
+    )
+
+    valid = []
+    seen_emails: set[str] = set()
+    seen_numbers: set[str] = set()
+    for line, account, profile in parsed:
+        row_errors = []
+        if account.email in taken_emails:
+            row_errors.append("email: already registered")
+        elif account.email in seen_emails:
+            row_errors.append("email: duplicated in file")
+        if profile and profile.employee_number in taken_numbers:
+            row_errors.append("employee_number: already in use")
+        elif profile and profile.employee_number in seen_numbers:
+            row_errors.append("employee_number: duplicated in file")
+        if row_errors:
+            errors.append({"row": line, "email": account.email, "errors": row_errors})
+            continue
+        seen_emails.add(account.email)
+        if profile:
+            seen_numbers.add(profile.employee_number)
+        valid.append((line, account, profile))
+
+    errors.sort(key=lambda e: e["row"])
+    result = {"dry_run": dry_run, "total": len(valid) + len(errors), "valid": len(valid), "created": 0, "users": [], "errors": errors}
+    if dry_run or not valid:
+        return result
+
+    # bcrypt звільняє GIL, тож потоки хешують паралельно на всіх ядрах
+    batch = settings.IMPORT_BATCH_SIZE
+    workers = settings.IMPORT_HASH_WORKERS or os.cpu_count() or 1
+    hashes: list[str] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import-hash") as pool:
+        for start in range(0, len(valid), batch):
+            passwords = [a.password for _, a, _ in valid[start:start + batch]]
+            hashes.extend(pool.map(hash_password, passwords, chunksize=16))
+            if progress:
+                progress(len(hashes), len(valid))
+
+    user_ids: dict[str, int] = {}
+    for start in range(0, len(valid), batch):
+        chunk = valid[start:start + batch]
+        user_ids.update(db.execute(
+            insert(User).returning(User.email, User.id),
+            [
+                {"email": a.email, "password_hash": h, "role": a.role}
+                for (_, a, _), h in zip(chunk, hashes[start:start + batch])
+            ],
+        ).all())
+
+    profiles = [
+        {"email": a.email, **p.model_dump(exclude_none=True)}
+        for _, a, p in valid
+        if p
+    ]
+    for start in range(0, len(profiles), batch):
+        db.execute(insert(EmployeeProfile), profiles[start:start + batch])
+
+    log_profile_changes(db, author, [
+        (User(id=user_ids[a.email], email=a.email), "імпорт", ", ".join(f"{k}: {v}" for k, v in p.model_dump(exclude_none=True).items()))
+        for _, a, p in valid
+        if p
+    ])
+    db.commit()
+
+    result["created"] = len(valid)
+    result["users"] = [{"row": line, "user_id": user_ids[a.email], "email": a.email} for line, a, _ in valid]
+    return result
+
+
+def _split_records(text: str) -> tuple[list[str], str]:
+    """Повні записи CSV і незавершений залишок (рядок без кінця або відкриті лапки)."""
+    records: list[str] = []
+    record = ""
+    for line in text.splitlines(keepends=True):
+        record += line
+        # Парна кількість лапок - поле в лапках закрите, кінець рядка завершує запис
+        if line.endswith(("\n", "\r")) and record.count('"') % 2 == 0:
+            records.append(record)
+            record = ""
+    return records, record
+
+
+async def read_csv_upload(chunks: AsyncIterable[bytes], max_rows: int) -> tuple[list[str], list[list[str]]]:
+    """
+    Розбирає CSV з потоку тіла запиту по мірі надходження, не тримаючи
+    весь файл у пам'яті ні байтами, ні текстом. Повертає (заголовок, рядки);
+    порожні рядки пропускаються, як у csv.DictReader. ImportTooLarge - рядків
+    більше за max_rows.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    header: list[str] = []
+    rows: list[list[str]] = []
+
+    def take(records: list[str]) -> None:
+        nonlocal header
+        for row in csv.reader(records):
+            if not row:
+                continue
+            if not header:
+                header = row
+                continue
+            rows.append(row)
+            if len(rows) > max_rows:
+                raise ImportTooLarge(f"CSV has more than {max_rows} rows")
+
+    tail = ""
+    async for chunk in chunks:
+        records, tail = _split_records(tail + decoder.decode(chunk))
+        take(records)
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        take([tail])
+    return header, rows
+
+
+def create_manager(db: Session, email: str, password: str) -> User:
+    """Створює менеджера в поточному орендарі. ValueError - некоректні дані або email уже зайнятий."""
+    try:
+        data = RegisterIn(email=email, password=password, role="manager")
+    except ValidationError as e:
+        raise ValueError("; ".join(_validation_messages(e)))
+    if db.execute(select(User.id).where(User.email == data.email)).scalar_one_or_none() is not None:
+        raise ValueError(f"{data.email} is already registered")
+
+    user = User(email=data.email, password_hash=hash_password(data.password), role="manager")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def main(argv: list[str]) -> None:
+    from getpass import getpass
+
+    from .db.database import SessionLocal
+    from .db.tenant import current_tenant
+
+    if "--tenant" in argv and argv.index("--tenant") + 1 < len(argv):
+        current_tenant.set(argv[argv.index("--tenant") + 1])
+    else:
+        current_tenant.set(settings.DEFAULT_TENANT)
+
+    if len(argv) >= 2 and argv[0] == "--create-manager":
+        password = getpass("Password: ")
+        if password != getpass("Repeat password: "):
+            print("Passwords do not match")
+            return
+        with SessionLocal() as db:
+            try:
+                user = create_manager(db, argv[1], password)
+            except ValueError as e:
+                print(e)
+                return
+        print(f"created manager {user.email} (id {user.id}) in tenant {user.tenant_id}")
+        return
+
+    if len(argv) < 3 or argv[1] != "--author":
+        print(__doc__)
+        return
+
+    path, author_email, dry_run = argv[0], argv[2], "--dry-run" in argv
+    with SessionLocal() as db, open(path, newline="", encoding="utf-8-sig") as f:
+        author = db.execute(select(User).where(User.email == author_email)).scalar_one_or_none()
+        if author is None or author.role != "manager":
+            print(f"{author_email} is not a manager")
+            return
+        result = import_employees(db, csv.DictReader(f), author, dry_run=dry_run)
+
+    for err in result["errors"]:
+        print(f"row {err['row']} ({err['email']}): {'; '.join(err['errors'])}")
+    print(f"valid: {result['valid']}, created: {result['created']}, errors: {len(result['errors'])}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
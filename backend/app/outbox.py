@@ -0,0 +1,236 @@
+"""
+Доставка повідомлень outbox (app.db.outbox) після коміту.
+
+Диспетчер у фоновому потоці забирає порції повідомлень (FOR UPDATE SKIP
+LOCKED, тож кілька воркерів не беруть ті самі рядки) і передає їх
+приймачам: файлу аудиту, сповіщенням через /events/stream і вебхуку.
+Доставка щонайменше одноразова: повідомлення видаляється лише після
+того, як його прийняли всі приймачі, а невдача відкладає його з
+наростаючою паузою.
+
+    python -m app.outbox run               # окремий процес-диспетчер (OUTBOX_DISPATCHER_ENABLED=false у API)
+    python -m app.outbox webhook-echo 8099 # локальний приймач вебхуків для розробки
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import threading
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Protocol
+
+from sqlalchemy import delete, select
+
+from .config import settings
+from .db.database import SessionLocal
+from .db.models.outbox import OutboxMessage
+from .db.outbox import on_outbox_commit
+from .db.tenant import current_tenant
+from .events import hub
+from .logger import audit_lines
+
+log = logging.getLogger(__name__)
+
+
+class Sink(Protocol):
+    """Приймач повідомлень. deliver отримує порцію і кидає виняток, якщо її не прийнято."""
+
+    name: str
+
+    def deliver(self, messages: list[dict]) -> None: ...
+
+
+class AuditFileSink:
+    """Рядки журналів змін розкладу і профілів (одне відкриття файлу на порцію)."""
+
+    name = "audit"
+
+    def deliver(self, messages: list[dict]) -> None:
+        by_file: dict[str, list[str]] = {}
+        for m in messages:
+            path, lines = audit_lines(m["topic"], m["payload"])
+            by_file.setdefault(path, []).extend(lines)
+        for path, lines in by_file.items():
+            with open(os.path.join(os.getcwd(), path), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+
+class NotificationSink:
+    """Сповіщення працівникам і їхнім менеджерам через потік /events/stream."""
+
+    name = "notify"
+
+    def deliver(self, messages: list[dict]) -> None:
+        hub.publish([
+            {
+                "type": "notification",
+                "tenant_id": m["tenant_id"],
+                "op": m["topic"],
+                "user_id": ch["target"]["id"],
+                "id": m["id"],
+                "date": ch.get("date"),
+                "action": ch["action"],
+            }
+            for m in messages
+            for ch in m["payload"]["changes"]
+        ])
+
+
+class WebhookSink:
+    """POST порції повідомлень у JSON на OUTBOX_WEBHOOK_URL; відповідь не 2xx - повтор."""
+
+    name = "webhook"
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def deliver(self, messages: list[dict]) -> None:
+        body = json.dumps({"messages": messages}, ensure_ascii=False, default=str).encode()
+        req = urllib.request.Request(self.url, data=body, method="POST", headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=settings.OUTBOX_WEBHOOK_TIMEOUT_SECONDS) as resp:
+            if not 200 <= resp.status < 300:
+                raise RuntimeError(f"Webhook answered {resp.status}")
+
+
+def make_sinks() -> list[Sink]:
+    sinks: list[Sink] = [AuditFileSink(), NotificationSink()]
+    if settings.OUTBOX_WEBHOOK_URL:
+        sinks.append(WebhookSink(settings.OUTBOX_WEBHOOK_URL))
+    return sinks
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _message(m: OutboxMessage) -> dict:
+    return {
+        "id": m.id,
+        "tenant_id": m.tenant_id,
+        "topic": m.topic,
+        "payload": m.payload,
+        "created_at": m.created_at.isoformat() if m.created_at else None,
+    }
+
+
+class OutboxDispatcher:
+    def __init__(self, sinks: list[Sink]) -> None:
+        self.sinks = sinks
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="outbox", daemon=True)
+                self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.wait(settings.OUTBOX_POLL_SECONDS)
+            self._wake.clear()
+            self.drain()
+
+    def drain(self) -> int:
+        """Доставляє все, що готове до доставки, в основній базі й базах окремих орендарів."""
+        total = 0
+        for tenant_id in [None, *settings.TENANT_DATABASE_URLS]:
+            token = current_tenant.set(tenant_id)
+            try:
+                while (n := self.dispatch_batch()) > 0:
+                    total += n
+            except Exception:
+                log.exception("Outbox dispatch failed")
+            finally:
+                current_tenant.reset(token)
+        return total
+
+    def dispatch_batch(self) -> int:
+        """Одна порція: повертає кількість доставлених повідомлень (0 - нічого або невдача)."""
+        with SessionLocal() as db:
+            now = _now()
+            batch = db.execute(
+                select(OutboxMessage)
+                .where(OutboxMessage.available_at <= now)
+                .where(OutboxMessage.attempts < settings.OUTBOX_MAX_ATTEMPTS)
+                .order_by(OutboxMessage.id)
+                .limit(settings.OUTBOX_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not batch:
+                return 0
+
+            failed: dict[int, str] = {}
+            for sink in self.sinks:
+                pending = [m for m in batch if sink.name not in m.delivered_sinks and m.id not in failed]
+                if not pending:
+                    continue
+                try:
+                    sink.deliver([_message(m) for m in pending])
+                except Exception as e:
+                    log.warning("Outbox sink %s failed: %r", sink.name, e)
+                    failed.update((m.id, f"{sink.name}: {e!r}"[:2000]) for m in pending)
+                    continue
+                for m in pending:
+                    m.delivered_sinks = [*m.delivered_sinks, sink.name]
+
+            done = [m.id for m in batch if m.id not in failed]
+            for m in batch:
+                if m.id in failed:
+                    m.attempts += 1
+                    m.last_error = failed[m.id]
+                    m.available_at = now + timedelta(seconds=min(
+                        settings.OUTBOX_RETRY_MAX_SECONDS, settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (m.attempts - 1)
+                    ))
+            if done:
+                # Спершу позначки приймачів, інакше UPDATE піде вже після DELETE тих самих рядків
+                db.flush()
+                db.execute(
+                    delete(OutboxMessage)
+                    .where(OutboxMessage.id.in_(done))
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+            return len(done) if not failed else 0
+
+
+dispatcher = OutboxDispatcher(make_sinks())
+on_outbox_commit(dispatcher.wake)
+
+
+def _serve_webhook_echo(port: int) -> None:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Echo(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            for m in body["messages"]:
+                print(json.dumps(m, ensure_ascii=False))
+            self.send_response(204)
+            self.end_headers()
+
+    print(f"listening on http://127.0.0.1:{port}/")
+    HTTPServer(("127.0.0.1", port), Echo).serve_forever()
+
+
+def main(argv: list[str]) -> None:
+    command = argv[0] if argv else ""
+    if command == "run":
+        logging.basicConfig(level=logging.INFO)
+        dispatcher.start()
+        dispatcher._thread.join()
+    elif command == "webhook-echo":
+        _serve_webhook_echo(int(argv[1]) if len(argv) > 1 else 8099)
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Семплер профільованого запиту; контекст копіюється в потоки пулу разом з викликом обробника
+_current_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("current_sampler", default=None)
+# id потоку пулу -> семплер запиту, чий синхронний обробник потік зараз виконує
+_profiled_threads: dict[int, "StackSampler"] = {}
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+def _in_profiled_request(frame: FrameType) -> bool:
+    """
+    Чи виконує стек циклу подій корутину профільованого запиту. Призупинені
+    корутини в стеку не видно, тож кадр ProfilingMiddleware._profile
+    присутній лише тоді, коли код запиту справді виконується.
+    """
+    while frame is not None:
+        if frame.f_code is ProfilingMiddleware._profile.__code__:
+            return True
+        frame = frame.f_back
+    return False
+
+
+def _folded_stack(frame: FrameType) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Періодично знімає стеки, що виконують код саме цього запиту: корутини
+    в потоці циклу подій і синхронні обробники в потоках пулу (їх позначає
+    ProfiledRoute). Інші запити, фонові потоки і простоюючі потоки в профіль
+    не потрапляють.
+    """
+
+    def __init__(self, path: Path, interval: float) -> None:
+        self.path = path
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, write: bool = True) -> None:
+        self._write_on_stop = write
+        self._stop.set()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        self._write_on_stop = True
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if _profiled_threads.get(thread_id) is self:
+                    self.samples[f"threadpool;{_folded_stack(frame)}"] += 1
+                elif _in_profiled_request(frame):
+                    # Одночасно профілюється лише один запит, тож це запит цього семплера
+                    self.samples[f"event-loop;{_folded_stack(frame)}"] += 1
+        if self._write_on_stop:
+            self._write()
+
+    def _write(self) -> None:
+        if not self.samples:
+            return
+        lines = [f"{stack} {count}\n" for stack, count in self.samples.most_common()]
+        self.path.write_text("".join(lines), encoding="utf-8")
+        _prune(self.path.parent, settings.PROFILING_MAX_FILES)
+
+
+def _prune(directory: Path, keep: int) -> None:
+    files = sorted(directory.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+    for old in files[:-keep] if keep > 0 else files:
+        old.unlink(missing_ok=True)
+
+
+def _in_profiled_thread(endpoint):
+    """Обгортка синхронного обробника: на час виклику потік пулу позначається семплером запиту."""
+    @functools.wraps(endpoint)
+    def run(*args, **kwargs):
+        sampler = _current_sampler.get()
+        if sampler is None:
+            return endpoint(*args, **kwargs)
+        thread_id = threading.get_ident()
+        _profiled_threads[thread_id] = sampler
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _profiled_threads.pop(thread_id, None)
+    return run
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Маршрут, синхронний обробник якого профайлер бачить у потоці пулу.
+    Без PROFILING_ENABLED обробник не обгортається.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs) -> None:
+        if settings.PROFILING_ENABLED and not inspect.iscoroutinefunction(endpoint):
+            endpoint = _in_profiled_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+class ProfilingMiddleware:
+    """
+    Профілює окремі запити семплюванням стеків. Запит профілюється, якщо
+    заголовок X-Profile збігається з PROFILING_TOKEN, або випадково з
+    імовірністю PROFILING_SAMPLE_RATE. Результат - файл у форматі folded stacks
+    (flamegraph.pl, speedscope) у PROFILING_DIR; ім'я повертається в X-Profile-Id.
+    Одночасно профілюється не більше одного запиту. Потоки Server-Sent Events
+    не профілюються: вони тривають, доки клієнт не відключиться.
+    Підключається лише за PROFILING_ENABLED, тож вимкнений профайлер нічого не коштує.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.directory = Path(settings.PROFILING_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._busy = threading.Lock()
+
+    def _wanted(self, scope: Scope) -> bool:
+        headers = dict(scope["headers"])
+        if b"text/event-stream" in headers.get(b"accept", b""):
+            return False
+        token = headers.get(PROFILE_HEADER)
+        if token and settings.PROFILING_TOKEN:
+            return token.decode() == settings.PROFILING_TOKEN
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        await self._profile(scope, receive, send)
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        profile_id = f"{stamp}-{scope['method']}-{slug}"[:150] + ".folded"
+
+        sampler = StackSampler(self.directory / profile_id, settings.PROFILING_INTERVAL_MS / 1000)
+        released = False
+
+        def release(write: bool) -> None:
+            nonlocal released
+            if not released:
+                released = True
+                sampler.stop(write)
+                self._busy.release()
+
+        async def tagged_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if any(k.lower() == b"content-type" and v.startswith(b"text/event-stream") for k, v in headers):
+                    # Потокова відповідь без Accept: text/event-stream - відпускаємо профайлер одразу
+                    release(write=False)
+                else:
+                    message = {**message, "headers": headers + [(PROFILE_ID_HEADER, profile_id.encode())]}
+            await send(message)
+
+        sampler.start()
+        token = _current_sampler.set(sampler)
+        try:
+            await self.app(scope, receive, tagged_send)
+        finally:
+            _current_sampler.reset(token)
+            release(write=True)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..db.database import get_db
+from ..db.models.absence import Absence
+from ..db.models.department import DepartmentClosure
+from ..db.models.profile import EmployeeProfile
+from ..db.models.user import User
+from ..dependencies import managed_department_ids, require_manager
+from ..encoding import negotiated_response
+from ..schemas import AbsenceListOut, AbsenceOut
+from ..profiling import ProfiledRoute
+
+router = APIRouter(tags=["absences"], route_class=ProfiledRoute)
+
+# Найдовше вікно одного запиту, днів
+MAX_WINDOW_DAYS = 366
+
+
+@router.get("/absences", response_model=AbsenceListOut)
+def get_absences(
+        request: Request,
+        date_from: Optional[date] = Query(None, alias="from"),
+        date_to: Optional[date] = Query(None, alias="to"),
+        department_id: Optional[int] = None,
+        all_departments: bool = False,
+        include_pending: bool = False,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    """
+    Хто відсутній у вікні [from, to] (за замовчуванням - сьогодні). Читає стислий
+    індекс absences, а не розклад по днях. Область видимості як у звіті відпусток:
+    підрозділи менеджера, department_id - підрозділ разом з підпідрозділами,
+    all_departments=true - вся організація.
+    """
+    date_from = date_from or date.today()
+    date_to = date_to or date_from
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be earlier than 'from'")
+    if (date_to - date_from).days >= MAX_WINDOW_DAYS:
+        raise HTTPException(status_code=400, detail=f"Window must not exceed {MAX_WINDOW_DAYS} days")
+
+    stmt = (
+        select(Absence, EmployeeProfile.full_name, EmployeeProfile.department_id)
+        .join(User, User.id == Absence.user_id)
+        .outerjoin(EmployeeProfile, EmployeeProfile.email == User.email)
+        .where(Absence.end_date >= date_from)
+        .where(Absence.start_date <= date_to)
+    )
+    if not include_pending:
+        stmt = stmt.where(Absence.status == "approved")
+    if department_id is not None:
+        stmt = stmt.where(EmployeeProfile.department_id.in_(
+            select(DepartmentClosure.descendant_id).where(DepartmentClosure.ancestor_id == department_id)
+        ))
+    elif not all_departments:
+        stmt = stmt.where(EmployeeProfile.department_id.in_(managed_department_ids(manager.id)))
+
+    rows = db.execute(stmt.order_by(Absence.start_date, Absence.user_id, Absence.id)).all()
+    items = [
+        AbsenceOut(
+            user_id=a.user_id,
+            full_name=full_name,
+            department_id=dept_id,
+            start_date=a.start_date,
+            end_date=a.end_date,
+            type=a.type,
+            source=a.source,
+            status=a.status,
+            service_request_id=a.service_request_id,
+        )
+        for a, full_name, dept_id in rows
+    ]
+    out = AbsenceListOut(date_from=date_from, date_to=date_to, items=items)
+    return negotiated_response(request, out, rows_key="items")
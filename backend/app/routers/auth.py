@@ -1,19 +1,32 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from ..config import settings
 from ..db.database import get_db
 from ..schemas import LoginIn, RegisterIn, TokenOut, UserOut
 from ..security import create_access_token, hash_password, verify_password
 from ..db.models.user import User
+from ..db.tenant import current_tenant_id
+from ..dependencies import require_manager
+from ..throttle import client_ip, login_throttle
+from ..profiling import ProfiledRoute
 
-router = APIRouter(tags=["auth"])
+router = APIRouter(tags=["auth"], route_class=ProfiledRoute)
 
 
 @router.post("/auth/register", response_model=UserOut)
 def register(data: RegisterIn, db: Session = Depends(get_db)):
+    # Орендаря реєстрації обирає сам клієнт заголовком X-Tenant-ID, тож відкрита
+    # реєстрація лише в орендаря за замовчуванням; інших користувачів створюють їхні менеджери,
+    # а першого менеджера - python -m app.onboarding --create-manager
+    if current_tenant_id() != settings.DEFAULT_TENANT:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Registration is closed for this tenant")
+
     existing = db.execute(select(User.id).where(User.email == data.email)).scalar_one_or_none()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -31,10 +44,25 @@ def register(data: RegisterIn, db: Session = Depends(get_db)):
 
 
 @router.post("/auth/login", response_model=TokenOut)
-def login(data: LoginIn, db: Session = Depends(get_db)):
+def login(data: LoginIn, request: Request, db: Session = Depends(get_db)):
+    retry_after = login_throttle.check(f"{current_tenant_id()}/{data.email}", client_ip(request))
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
     user = db.execute(select(User).where(User.email == data.email)).scalar_one_or_none()
     if not user or not verify_password(data.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    token = create_access_token(sub=user.email, role=user.role, uid=user.id)
+    login_throttle.succeeded(f"{current_tenant_id()}/{data.email}")
+
+    token = create_access_token(sub=user.email, role=user.role, uid=user.id, tid=user.tenant_id)
     return TokenOut(accessToken=token)
+
+
+@router.get("/auth/login/throttle")
+def login_throttle_stats(_: User = Depends(require_manager)):
+    return login_throttle.stats()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..db.database import get_db
+from ..db.models.user import User
+from ..db.tenant import current_tenant, current_tenant_id
+from ..dependencies import get_current_user
+from ..ics import Feed, feed_cache, feed_token, feed_window, parse_feed_token
+from ..schemas import CalendarFeedOut
+from .schedule import get_range_entries
+from ..profiling import ProfiledRoute
+
+router = APIRouter(tags=["calendar"], route_class=ProfiledRoute)
+
+
+def _not_modified(request: Request, feed: Feed) -> bool:
+    # If-None-Match має пріоритет над If-Modified-Since (RFC 9110)
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        return "*" in tags or feed.etag in tags
+    ims = request.headers.get("if-modified-since")
+    if ims:
+        try:
+            return feed.last_modified <= parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+@router.get("/calendar/feed", response_model=CalendarFeedOut)
+def get_my_calendar_feed(request: Request, current_user: User = Depends(get_current_user)):
+    """URL підписки на власний розклад для календарних застосунків."""
+    first_day, end_exclusive = feed_window()
+    token = feed_token(current_tenant_id(), current_user.id)
+    return CalendarFeedOut(
+        url=str(request.url_for("get_calendar_feed", token=token)),
+        window_start=first_day,
+        window_end=end_exclusive - timedelta(days=1),
+    )
+
+
+@router.get("/calendar/{token}.ics", name="get_calendar_feed")
+def get_calendar_feed(token: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Стрічка розкладу за підписаним токеном, без заголовка Authorization -
+    календарні застосунки його не передають. Орендар береться з токена.
+    """
+    parsed = parse_feed_token(token)
+    if parsed is None:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    tenant_id, user_id = parsed
+    # Запит виконується в окремому потоці з копією контексту, тож орендар не "протікає" далі
+    current_tenant.set(tenant_id)
+
+    def load(first_day, end_exclusive):
+        return get_range_entries(db, user_id, first_day, end_exclusive)
+
+    if not feed_cache.has(tenant_id, user_id):
+        if db.execute(select(User.id).where(User.id == user_id)).scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Feed not found")
+    feed = feed_cache.get(tenant_id, user_id, load)
+
+    headers = {
+        "ETag": feed.etag,
+        "Last-Modified": format_datetime(feed.last_modified, usegmt=True),
+        "Cache-Control": f"private, max-age={settings.ICS_MAX_AGE_SECONDS}",
+    }
+    if _not_modified(request, feed):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=feed.body,
+        media_type="text/calendar; charset=utf-8",
+        headers={**headers, "Content-Disposition": 'inline; filename="schedule.ics"'},
+    )
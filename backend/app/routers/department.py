@@ -1,29 +1,46 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import timedelta
+from typing import Optional, get_args
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from ..db.database import get_db
+from ..db.department_tree import attach_department, move_department, subtree_ids
 from ..db.models.department import Department
-from ..db.models.profile import EmployeeProfile
+from ..db.models.profile import EmployeeProfile, profile_sort_key
+from ..db.models.work_entry import WorkEntry
 from ..schemas import (
     AssignEmployeeDepartmentIn,
+    DepartmentCoverageOut,
     DepartmentCreateIn,
     DepartmentEmployeeOut,
     DepartmentOut,
     DepartmentUpdateIn,
+    EntryType,
 )
 from ..db.models.user import User
 from ..dependencies import (
     assert_manager_can_edit_target,
     assert_user_is_manager,
     get_user_by_id,
+    managed_department_ids,
+    month_bounds,
     require_manager,
 )
 from ..logger import log_profile_change
+from ..profiling import ProfiledRoute
+
+router = APIRouter(tags=["department"], route_class=ProfiledRoute)
 
-router = APIRouter(tags=["department"])
+
+def get_department(db: Session, department_id: int) -> Department:
+    dep = db.execute(select(Department).where(Department.id == department_id)).scalar_one_or_none()
+    if not dep:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return dep
 
 
 @router.get("/department/all", response_model=list[DepartmentOut])
@@ -33,20 +50,97 @@ def display_all_departments(_: User = Depends(require_manager), db: Session = De
 
 @router.get("/department/employees", response_model=list[DepartmentEmployeeOut])
 def display_my_employees(manager: User = Depends(require_manager), db: Session = Depends(get_db)):
-    dep = db.execute(select(Department).where(Department.manager_user_id == manager.id)).scalar_one_or_none()
-    if not dep:
-        return []
-
     rows = (
         db.execute(
-            select(User.id, EmployeeProfile.email, EmployeeProfile.full_name)
+            select(User.id, EmployeeProfile.email, EmployeeProfile.full_name, EmployeeProfile.department_id)
             .join(User, EmployeeProfile.email == User.email)
-            .where(EmployeeProfile.department_id == dep.id)
-            .order_by(func.lower(func.coalesce(EmployeeProfile.full_name, "")))
+            .where(EmployeeProfile.department_id.in_(managed_department_ids(manager.id)))
+            .order_by(profile_sort_key(), EmployeeProfile.id)
         ).all()
     )
 
-    return [DepartmentEmployeeOut(user_id=user_id, email=email, full_name=full_name) for user_id, email, full_name in rows]
+    return [
+        DepartmentEmployeeOut(user_id=user_id, email=email, full_name=full_name, department_id=department_id)
+        for user_id, email, full_name, department_id in rows
+    ]
+
+
+@router.get("/department/coverage", response_model=DepartmentCoverageOut)
+def department_coverage(
+        month: str = Query(..., pattern=r"^\d{4}-\d{2}$"),
+        department_id: Optional[int] = None,
+        hourly: bool = False,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    """
+    Скільки людей підрозділу на кожен день місяця на зміні, вихідних,
+    у відпустці тощо. Рахується одним згрупованим запитом у БД,
+    а не завантаженням розкладу кожного працівника.
+    """
+    managed = db.execute(managed_department_ids(manager.id)).scalars().all()
+    if department_id is None:
+        if not managed:
+            raise HTTPException(status_code=404, detail="Department not found")
+        department_id = min(managed)
+    elif department_id not in managed:
+        raise HTTPException(status_code=403, detail="You can only view coverage of your departments")
+
+    first_day, next_month_first = month_bounds(month)
+    days = [first_day + timedelta(days=i) for i in range((next_month_first - first_day).days)]
+    types = list(get_args(EntryType))
+
+    headcount = db.execute(
+        select(func.count(EmployeeProfile.id)).where(EmployeeProfile.department_id == department_id)
+    ).scalar_one()
+
+    department_entries = (
+        select(WorkEntry)
+        .join(User, WorkEntry.user_id == User.id)
+        .join(EmployeeProfile, EmployeeProfile.email == User.email)
+        .where(EmployeeProfile.department_id == department_id)
+        .where(WorkEntry.date >= first_day)
+        .where(WorkEntry.date < next_month_first)
+        .subquery()
+    )
+
+    counts = [[0] * (len(types) + 1) for _ in days]
+    type_index = {t: i for i, t in enumerate(types)}
+    for entry_date, entry_type, n in db.execute(
+        select(department_entries.c.date, department_entries.c.type, func.count())
+        .group_by(department_entries.c.date, department_entries.c.type)
+    ):
+        counts[(entry_date - first_day).days][type_index[entry_type]] = n
+
+    for row in counts:
+        row[-1] = max(headcount - sum(row[:-1]), 0)
+
+    hours = None
+    if hourly:
+        # Групуємо зміни за (дата, початок, кінець) - далі розгортаємо по годинах лише унікальні інтервали
+        hours = [[0] * 24 for _ in days]
+        for entry_date, start_time, end_time, n in db.execute(
+            select(department_entries.c.date, department_entries.c.start_time, department_entries.c.end_time, func.count())
+            .where(department_entries.c.type == "shift")
+            .where(department_entries.c.start_time.is_not(None))
+            .where(department_entries.c.end_time.is_not(None))
+            .group_by(department_entries.c.date, department_entries.c.start_time, department_entries.c.end_time)
+        ):
+            row = hours[(entry_date - first_day).days]
+            start = start_time.hour * 60 + start_time.minute
+            end = end_time.hour * 60 + end_time.minute
+            for h in range(start // 60, min((end + 59) // 60, 24)):
+                row[h] += n
+
+    return DepartmentCoverageOut(
+        department_id=department_id,
+        month=month,
+        headcount=headcount,
+        types=types + ["unscheduled"],
+        days=days,
+        counts=counts,
+        hours=hours,
+    )
 
 
 @router.post("/department/create", response_model=DepartmentOut, status_code=201)
@@ -54,8 +148,13 @@ def create_department(payload: DepartmentCreateIn, _: User = Depends(require_man
     if payload.manager_user_id is not None:
         assert_user_is_manager(db, payload.manager_user_id)
 
-    dep = Department(name=payload.name, manager_user_id=payload.manager_user_id)
+    if payload.parent_id is not None:
+        get_department(db, payload.parent_id)
+
+    dep = Department(name=payload.name, manager_user_id=payload.manager_user_id, parent_id=payload.parent_id)
     db.add(dep)
+    db.flush()
+    attach_department(db, dep.id, dep.parent_id)
     db.commit()
     db.refresh(dep)
     return dep
@@ -89,15 +188,14 @@ def assign_employee_department(
         prof.department_id = dep.id
 
     if old_dept != prof.department_id:
-        db.commit()
         log_profile_change(
+            db,
             author=manager,
             target_user=target,
             action=action,
             details=f"department_id: {old_dept} -> {prof.department_id}"
         )
-    else:
-        db.commit()
+    db.commit()
 
     return {"ok": True, "department_id": prof.department_id}
 
@@ -109,14 +207,19 @@ def update_department(
         _: User = Depends(require_manager),
         db: Session = Depends(get_db),
 ):
-    dep = db.execute(select(Department).where(Department.id == department_id)).scalar_one_or_none()
-    if not dep:
-        raise HTTPException(status_code=404, detail="Department not found")
+    dep = get_department(db, department_id)
 
     data = payload.model_dump(exclude_unset=True)
     if "manager_user_id" in data and data["manager_user_id"] is not None:
         assert_user_is_manager(db, data["manager_user_id"])
 
+    if "parent_id" in data and data["parent_id"] != dep.parent_id:
+        if data["parent_id"] is not None:
+            get_department(db, data["parent_id"])
+            if data["parent_id"] in subtree_ids(db, dep.id):
+                raise HTTPException(status_code=400, detail="Department cannot be moved under itself or its sub-department")
+        move_department(db, dep.id, data["parent_id"])
+
     for k, v in data.items():
         setattr(dep, k, v)
 
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query
+
+from ..admission import load_metrics
+from ..db.models.user import User
+from ..db.slow_queries import slow_query_log
+from ..dependencies import require_manager
+from ..profiling import ProfiledRoute
+
+router = APIRouter(tags=["diagnostics"], route_class=ProfiledRoute)
+
+
+@router.get("/diagnostics/slow-queries")
+def get_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    manager: User = Depends(require_manager),
+):
+    """Повільні запити лише орендаря менеджера."""
+    return slow_query_log.snapshot(manager.tenant_id, limit)
+
+
+@router.delete("/diagnostics/slow-queries", status_code=204)
+def clear_slow_queries(manager: User = Depends(require_manager)):
+    slow_query_log.clear(manager.tenant_id)
+
+
+@router.get("/diagnostics/load")
+def get_load(_: User = Depends(require_manager)):
+    """Запити в роботі, заповненість пулу, скинуті і перервані за тайм-аутом запити по маршрутах."""
+    return load_metrics.snapshot()
+
+
+@router.delete("/diagnostics/load", status_code=204)
+def clear_load(_: User = Depends(require_manager)):
+    load_metrics.clear()
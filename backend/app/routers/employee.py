@@ -1,23 +1,37 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+import base64
+import csv
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
 
+from ..config import settings
 from ..db.database import get_db
 from ..db.models.department import Department
-from ..db.models.profile import EmployeeProfile
-from ..schemas import ProfileCreateIn, ProfileOut
+from ..db.models.profile import EmployeeProfile, profile_search_text, profile_sort_key
+from ..schemas import EmployeeImportOut, EmployeeSearchItemOut, EmployeeSearchOut, JobOut, ProfileCreateIn, ProfileOut
 from ..db.models.user import User
 from ..dependencies import (
     assert_manager_can_edit_target,
+    check_version,
     get_current_user,
     get_user_by_id,
+    if_match_version,
+    managed_department_ids,
     require_manager,
+    version_etag,
 )
+from ..jobs import JobContext, job_handler, runner
 from ..logger import log_profile_change
+from ..onboarding import ImportTooLarge, import_employees, read_csv_upload
+from ..profiling import ProfiledRoute
 
-router = APIRouter(tags=["employee"])
+router = APIRouter(tags=["employee"], route_class=ProfiledRoute)
 
 
 def profile_to_out(profile: EmployeeProfile) -> ProfileOut:
@@ -30,11 +44,12 @@ def profile_to_out(profile: EmployeeProfile) -> ProfileOut:
         work_start_date=profile.work_start_date,
         department_id=profile.department_id,
         department_name=profile.department.name if profile.department else None,
+        version=profile.version,
     )
 
 
 @router.get("/employee/profile/me", response_model=ProfileOut)
-def get_my_profile(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_my_profile(response: Response, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     profile = db.execute(
         select(EmployeeProfile)
         .options(joinedload(EmployeeProfile.department))
@@ -44,12 +59,94 @@ def get_my_profile(current_user: User = Depends(get_current_user), db: Session =
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
 
+    response.headers["ETag"] = version_etag(profile)
     return profile_to_out(profile)
 
 
+def _encode_cursor(name: str, profile_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([name, profile_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        name, profile_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(name), int(profile_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/employee/search", response_model=EmployeeSearchOut)
+def search_employees(
+        q: str = Query("", max_length=100),
+        department_id: Optional[int] = None,
+        all_departments: bool = False,
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    """
+    Пошук працівників за підрядком імені, email, табельного номера чи посади.
+    За замовчуванням - у підрозділах менеджера; department_id звужує до одного
+    підрозділу, all_departments=true шукає по всій організації.
+    Сторінки - за курсором (lower(full_name), id), без OFFSET.
+    """
+    sort_key = profile_sort_key()
+    stmt = (
+        select(
+            User.id,
+            EmployeeProfile.id,
+            sort_key,
+            EmployeeProfile.email,
+            EmployeeProfile.full_name,
+            EmployeeProfile.employee_number,
+            EmployeeProfile.position,
+            EmployeeProfile.department_id,
+        )
+        .join(User, EmployeeProfile.email == User.email)
+    )
+
+    if department_id is not None:
+        stmt = stmt.where(EmployeeProfile.department_id == department_id)
+    elif not all_departments:
+        stmt = stmt.where(EmployeeProfile.department_id.in_(managed_department_ids(manager.id)))
+
+    term = q.strip().lower()
+    if term:
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(profile_search_text().like(f"%{escaped}%", escape="\\"))
+
+    if cursor:
+        after_name, after_id = _decode_cursor(cursor)
+        stmt = stmt.where(tuple_(sort_key, EmployeeProfile.id) > tuple_(after_name, after_id))
+
+    rows = db.execute(stmt.order_by(sort_key, EmployeeProfile.id).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][2], rows[-1][1])
+
+    return EmployeeSearchOut(
+        items=[
+            EmployeeSearchItemOut(
+                user_id=user_id,
+                email=email,
+                full_name=full_name,
+                employee_number=employee_number,
+                position=position,
+                department_id=dep_id,
+            )
+            for user_id, _, _, email, full_name, employee_number, position, dep_id in rows
+        ],
+        next_cursor=next_cursor,
+    )
+
+
 @router.get("/employee/profile/{user_id}", response_model=ProfileOut)
 def get_employee_profile(
     user_id: int,
+    response: Response,
     _: User = Depends(require_manager),
     db: Session = Depends(get_db)
 ):
@@ -64,6 +161,7 @@ def get_employee_profile(
     if not profile:
         return ProfileOut(email=target.email)
 
+    response.headers["ETag"] = version_etag(profile)
     return profile_to_out(profile)
 
 
@@ -71,6 +169,8 @@ def get_employee_profile(
 def add_or_update_profile(
         user_id: int,
         payload: ProfileCreateIn,
+        response: Response,
+        expected_version: Optional[int] = Depends(if_match_version),
         manager: User = Depends(require_manager),
         db: Session = Depends(get_db),
 ):
@@ -80,6 +180,7 @@ def add_or_update_profile(
     profile = db.execute(
         select(EmployeeProfile).where(EmployeeProfile.email == target.email)
     ).scalar_one_or_none()
+    check_version(profile, expected_version)
 
     if not profile:
         profile = EmployeeProfile(email=target.email)
@@ -102,15 +203,61 @@ def add_or_update_profile(
             changed_fields.append(f"{key}: {old_val} -> {value}")
         setattr(profile, key, value)
 
-    db.commit()
-    db.refresh(profile)
-
     if changed_fields:
         log_profile_change(
+            db,
             author=manager,
             target_user=target,
             action=action,
             details=", ".join(changed_fields)
         )
 
+    db.commit()
+    db.refresh(profile)
+    response.headers["ETag"] = version_etag(profile)
+
     return profile_to_out(profile)
+
+
+@job_handler("employee_import")
+def run_employee_import_job(ctx: JobContext, db: Session, params: dict) -> dict:
+    """
+    Імпорт з розібраного CSV; прогрес - за хешуванням паролів. Результат - EmployeeImportOut.
+    Рядки файлу (з паролями) приходять у ctx.payload лише в пам'яті, у params - тільки їх кількість.
+    """
+    manager = get_user_by_id(db, ctx.user_id)
+    columns, records = ctx.payload
+    rows = (dict(zip(columns, row)) for row in records)
+    result = import_employees(db, rows, manager, dry_run=params["dry_run"], progress=ctx.progress)
+    return EmployeeImportOut.model_validate(result).model_dump(mode="json")
+
+
+@router.post("/employee/import", response_model=JobOut, status_code=202)
+async def import_employees_csv(
+        request: Request,
+        dry_run: bool = False,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    """
+    Масове створення користувачів і профілів з CSV (колонки - див. app/onboarding.py).
+    Тіло (text/csv) розбирається потоково, а перевірка, хешування паролів і
+    вставка виконуються фоновою задачею: стан і результат (EmployeeImportOut) -
+    у /jobs/{id}. Коректні рядки вставляються однією транзакцією, помилки
+    повертаються по рядках; dry_run=true лише перевіряє файл.
+    """
+    try:
+        columns, rows = await read_csv_upload(request.stream(), settings.IMPORT_MAX_ROWS)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+    except ImportTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    return await run_in_threadpool(
+        runner.submit,
+        db,
+        "employee_import",
+        {"dry_run": dry_run, "rows": len(rows)},
+        manager.id,
+        (columns, rows),
+    )
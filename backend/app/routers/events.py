@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..db.database import get_db
+from ..db.models.user import User
+from ..dependencies import get_current_user, visible_user_filter
+from ..events import Subscription, hub
+from ..profiling import ProfiledRoute
+
+router = APIRouter(tags=["events"], route_class=ProfiledRoute)
+
+
+def _load_visible_user_ids(db: Session, user: User) -> set[int]:
+    ids = set(db.execute(select(User.id).where(visible_user_filter(User.id, user))).scalars())
+    # З'єднання не тримаємо відкритим на весь час потоку
+    db.close()
+    return ids
+
+
+@router.get("/events/stream")
+async def stream_events(
+        request: Request,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+):
+    """
+    Потік Server-Sent Events про зміни розкладу та заявок, видимих користувачу.
+    Подія містить лише тип, операцію і ключ запису - самі дані клієнт
+    дочитує через /sync. Подія "resync" означає, що частину подій втрачено.
+    """
+    visible = await run_in_threadpool(_load_visible_user_ids, db, current_user)
+    sub = Subscription(current_user.tenant_id, current_user.id, visible, asyncio.get_running_loop())
+    hub.subscribe(sub)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                if sub.overflowed:
+                    sub.overflowed = False
+                    yield "event: resync\ndata: {}\n\n"
+                try:
+                    ev = await asyncio.wait_for(sub.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {ev['type']}\ndata: {json.dumps(ev)}\n\n"
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..db.database import get_db
+from ..db.models.job import Job
+from ..db.models.user import User
+from ..dependencies import (
+    assert_manager_can_edit_target,
+    get_current_user,
+    get_user_by_id,
+    require_manager,
+)
+from ..jobs import FINISHED_STATUSES, runner
+from ..schemas import JobOut, ScheduleRangeUpsertIn, ServiceRequestBatchStatusIn
+from ..profiling import ProfiledRoute
+
+router = APIRouter(tags=["jobs"], route_class=ProfiledRoute)
+
+
+def get_own_job(db: Session, job_id: str, user: User) -> Job:
+    job = db.execute(select(Job).where(Job.id == job_id).where(Job.created_by == user.id)).scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs/schedule-range/{user_id}", response_model=JobOut, status_code=202)
+def submit_schedule_range_job(
+        user_id: int,
+        payload: ScheduleRangeUpsertIn,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    target = get_user_by_id(db, user_id)
+    assert_manager_can_edit_target(manager, target)
+
+    return runner.submit(
+        db,
+        "schedule_range",
+        {"user_id": target.id, "payload": payload.model_dump(mode="json")},
+        manager.id,
+    )
+
+
+@router.post("/jobs/service-requests/status", response_model=JobOut, status_code=202)
+def submit_request_status_job(
+        payload: ServiceRequestBatchStatusIn,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    return runner.submit(db, "service_request_status", payload.model_dump(mode="json"), manager.id)
+
+
+@router.get("/jobs", response_model=list[JobOut])
+def list_my_jobs(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return (
+        db.execute(
+            select(Job)
+            .where(Job.created_by == current_user.id)
+            .order_by(Job.created_at.desc())
+            .limit(100)
+        )
+        .scalars()
+        .all()
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def get_job(job_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return get_own_job(db, job_id, current_user)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobOut)
+def cancel_job(job_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    job = get_own_job(db, job_id, current_user)
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=400, detail="Job is already finished")
+
+    # Задача в роботі зупиниться на наступному звіті про прогрес
+    job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    return job
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..db.database import get_db
+from ..db.models.leave import Holiday, LeaveLedgerEntry
+from ..db.models.profile import EmployeeProfile
+from ..db.models.user import User
+from ..dependencies import (
+    assert_manager_can_edit_target,
+    get_current_user,
+    get_user_by_id,
+    managed_department_ids,
+    require_manager,
+)
+from ..encoding import negotiated_response
+from ..leave import balance_report, user_balance
+from ..schemas import HolidayIn, HolidayOut, LeaveAdjustmentIn, LeaveBalanceOut, LeaveReportOut
+from ..profiling import ProfiledRoute
+
+router = APIRouter(tags=["leave"], route_class=ProfiledRoute)
+
+
+def _year(year: Optional[int]) -> int:
+    return year or date.today().year
+
+
+@router.get("/leave/balance/me", response_model=LeaveBalanceOut)
+def get_my_leave_balance(
+        year: Optional[int] = Query(None, ge=2000, le=2100),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+):
+    return user_balance(db, current_user.id, _year(year))
+
+
+@router.get("/leave/balance/{user_id}", response_model=LeaveBalanceOut)
+def get_employee_leave_balance(
+        user_id: int,
+        year: Optional[int] = Query(None, ge=2000, le=2100),
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    target = get_user_by_id(db, user_id)
+    assert_manager_can_edit_target(manager, target)
+    return user_balance(db, target.id, _year(year))
+
+
+@router.get("/leave/report", response_model=LeaveReportOut)
+def get_leave_report(
+        request: Request,
+        year: Optional[int] = Query(None, ge=2000, le=2100),
+        department_id: Optional[int] = None,
+        all_departments: bool = False,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    """
+    Баланс відпусток працівників за рік. За замовчуванням - у підрозділах
+    менеджера; department_id звужує до одного підрозділу, all_departments=true -
+    по всій організації.
+    """
+    users = select(User.id).join(EmployeeProfile, EmployeeProfile.email == User.email)
+    if department_id is not None:
+        users = users.where(EmployeeProfile.department_id == department_id)
+    elif not all_departments:
+        users = users.where(EmployeeProfile.department_id.in_(managed_department_ids(manager.id)))
+
+    year = _year(year)
+    return negotiated_response(request, LeaveReportOut(year=year, items=balance_report(db, year, users)), rows_key="items")
+
+
+@router.post("/leave/adjustments/{user_id}", response_model=LeaveBalanceOut, status_code=201)
+def add_leave_adjustment(
+        user_id: int,
+        payload: LeaveAdjustmentIn,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    """Ручне коригування балансу: перенесений залишок, додаткові дні, списання."""
+    target = get_user_by_id(db, user_id)
+    assert_manager_can_edit_target(manager, target)
+
+    db.add(LeaveLedgerEntry(
+        user_id=target.id,
+        year=payload.year,
+        kind="adjustment",
+        days=payload.days,
+        note=payload.note,
+        created_by=manager.id,
+    ))
+    db.commit()
+    return user_balance(db, target.id, payload.year)
+
+
+@router.get("/leave/holidays", response_model=list[HolidayOut])
+def get_holidays(
+        year: Optional[int] = Query(None, ge=2000, le=2100),
+        _: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+):
+    year = _year(year)
+    return db.execute(
+        select(Holiday)
+        .where(Holiday.date >= date(year, 1, 1))
+        .where(Holiday.date < date(year + 1, 1, 1))
+        .order_by(Holiday.date)
+    ).scalars().all()
+
+
+@router.put("/leave/holidays", response_model=HolidayOut)
+def upsert_holiday(payload: HolidayIn, _: User = Depends(require_manager), db: Session = Depends(get_db)):
+    holiday = db.execute(select(Holiday).where(Holiday.date == payload.date)).scalar_one_or_none()
+    if holiday is None:
+        holiday = Holiday(date=payload.date)
+        db.add(holiday)
+    holiday.name = payload.name
+    db.commit()
+    db.refresh(holiday)
+    return holiday
+
+
+@router.delete("/leave/holidays/{holiday_date}", status_code=204)
+def delete_holiday(holiday_date: date, _: User = Depends(require_manager), db: Session = Depends(get_db)):
+    holiday = db.execute(select(Holiday).where(Holiday.date == holiday_date)).scalar_one_or_none()
+    if holiday is None:
+        raise HTTPException(status_code=404, detail="Holiday not found")
+    db.delete(holiday)
+    db.commit()
@@ -1,41 +1,74 @@
 from __future__ import annotations
 
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import or_, select, tuple_
 from sqlalchemy.orm import Session
 
+from ..config import settings
 from ..db.database import get_db
+from ..db.history import entries_as_of
+from ..db.models.department import DepartmentClosure
+from ..db.models.profile import EmployeeProfile
+from ..db.schedule_copy import copy_date_pairs, copy_work_entries
+from ..db.partitions import read_archived_entries
 from ..db.models.work_entry import WorkEntry
+from ..encoding import negotiated_response
+from ..jobs import JobContext, job_handler
+from ..labor_rules import DayChange, check_labor_rules, day_change
 from ..schemas import (
+    ScheduleBatchIn,
+    ScheduleBatchItemOut,
+    ScheduleBatchResultOut,
+    ScheduleCopyEmployeeIn,
+    ScheduleCopyPeriodIn,
     ScheduleDayUpsertIn,
     ScheduleEntryOut,
     ScheduleMonthOut,
+    ScheduleRangeOut,
     ScheduleRangeResultOut,
     ScheduleRangeUpsertIn,
+    ScheduleRollForwardIn,
+    ScheduleSpanOut,
 )
-from ..logger import log_schedule_change
+from ..logger import log_schedule_change, log_schedule_changes
 from ..db.models.user import User
 from ..dependencies import (
     assert_manager_can_edit_target,
+    check_version,
     get_current_user,
     get_user_by_id,
+    if_match_version,
+    managed_department_ids,
     month_bounds,
     require_manager,
+    version_etag,
 )
+from ..profiling import ProfiledRoute
 
-router = APIRouter(tags=["schedule"])
+router = APIRouter(tags=["schedule"], route_class=ProfiledRoute)
 
 
-def get_month_entries(db: Session, user_id: int, month: str) -> list[WorkEntry]:
-    first_day, next_month_first = month_bounds(month)
-    return (
+def get_range_entries(
+        db: Session,
+        user_id: int,
+        first_day: date,
+        end_exclusive: date,
+        as_of: Optional[datetime] = None,
+) -> list[WorkEntry]:
+    if as_of is not None:
+        return entries_as_of(db, user_id, first_day, end_exclusive, as_of)
+
+    # Один прохід по первинному ключу (user_id, date) у потрібних партиціях
+    archived = read_archived_entries(db, user_id, first_day, end_exclusive)
+    return archived + list(
         db.execute(
             select(WorkEntry)
             .where(WorkEntry.user_id == user_id)
             .where(WorkEntry.date >= first_day)
-            .where(WorkEntry.date < next_month_first)
+            .where(WorkEntry.date < end_exclusive)
             .order_by(WorkEntry.date.asc())
         )
         .scalars()
@@ -43,17 +76,90 @@ def get_month_entries(db: Session, user_id: int, month: str) -> list[WorkEntry]:
     )
 
 
+def get_month_entries(db: Session, user_id: int, month: str, as_of: Optional[datetime] = None) -> list[WorkEntry]:
+    first_day, next_month_first = month_bounds(month)
+    return get_range_entries(db, user_id, first_day, next_month_first, as_of)
+
+
+def collapse_entries(entries: list[WorkEntry]) -> list[ScheduleSpanOut]:
+    """Згортає послідовні дні з однаковим типом, часом і заголовком в один проміжок."""
+    spans: list[ScheduleSpanOut] = []
+    for e in entries:
+        last = spans[-1] if spans else None
+        if (
+            last is not None
+            and last.end_date + timedelta(days=1) == e.date
+            and (last.type, last.start_time, last.end_time, last.title) == (e.type, e.start_time, e.end_time, e.title)
+        ):
+            last.end_date = e.date
+            continue
+        spans.append(ScheduleSpanOut(
+            start_date=e.date,
+            end_date=e.date,
+            type=e.type,
+            start_time=e.start_time,
+            end_time=e.end_time,
+            title=e.title,
+        ))
+    return spans
+
+
+def range_response(
+        request: Request,
+        db: Session,
+        user_id: int,
+        start_date: date,
+        end_date: date,
+        compact: bool,
+        as_of: Optional[datetime] = None,
+):
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="from must be <= to")
+    if (end_date - start_date).days + 1 > settings.SCHEDULE_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {settings.SCHEDULE_MAX_RANGE_DAYS} days")
+
+    entries = get_range_entries(db, user_id, start_date, end_date + timedelta(days=1), as_of)
+    if compact:
+        out = ScheduleRangeOut(start_date=start_date, end_date=end_date, spans=collapse_entries(entries))
+        return negotiated_response(request, out, rows_key="spans")
+
+    out = ScheduleRangeOut(start_date=start_date, end_date=end_date, entries=entries)
+    return negotiated_response(request, out, rows_key="entries")
+
+
+# Якщо заголовок не вказано, підставляємо українську назву типу
+DEFAULT_TITLES = {
+    "shift": "Зміна",
+    "off": "Вихідний",
+    "vacation": "Відпустка",
+    "sick": "Лікарняний",
+    "trip": "Відрядження",
+    "other": "Інше"
+}
+
+
+def fill_work_entry(entry: WorkEntry, payload) -> None:
+    """payload: будь-яка схема з полями type, start_time, end_time, title."""
+    entry.type = payload.type
+    entry.start_time = payload.start_time
+    entry.end_time = payload.end_time
+    entry.title = payload.title or DEFAULT_TITLES.get(payload.type, payload.type)
+
+
 def upsert_work_entry(
         db: Session,
         user_id: int,
         entry_date: date,
         payload: ScheduleDayUpsertIn,
+        expected_version: Optional[int] = None,
 ) -> tuple[WorkEntry, str]:
     entry = db.execute(
         select(WorkEntry)
         .where(WorkEntry.user_id == user_id)
         .where(WorkEntry.date == entry_date)
     ).scalar_one_or_none()
+    check_version(entry, expected_version)
+    check_labor_rules(db, [day_change(user_id, entry_date, payload)])
 
     if not entry:
         entry = WorkEntry(user_id=user_id, date=entry_date)
@@ -62,66 +168,84 @@ def upsert_work_entry(
     else:
         action = "оновлено"
 
-    entry.type = payload.type
-    entry.start_time = payload.start_time
-    entry.end_time = payload.end_time
-    
-    # Якщо заголовок не вказано, підставляємо українську назву типу
-    if not payload.title:
-        translations = {
-            "shift": "Зміна",
-            "off": "Вихідний",
-            "vacation": "Відпустка",
-            "sick": "Лікарняний",
-            "trip": "Відрядження",
-            "other": "Інше"
-        }
-        entry.title = translations.get(payload.type, payload.type)
-    else:
-        entry.title = payload.title
-
+    fill_work_entry(entry, payload)
     return entry, action
 
 
 @router.get("/schedule/me", response_model=ScheduleMonthOut)
 def get_my_month_schedule(
+        request: Request,
         month: str = Query(..., pattern=r"^\d{4}-\d{2}$"),
+        as_of: Optional[datetime] = None,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+):
+    entries = get_month_entries(db, current_user.id, month, as_of)
+    return negotiated_response(request, ScheduleMonthOut(month=month, entries=entries), rows_key="entries")
+
+
+@router.get("/schedule/me/range", response_model=ScheduleRangeOut)
+def get_my_schedule_for_range(
+        request: Request,
+        start_date: date = Query(..., alias="from"),
+        end_date: date = Query(..., alias="to"),
+        compact: bool = False,
+        as_of: Optional[datetime] = None,
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db),
 ):
-    entries = get_month_entries(db, current_user.id, month)
-    return ScheduleMonthOut(month=month, entries=entries)
+    return range_response(request, db, current_user.id, start_date, end_date, compact, as_of)
+
+
+@router.get("/schedule/{user_id}/range", response_model=ScheduleRangeOut)
+def get_user_schedule_for_range(
+        user_id: int,
+        request: Request,
+        start_date: date = Query(..., alias="from"),
+        end_date: date = Query(..., alias="to"),
+        compact: bool = False,
+        as_of: Optional[datetime] = None,
+        _: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    user = get_user_by_id(db, user_id)
+    return range_response(request, db, user.id, start_date, end_date, compact, as_of)
 
 
 @router.get("/schedule/{user_id}", response_model=ScheduleMonthOut)
 def get_user_schedule_for_month(
         user_id: int,
+        request: Request,
         month: str = Query(..., pattern=r"^\d{4}-\d{2}$"),
+        as_of: Optional[datetime] = None,
         _: User = Depends(require_manager),
         db: Session = Depends(get_db),
 ):
     user = get_user_by_id(db, user_id)
-    entries = get_month_entries(db, user.id, month)
-    return ScheduleMonthOut(month=month, entries=entries)
+    entries = get_month_entries(db, user.id, month, as_of)
+    return negotiated_response(request, ScheduleMonthOut(month=month, entries=entries), rows_key="entries")
 
 
 @router.put("/schedule/day/me", response_model=ScheduleEntryOut)
 def add_my_schedule_for_day(
         payload: ScheduleDayUpsertIn,
+        response: Response,
+        expected_version: Optional[int] = Depends(if_match_version),
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db),
 ):
-    entry, action = upsert_work_entry(db, current_user.id, payload.date, payload)
-    db.commit()
-    db.refresh(entry)
-
+    entry, action = upsert_work_entry(db, current_user.id, payload.date, payload, expected_version)
     log_schedule_change(
+        db,
         author=current_user,
         target_user=current_user,
         date=str(payload.date),
         action=action,
         details=f"Тип: {payload.type}, Час: {payload.start_time}-{payload.end_time}, Заголовок: {payload.title}"
     )
+    db.commit()
+    db.refresh(entry)
+    response.headers["ETag"] = version_etag(entry)
 
     return entry
 
@@ -130,51 +254,76 @@ def add_my_schedule_for_day(
 def add_user_schedule_for_day(
         user_id: int,
         payload: ScheduleDayUpsertIn,
+        response: Response,
+        expected_version: Optional[int] = Depends(if_match_version),
         manager: User = Depends(require_manager),
         db: Session = Depends(get_db),
 ):
     target = get_user_by_id(db, user_id)
     assert_manager_can_edit_target(manager, target)
 
-    entry, action = upsert_work_entry(db, target.id, payload.date, payload)
-    db.commit()
-    db.refresh(entry)
-
+    entry, action = upsert_work_entry(db, target.id, payload.date, payload, expected_version)
     log_schedule_change(
+        db,
         author=manager,
         target_user=target,
         date=str(payload.date),
         action=action,
         details=f"Тип: {payload.type}, Час: {payload.start_time}-{payload.end_time}, Заголовок: {payload.title}"
     )
+    db.commit()
+    db.refresh(entry)
+    response.headers["ETag"] = version_etag(entry)
 
     return entry
 
 
-@router.put("/schedule/range/{user_id}", response_model=ScheduleRangeResultOut)
-def add_user_schedule_for_range(
-        user_id: int,
-        payload: ScheduleRangeUpsertIn,
-        manager: User = Depends(require_manager),
-        db: Session = Depends(get_db),
-):
-    target = get_user_by_id(db, user_id)
-    assert_manager_can_edit_target(manager, target)
-
-    dates = [
+def range_dates(payload: ScheduleRangeUpsertIn) -> list[date]:
+    return [
         cur for cur in (payload.start_date + timedelta(days=x) for x in range((payload.end_date - payload.start_date).days + 1))
         if payload.weekdays is None or cur.weekday() in payload.weekdays
     ]
 
+
+def range_day_changes(db: Session, user_id: int, dates: list[date], payload: ScheduleRangeUpsertIn) -> list[DayChange]:
+    """Дні, які змінить запис payload (без overwrite наявні дні лишаються як є)."""
     if not dates:
-        return ScheduleRangeResultOut(created=0, updated=0, skipped=0)
+        return []
+    if payload.overwrite:
+        return [day_change(user_id, d, payload) for d in dates]
+    existing = set(db.execute(
+        select(WorkEntry.date)
+        .where(WorkEntry.user_id == user_id)
+        .where(WorkEntry.date >= dates[0])
+        .where(WorkEntry.date <= dates[-1])
+    ).scalars())
+    return [day_change(user_id, d, payload) for d in dates if d not in existing]
+
+
+def upsert_range_entries(
+        db: Session,
+        user_id: int,
+        dates: list[date],
+        payload: ScheduleRangeUpsertIn,
+        check_rules: bool = True,
+) -> tuple[int, int, int]:
+    """
+    Записує payload на вказані дні без коміту. Повертає (created, updated, skipped).
+    check_rules=False - трудові норми вже перевірено для всього діапазону.
+    """
+    if not dates:
+        return 0, 0, 0
 
     existing = db.execute(
         select(WorkEntry)
-        .where(WorkEntry.user_id == target.id)
+        .where(WorkEntry.user_id == user_id)
         .where(WorkEntry.date.in_(dates))
     ).scalars().all()
     by_date = {e.date: e for e in existing}
+    if check_rules:
+        check_labor_rules(db, [
+            day_change(user_id, d, payload) for d in dates if payload.overwrite or d not in by_date
+        ])
 
     created = updated = skipped = 0
     to_add = []
@@ -188,46 +337,306 @@ def add_user_schedule_for_range(
                 continue
             updated += 1
         else:
-            entry = WorkEntry(user_id=target.id, date=d)
+            entry = WorkEntry(user_id=user_id, date=d)
             to_add.append(entry)
             created += 1
 
-        entry.type = payload.type
-        entry.start_time = payload.start_time
-        entry.end_time = payload.end_time
-        
-        # Якщо заголовок не вказано, підставляємо українську назву типу
-        if not payload.title:
-            translations = {
-                "shift": "Зміна",
-                "off": "Вихідний",
-                "vacation": "Відпустка",
-                "sick": "Лікарняний",
-                "trip": "Відрядження",
-                "other": "Інше"
-            }
-            entry.title = translations.get(payload.type, payload.type)
-        else:
-            entry.title = payload.title
+        fill_work_entry(entry, payload)
 
     if to_add:
         db.add_all(to_add)
-    db.commit()
 
+    return created, updated, skipped
+
+
+def log_range_change(
+        db: Session,
+        manager: User,
+        target: User,
+        payload: ScheduleRangeUpsertIn,
+        dates: list[date],
+        created: int,
+        updated: int,
+        skipped: int,
+) -> None:
     log_schedule_change(
+        db,
         author=manager,
         target_user=target,
-        date=f"{payload.start_date} - {payload.end_date}",
+        date=f"{dates[0]} - {dates[-1]}",
         action="оновлення діапазону",
         details=f"Створено: {created}, Оновлено: {updated}, Пропущено: {skipped}. Тип: {payload.type}, Час: {payload.start_time}-{payload.end_time}"
     )
 
+
+@job_handler("schedule_range")
+def run_schedule_range_job(ctx: JobContext, db: Session, params: dict) -> dict:
+    """Той самий запис діапазону, але порціями по JOB_CHUNK_DAYS днів з комітом і прогресом після кожної."""
+    manager = get_user_by_id(db, ctx.user_id)
+    target = get_user_by_id(db, params["user_id"])
+    assert_manager_can_edit_target(manager, target)
+
+    payload = ScheduleRangeUpsertIn.model_validate(params["payload"])
+    dates = range_dates(payload)
+    chunk = settings.JOB_CHUNK_DAYS
+
+    # Норми перевіряємо для всього діапазону до першої порції: інакше порушення
+    # в пізній порції виявилось би вже після коміту попередніх
+    check_labor_rules(db, range_day_changes(db, target.id, dates, payload))
+
+    created = updated = skipped = 0
+    for i in range(0, len(dates), chunk):
+        part = dates[i:i + chunk]
+        c, u, s = upsert_range_entries(db, target.id, part, payload, check_rules=False)
+        # Запис у журнал комітиться разом з порцією, тож і при скасуванні в лозі рівно те, що записано
+        log_range_change(db, manager, target, payload, part, c, u, s)
+        db.commit()
+        created, updated, skipped = created + c, updated + u, skipped + s
+        ctx.progress(min(i + chunk, len(dates)), len(dates))
+
+    return {"created": created, "updated": updated, "skipped": skipped}
+
+
+@router.put("/schedule/range/{user_id}", response_model=ScheduleRangeResultOut)
+def add_user_schedule_for_range(
+        user_id: int,
+        payload: ScheduleRangeUpsertIn,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    target = get_user_by_id(db, user_id)
+    assert_manager_can_edit_target(manager, target)
+
+    dates = range_dates(payload)
+    if not dates:
+        return ScheduleRangeResultOut(created=0, updated=0, skipped=0)
+
+    created, updated, skipped = upsert_range_entries(db, target.id, dates, payload)
+    log_range_change(db, manager, target, payload, dates, created, updated, skipped)
+    db.commit()
+
     return ScheduleRangeResultOut(created=created, updated=updated, skipped=skipped)
 
 
+@router.post("/schedule/batch", response_model=ScheduleBatchResultOut)
+def apply_schedule_batch(
+        payload: ScheduleBatchIn,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+):
+    """
+    Застосовує набір змін по днях (різні дати, типи і навіть працівники)
+    в одній транзакції: одна перевірка прав, одне читання наявних записів,
+    один коміт і один запис у лог.
+    """
+    target_ids = {item.user_id or current_user.id for item in payload.items}
+
+    if current_user.role != "manager" and target_ids != {current_user.id}:
+        raise HTTPException(status_code=403, detail="Manager role required")
+
+    targets = {
+        u.id: u
+        for u in db.execute(select(User).where(User.id.in_(target_ids))).scalars()
+    }
+    missing = target_ids - targets.keys()
+    if missing:
+        raise HTTPException(status_code=404, detail=f"User not found: {sorted(missing)}")
+    for target in targets.values():
+        if target.id != current_user.id:
+            assert_manager_can_edit_target(current_user, target)
+
+    # Для кожного дня діє останній елемент пакета
+    last_index: dict[tuple[int, date], int] = {}
+    for i, item in enumerate(payload.items):
+        last_index[(item.user_id or current_user.id, item.date)] = i
+
+    existing = db.execute(
+        select(WorkEntry)
+        .where(tuple_(WorkEntry.user_id, WorkEntry.date).in_(list(last_index)))
+    ).scalars().all()
+    by_key = {(e.user_id, e.date): e for e in existing}
+
+    # Версії перевіряються до будь-яких змін: пакет застосовується або весь, або ніяк
+    conflicts = [
+        {"index": i, "user_id": key[0], "date": key[1].isoformat()}
+        for key, i in last_index.items()
+        if payload.items[i].version is not None
+        and (by_key[key].version if key in by_key else 0) != payload.items[i].version
+    ]
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail={"message": "Records were modified by someone else", "conflicts": conflicts},
+        )
+    check_labor_rules(db, [
+        day_change(key[0], key[1], payload.items[i] if payload.items[i].op == "upsert" else None)
+        for key, i in last_index.items()
+    ])
+
+    results = []
+    log_items = []
+    to_add = []
+
+    for i, item in enumerate(payload.items):
+        key = (item.user_id or current_user.id, item.date)
+        if last_index[key] != i:
+            results.append(ScheduleBatchItemOut(index=i, user_id=key[0], date=item.date, result="superseded"))
+            continue
+
+        entry = by_key.get(key)
+        target = targets[key[0]]
+
+        if item.op == "delete":
+            if not entry:
+                result = "unchanged"
+            else:
+                db.delete(entry)
+                result = "deleted"
+                log_items.append((target, str(item.date), "видалено", "Видалено запис у розкладі (пакетно)"))
+        else:
+            if entry:
+                result = "updated"
+            else:
+                entry = WorkEntry(user_id=target.id, date=item.date)
+                to_add.append(entry)
+                result = "created"
+            fill_work_entry(entry, item)
+            log_items.append((
+                target,
+                str(item.date),
+                "створено" if result == "created" else "оновлено",
+                f"Тип: {item.type}, Час: {item.start_time}-{item.end_time}, Заголовок: {item.title}",
+            ))
+
+        results.append(ScheduleBatchItemOut(index=i, user_id=key[0], date=item.date, result=result))
+
+    if to_add:
+        db.add_all(to_add)
+    log_schedule_changes(db, current_user, log_items)
+    db.commit()
+
+    return ScheduleBatchResultOut(items=results)
+
+
+def copy_targets(db: Session, manager: User, user_ids: Optional[list[int]], department_id: Optional[int]):
+    """Підзапит з id працівників, чий розклад змінює копіювання, з тими ж перевірками прав, що й для одного працівника."""
+    if department_id is not None:
+        managed = db.execute(managed_department_ids(manager.id)).scalars().all()
+        if department_id not in managed:
+            raise HTTPException(status_code=403, detail="You can only copy schedules of your departments")
+        return (
+            select(User.id)
+            .join(EmployeeProfile, EmployeeProfile.email == User.email)
+            .where(EmployeeProfile.department_id.in_(
+                select(DepartmentClosure.descendant_id).where(DepartmentClosure.ancestor_id == department_id)
+            ))
+            .where(or_(User.role != "manager", User.id == manager.id))
+        )
+
+    targets = db.execute(select(User).where(User.id.in_(user_ids))).scalars().all()
+    missing = set(user_ids) - {u.id for u in targets}
+    if missing:
+        raise HTTPException(status_code=404, detail=f"User not found: {sorted(missing)}")
+    for target in targets:
+        assert_manager_can_edit_target(manager, target)
+    return select(User.id).where(User.id.in_(user_ids))
+
+
+def date_pairs(*args, **kwargs) -> list[tuple[date, date]]:
+    """copy_date_pairs з помилкою завеликого вікна як HTTP 400."""
+    try:
+        return copy_date_pairs(*args, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def run_copy(
+        db: Session,
+        manager: User,
+        pairs: list[tuple[date, date]],
+        source_user_ids,
+        target_user_ids=None,
+        overwrite: bool = True,
+        action: str = "копіювання розкладу",
+) -> ScheduleRangeResultOut:
+    """Копіювання, запис у журнал (по рядку на працівника) і коміт."""
+    rows, skipped = copy_work_entries(db, pairs, source_user_ids, target_user_ids, overwrite)
+    # Перевіряємо вже записаний стан; при порушеннях транзакція відкочується без коміту
+    check_labor_rules(db, [DayChange(r.user_id, r.date, r.start_time, r.end_time) for r in rows])
+
+    per_user: dict[int, list[int]] = {}
+    for r in rows:
+        per_user.setdefault(r.user_id, [0, 0])[0 if r.version == 1 else 1] += 1
+    users = {u.id: u for u in db.execute(select(User).where(User.id.in_(per_user))).scalars()}
+    first, last = min(t for t, _ in pairs), max(t for t, _ in pairs)
+    log_schedule_changes(db, manager, [
+        (users[user_id], f"{first} - {last}", action, f"Створено: {c}, Оновлено: {u}")
+        for user_id, (c, u) in per_user.items()
+    ])
+    db.commit()
+
+    created = sum(c for c, _ in per_user.values())
+    return ScheduleRangeResultOut(created=created, updated=len(rows) - created, skipped=skipped)
+
+
+@router.post("/schedule/copy/period", response_model=ScheduleRangeResultOut)
+def copy_schedule_period(
+        payload: ScheduleCopyPeriodIn,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    """
+    Копіює розклад працівників (або всього підрозділу з підпідрозділами)
+    з одного періоду в інший одним запитом у БД. Дні, порожні в джерелі,
+    у цільовому періоді не змінюються.
+    """
+    users = copy_targets(db, manager, payload.user_ids, payload.department_id)
+    target_end = payload.target_end or payload.target_start + (payload.source_end - payload.source_start)
+    pairs = date_pairs(
+        payload.source_start, payload.source_end, payload.target_start, target_end, payload.align_weekdays
+    )
+    return run_copy(db, manager, pairs, users, overwrite=payload.overwrite)
+
+
+@router.post("/schedule/copy/employee", response_model=ScheduleRangeResultOut)
+def copy_schedule_to_employees(
+        payload: ScheduleCopyEmployeeIn,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    """Розклад одного працівника за період - іншим працівникам."""
+    get_user_by_id(db, payload.source_user_id)
+    targets = copy_targets(db, manager, payload.target_user_ids, None)
+    target_start = payload.target_start or payload.start_date
+    pairs = date_pairs(
+        payload.start_date, payload.end_date,
+        target_start, target_start + (payload.end_date - payload.start_date),
+        align_weekdays=False,
+    )
+    source = select(User.id).where(User.id == payload.source_user_id)
+    return run_copy(db, manager, pairs, source, targets, payload.overwrite)
+
+
+@router.post("/schedule/roll-forward", response_model=ScheduleRangeResultOut)
+def roll_schedule_forward(
+        payload: ScheduleRollForwardIn,
+        manager: User = Depends(require_manager),
+        db: Session = Depends(get_db),
+):
+    """Повторює шаблон із цілих тижнів на наступні weeks тижнів."""
+    users = copy_targets(db, manager, payload.user_ids, payload.department_id)
+    target_start = payload.source_end + timedelta(days=1)
+    pairs = date_pairs(
+        payload.source_start, payload.source_end,
+        target_start, target_start + timedelta(weeks=payload.weeks, days=-1),
+    )
+    return run_copy(db, manager, pairs, users, overwrite=payload.overwrite, action="продовження шаблону розкладу")
+
+
 @router.delete("/schedule/delete/me")
 def delete_my_schedule_for_day(
         date_str: str = Query(..., alias="date", pattern=r"^\d{4}-\d{2}-\d{2}$"),
+        expected_version: Optional[int] = Depends(if_match_version),
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db),
 ):
@@ -242,20 +651,21 @@ def delete_my_schedule_for_day(
         )
         .scalar_one_or_none()
     )
+    check_version(entry, expected_version)
 
     if not entry:
         return {"ok": True}
 
     db.delete(entry)
-    db.commit()
-
     log_schedule_change(
+        db,
         author=current_user,
         target_user=current_user,
         date=str(day),
         action="видалено",
         details="Видалено запис у розкладі"
     )
+    db.commit()
 
     return {"ok": True}
 
@@ -264,6 +674,7 @@ def delete_my_schedule_for_day(
 def delete_user_schedule_for_day(
         user_id: int,
         date_str: str = Query(..., alias="date", pattern=r"^\d{4}-\d{2}-\d{2}$"),
+        expected_version: Optional[int] = Depends(if_match_version),
         manager: User = Depends(require_manager),
         db: Session = Depends(get_db),
 ):
@@ -281,19 +692,20 @@ def delete_user_schedule_for_day(
         )
         .scalar_one_or_none()
     )
+    check_version(entry, expected_version)
 
     if not entry:
         return {"ok": True}
 
     db.delete(entry)
-    db.commit()
-
     log_schedule_change(
+        db,
         author=manager,
         target_user=target,
         date=str(day),
         action="видалено",
         details="Видалено запис у розкладі менеджером"
     )
+    db.commit()
 
     return {"ok": True}
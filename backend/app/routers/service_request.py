@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session, joinedload
 
 from ..db.database import get_db
@@ -10,12 +12,27 @@ from ..db.models.service_request import ServiceRequest
 from ..db.models.work_entry import WorkEntry
 from ..db.models.user import User
 from ..db.models.profile import EmployeeProfile
-from ..db.models.department import Department
+from ..db.models.department import DepartmentClosure
+from ..db.absences import add_pending_absence, drop_pending_absence, refresh_absences
+from ..db.changes import record_changes, service_request_change
+from ..events import event_from_change, queue_events
 from ..schemas import ServiceRequestCreateIn, ServiceRequestOut, ServiceRequestUpdateStatusIn
-from ..dependencies import get_current_user, require_manager
+from ..dependencies import (
+    check_version,
+    get_current_user,
+    get_user_by_id,
+    if_match_version,
+    managed_department_ids,
+    require_manager,
+    version_etag,
+)
+from ..encoding import negotiated_response
+from ..jobs import JobContext, job_handler
+from ..leave import debit_vacation
 from ..logger import log_schedule_change
+from ..profiling import ProfiledRoute
 
-router = APIRouter(tags=["service_requests"])
+router = APIRouter(tags=["service_requests"], route_class=ProfiledRoute)
 
 def apply_request_to_schedule(db: Session, req: ServiceRequest, manager: User):
     dates = [
@@ -52,8 +69,12 @@ def apply_request_to_schedule(db: Session, req: ServiceRequest, manager: User):
 
     if to_add:
         db.add_all(to_add)
+    # Дні, які вже мали той самий тип, flush не торкається - перебудовуємо проміжки явно
+    db.flush()
+    refresh_absences(db.connection(), req.tenant_id, req.user_id, req.start_date, req.end_date)
 
     log_schedule_change(
+        db,
         author=manager,
         target_user=req.user,
         date=f"{req.start_date} - {req.end_date}",
@@ -78,17 +99,19 @@ def create_service_request(
     )
     db.add(req)
     db.flush()
-    
+    add_pending_absence(db, req)
+
     db.commit()
     db.refresh(req)
     return req
 
 @router.get("/service-requests/me", response_model=list[ServiceRequestOut])
 def get_my_service_requests(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return (
+    rows = (
         db.execute(
             select(ServiceRequest)
             .where(ServiceRequest.user_id == current_user.id)
@@ -98,39 +121,72 @@ def get_my_service_requests(
         .scalars()
         .all()
     )
+    return negotiated_response(request, [ServiceRequestOut.model_validate(r) for r in rows])
 
 @router.get("/service-requests", response_model=list[ServiceRequestOut])
 def get_all_service_requests(
+    request: Request,
     manager: User = Depends(require_manager),
     db: Session = Depends(get_db)
 ):
-    managed_depts = db.execute(
-        select(Department.id).where(Department.manager_user_id == manager.id)
-    ).scalars().all()
-
-    if not managed_depts:
-        return []
-
-    return (
+    rows = (
         db.execute(
             select(ServiceRequest)
             .join(User, ServiceRequest.user_id == User.id)
             .join(EmployeeProfile, User.email == EmployeeProfile.email)
-            .where(EmployeeProfile.department_id.in_(managed_depts))
+            .where(EmployeeProfile.department_id.in_(managed_department_ids(manager.id)))
             .options(joinedload(ServiceRequest.user).joinedload(User.profile))
             .order_by(ServiceRequest.created_at.desc())
         )
         .scalars()
         .all()
     )
+    return negotiated_response(request, [ServiceRequestOut.model_validate(r) for r in rows])
 
-@router.patch("/service-requests/{request_id}", response_model=ServiceRequestOut)
-def update_service_request_status(
-    request_id: int,
-    payload: ServiceRequestUpdateStatusIn,
-    manager: User = Depends(require_manager),
-    db: Session = Depends(get_db)
-):
+def claim_pending_request(db: Session, req: ServiceRequest, new_status: str, skip_locked: bool = False) -> None:
+    """
+    Атомарно переводить заявку з pending у new_status умовним UPDATE.
+    Менеджери не серіалізуються на SELECT ... FOR UPDATE: з двох одночасних
+    рішень по одній заявці рядок оновить лише перше, друге отримає 0 рядків
+    і 409, тож заявка не потрапить у розклад і баланс відпусток двічі.
+    """
+    if skip_locked:
+        # Пакетна обробка не чекає на заявки, які саме обробляє інший менеджер
+        free = db.execute(
+            select(ServiceRequest.id)
+            .where(ServiceRequest.id == req.id)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        if free is None:
+            raise HTTPException(status_code=409, detail="Request is being processed by another manager")
+
+    claimed = db.execute(
+        update(ServiceRequest)
+        .where(ServiceRequest.id == req.id)
+        .where(ServiceRequest.status == "pending")
+        .values(status=new_status, version=ServiceRequest.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Request was processed by another manager")
+
+    db.expire(req, ["status", "version", "updated_at"])
+    drop_pending_absence(db, req.id)
+    # UPDATE оминає after_flush, тож журнал змін і подію записуємо явно
+    change = service_request_change(req.id, req.user_id, "upsert")
+    record_changes(db.connection(), [change])
+    queue_events(db, [event_from_change(change)])
+
+
+def set_request_status(
+        db: Session,
+        request_id: int,
+        new_status: str,
+        manager: User,
+        expected_version: Optional[int] = None,
+        skip_locked: bool = False,
+) -> ServiceRequest:
+    """Перевіряє права менеджера і змінює статус заявки без коміту."""
     req = (
         db.execute(
             select(ServiceRequest)
@@ -142,28 +198,62 @@ def update_service_request_status(
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
     
-    managed_depts = db.execute(
-        select(Department.id).where(Department.manager_user_id == manager.id)
-    ).scalars().all()
-    
     user_dept_id = None
     if req.user and req.user.profile:
         user_dept_id = req.user.profile.department_id
-    
-    if user_dept_id not in managed_depts:
+
+    in_scope = user_dept_id is not None and db.execute(
+        managed_department_ids(manager.id).where(DepartmentClosure.descendant_id == user_dept_id).limit(1)
+    ).first() is not None
+    if not in_scope:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="Ви не можете керувати заявками працівників інших підрозділів"
         )
 
+    check_version(req, expected_version)
     if req.status != "pending":
         raise HTTPException(status_code=400, detail="Request is already processed")
 
-    req.status = payload.status
-    
-    if payload.status == "approved":
+    claim_pending_request(db, req, new_status, skip_locked=skip_locked)
+
+    if new_status == "approved":
+        debit_vacation(db, req, manager)
         apply_request_to_schedule(db, req, manager)
 
+    return req
+
+@job_handler("service_request_status")
+def run_request_status_job(ctx: JobContext, db: Session, params: dict) -> dict:
+    manager = get_user_by_id(db, ctx.user_id)
+    ids = params["request_ids"]
+    items = []
+
+    for i, request_id in enumerate(ids, 1):
+        try:
+            set_request_status(db, request_id, params["status"], manager, skip_locked=True)
+            db.commit()
+            items.append({"id": request_id, "ok": True})
+        except HTTPException as e:
+            db.rollback()
+            items.append({"id": request_id, "ok": False, "detail": e.detail})
+
+        if i % 20 == 0 or i == len(ids):
+            ctx.progress(i, len(ids))
+
+    return {"items": items}
+
+@router.patch("/service-requests/{request_id}", response_model=ServiceRequestOut)
+def update_service_request_status(
+    request_id: int,
+    payload: ServiceRequestUpdateStatusIn,
+    response: Response,
+    expected_version: Optional[int] = Depends(if_match_version),
+    manager: User = Depends(require_manager),
+    db: Session = Depends(get_db)
+):
+    req = set_request_status(db, request_id, payload.status, manager, expected_version)
     db.commit()
     db.refresh(req)
+    response.headers["ETag"] = version_etag(req)
     return req
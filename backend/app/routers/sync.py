@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session, joinedload
+
+from ..db.changes import SERVICE_REQUEST, WORK_ENTRY
+from ..db.database import get_db
+from ..db.models.change_log import ChangeLogEntry
+from ..db.models.service_request import ServiceRequest
+from ..db.models.user import User
+from ..db.models.work_entry import WorkEntry
+from ..dependencies import get_current_user, visible_user_filter
+from ..encoding import negotiated_response
+from ..schemas import (
+    ServiceRequestOut,
+    SyncDeletedWorkEntryOut,
+    SyncOut,
+    SyncWorkEntryOut,
+)
+from ..profiling import ProfiledRoute
+
+router = APIRouter(tags=["sync"], route_class=ProfiledRoute)
+
+
+def parse_cursor(since: str) -> tuple[int, int]:
+    """Курсор "txid:id"; "0" - з початку журналу (-1 - перед першим txid)."""
+    txid, sep, change_id = since.partition(":")
+    try:
+        if not sep:
+            # Старі числові курсори (id без txid) не впорядковані за комітом - синхронізуємо заново
+            int(txid)
+            return -1, 0
+        cursor = int(txid), int(change_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+    if min(cursor) < 0:
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+    return cursor
+
+
+def format_cursor(txid: int, change_id: int) -> str:
+    return f"{txid}:{change_id}"
+
+
+def committed_changes(db: Session, cursor: tuple[int, int], user_filter, limit: int) -> list[ChangeLogEntry]:
+    """
+    Зміни після курсора в порядку комітів.
+
+    id видаються при INSERT, тож транзакція, що почалась раніше, може
+    закомітити менший id уже після того, як клієнт отримав більший. Тому в
+    PostgreSQL віддаємо лише зміни транзакцій, старших за xmin поточного
+    знімка: усі вони вже завершені, а нові отримають більший txid.
+    Порядок (txid, id) стабільний - курсор нічого не пропускає.
+    """
+    stmt = (
+        select(ChangeLogEntry)
+        .where(tuple_(ChangeLogEntry.txid, ChangeLogEntry.id) > tuple_(*cursor))
+        .where(user_filter)
+        .order_by(ChangeLogEntry.txid.asc(), ChangeLogEntry.id.asc())
+        .limit(limit)
+    )
+    if db.connection().dialect.name == "postgresql":
+        # Той самий запит - той самий знімок, що й для читання змін
+        stmt = stmt.where(ChangeLogEntry.txid < func.txid_snapshot_xmin(func.txid_current_snapshot()))
+    return db.execute(stmt).scalars().all()
+
+
+@router.get("/sync", response_model=SyncOut)
+def sync_changes(
+        request: Request,
+        since: str = Query("0", max_length=64),
+        limit: int = Query(1000, ge=1, le=5000),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+):
+    # Індекс (user_id, txid, id) дозволяє читати лише зміни видимих користувачів після курсора
+    start = parse_cursor(since)
+    changes = committed_changes(db, start, visible_user_filter(ChangeLogEntry.user_id, current_user), limit + 1)
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    cursor = since
+    if changes:
+        cursor = format_cursor(changes[-1].txid, changes[-1].id)
+
+    # Для кожного запису лишається тільки остання зміна
+    entry_ops: dict[tuple[int, object], str] = {}
+    request_ops: dict[int, str] = {}
+    for ch in changes:
+        if ch.entity == WORK_ENTRY:
+            entry_ops[(ch.user_id, ch.date)] = ch.op
+        elif ch.entity == SERVICE_REQUEST:
+            request_ops[ch.entity_id] = ch.op
+
+    upserted_keys = [key for key, op in entry_ops.items() if op == "upsert"]
+    entries = []
+    if upserted_keys:
+        entries = (
+            db.execute(
+                select(WorkEntry)
+                .where(tuple_(WorkEntry.user_id, WorkEntry.date).in_(upserted_keys))
+                .order_by(WorkEntry.user_id.asc(), WorkEntry.date.asc())
+            )
+            .scalars()
+            .all()
+        )
+    found_keys = {(e.user_id, e.date) for e in entries}
+    deleted_entries = [
+        SyncDeletedWorkEntryOut(user_id=user_id, date=d)
+        for (user_id, d), op in entry_ops.items()
+        if op == "delete" or (user_id, d) not in found_keys
+    ]
+
+    upserted_ids = [rid for rid, op in request_ops.items() if op == "upsert"]
+    requests = []
+    if upserted_ids:
+        requests = (
+            db.execute(
+                select(ServiceRequest)
+                .where(ServiceRequest.id.in_(upserted_ids))
+                .options(joinedload(ServiceRequest.user).joinedload(User.profile))
+                .order_by(ServiceRequest.id.asc())
+            )
+            .scalars()
+            .all()
+        )
+    found_ids = {r.id for r in requests}
+    deleted_requests = [rid for rid, op in request_ops.items() if op == "delete" or rid not in found_ids]
+
+    out = SyncOut(
+        cursor=cursor,
+        has_more=has_more,
+        work_entries=[SyncWorkEntryOut.model_validate(e) for e in entries],
+        deleted_work_entries=deleted_entries,
+        service_requests=[ServiceRequestOut.model_validate(r) for r in requests],
+        deleted_service_requests=deleted_requests,
+    )
+    return negotiated_response(request, out, rows_key="work_entries")
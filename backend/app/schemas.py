@@ -47,10 +47,42 @@ class ProfileOut(BaseModel):
 
     department_id: Optional[int] = None
     department_name: Optional[str] = None
+    # Для If-Match при наступному оновленні; None - профілю ще немає
+    version: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class EmployeeImportErrorOut(BaseModel):
+    row: int
+    email: Optional[str] = None
+    errors: list[str]
+
+class EmployeeImportUserOut(BaseModel):
+    row: int
+    user_id: int
+    email: str
+
+class EmployeeImportOut(BaseModel):
+    dry_run: bool
+    total: int
+    valid: int
+    created: int
+    users: list[EmployeeImportUserOut]
+    errors: list[EmployeeImportErrorOut]
+
+class EmployeeSearchItemOut(BaseModel):
+    user_id: int
+    email: str
+    full_name: Optional[str] = None
+    employee_number: Optional[str] = None
+    position: Optional[str] = None
+    department_id: Optional[int] = None
+
+class EmployeeSearchOut(BaseModel):
+    items: list[EmployeeSearchItemOut]
+    next_cursor: Optional[str] = None
+
 # ------------------------------
 # --------| DEPARTMENT |--------
 # ------------------------------
@@ -59,6 +91,7 @@ class DepartmentOut(BaseModel):
     id: int
     name: str
     manager_user_id: Optional[int] = None
+    parent_id: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -67,18 +100,33 @@ class DepartmentEmployeeOut(BaseModel):
     user_id: int
     email: str
     full_name: Optional[str] = None
+    department_id: Optional[int] = None
 
 class DepartmentCreateIn(BaseModel):
     name: str = Field(min_length=2, max_length=128)
     manager_user_id: Optional[int] = None
+    parent_id: Optional[int] = None
 
 class DepartmentUpdateIn(BaseModel):
     name: Optional[str] = Field(default=None, min_length=2, max_length=128)
     manager_user_id: Optional[int] = None
+    # null - перенести підрозділ у корінь
+    parent_id: Optional[int] = None
 
 class AssignEmployeeDepartmentIn(BaseModel):
     department_id: Optional[int] = None
 
+class DepartmentCoverageOut(BaseModel):
+    department_id: int
+    month: str
+    headcount: int
+    # Стовпці counts: типи записів розкладу + "unscheduled" (без запису на цей день)
+    types: list[str]
+    days: list[date]
+    counts: list[list[int]]
+    # Кількість людей на зміні по годинах доби: hours[день][0..23]
+    hours: Optional[list[list[int]]] = None
+
 # --------------------------------
 # ----------| SCHEDULE |----------
 # --------------------------------
@@ -91,6 +139,8 @@ class ScheduleEntryOut(BaseModel):
     start_time: Optional[time] = None
     end_time: Optional[time] = None
     title: Optional[str] = None
+    # Для If-Match при наступному оновленні; у знімках as_of і архіві версії немає
+    version: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -99,6 +149,21 @@ class ScheduleMonthOut(BaseModel):
     month: str
     entries: list[ScheduleEntryOut]
 
+class ScheduleSpanOut(BaseModel):
+    start_date: date
+    end_date: date
+    type: EntryType
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    title: Optional[str] = None
+
+class ScheduleRangeOut(BaseModel):
+    start_date: date
+    end_date: date
+    # entries - по днях, spans - послідовні однакові дні згорнуті в один проміжок (compact=true)
+    entries: Optional[list[ScheduleEntryOut]] = None
+    spans: Optional[list[ScheduleSpanOut]] = None
+
 class ScheduleDayUpsertIn(BaseModel):
     date: date
     type: EntryType
@@ -174,6 +239,116 @@ class ScheduleRangeResultOut(BaseModel):
     updated: int
     skipped: int
 
+class ScheduleBatchItemIn(BaseModel):
+    op: Literal["upsert", "delete"] = "upsert"
+    user_id: Optional[int] = None # None - власний розклад
+    date: date
+    # Очікувана версія запису (як If-Match); 0 - запису ще не має бути
+    version: Optional[int] = Field(None, ge=0)
+    type: Optional[EntryType] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    title: Optional[str] = None
+
+    @field_validator("start_time", "end_time", mode="before")
+    @classmethod
+    def empty_string_to_none(cls, v):
+        if v is None:
+            return None
+        if isinstance(v, str) and v.strip() == "":
+            return None
+        return v
+
+    @model_validator(mode="after")
+    def validate_item(self):
+        if self.op == "delete":
+            return self
+
+        if self.type is None:
+            raise ValueError("upsert requires type")
+
+        if self.type == "shift":
+            if not self.start_time or not self.end_time:
+                raise ValueError("shift requires start_time and end_time")
+
+        if self.start_time and self.end_time and self.start_time >= self.end_time:
+            raise ValueError("start_time must be earlier than end_time")
+
+        return self
+
+class ScheduleBatchIn(BaseModel):
+    items: list[ScheduleBatchItemIn] = Field(min_length=1, max_length=1000)
+
+class ScheduleBatchItemOut(BaseModel):
+    index: int
+    user_id: int
+    date: date
+    # superseded - пізніший елемент пакета змінює той самий день
+    result: Literal["created", "updated", "deleted", "unchanged", "superseded"]
+
+class ScheduleBatchResultOut(BaseModel):
+    items: list[ScheduleBatchItemOut]
+
+class ScheduleCopyPeriodIn(BaseModel):
+    """Розклад працівників (user_ids або весь підрозділ) з періоду source у період target."""
+    source_start: date
+    source_end: date
+    target_start: date
+    target_end: Optional[date] = None # None - така ж довжина, як у джерела
+    user_ids: Optional[list[int]] = Field(None, min_length=1, max_length=1000)
+    department_id: Optional[int] = None
+    # Понеділок копіюється в понеділок: джерело повторюється цілими тижнями
+    align_weekdays: bool = True
+    overwrite: bool = True
+
+    @model_validator(mode="after")
+    def validate_copy(self):
+        if (self.user_ids is None) == (self.department_id is None):
+            raise ValueError("exactly one of user_ids and department_id is required")
+        if self.source_start > self.source_end:
+            raise ValueError("source_start must be <= source_end")
+        if self.target_end is not None and self.target_start > self.target_end:
+            raise ValueError("target_start must be <= target_end")
+        if self.align_weekdays and (self.source_end - self.source_start).days < 6:
+            raise ValueError("align_weekdays needs a source period of at least 7 days")
+        return self
+
+class ScheduleCopyEmployeeIn(BaseModel):
+    """Розклад одного працівника за період - іншим працівникам (з тими ж або зсунутими датами)."""
+    source_user_id: int
+    target_user_ids: list[int] = Field(min_length=1, max_length=1000)
+    start_date: date
+    end_date: date
+    target_start: Optional[date] = None # None - ті самі дати
+    overwrite: bool = True
+
+    @model_validator(mode="after")
+    def validate_copy(self):
+        if self.start_date > self.end_date:
+            raise ValueError("start_date must be <= end_date")
+        if self.source_user_id in self.target_user_ids:
+            raise ValueError("target_user_ids must not contain source_user_id")
+        return self
+
+class ScheduleRollForwardIn(BaseModel):
+    """Шаблон із цілих тижнів [source_start, source_end] повторюється на weeks тижнів після нього."""
+    source_start: date
+    source_end: date
+    weeks: int = Field(ge=1, le=52)
+    user_ids: Optional[list[int]] = Field(None, min_length=1, max_length=1000)
+    department_id: Optional[int] = None
+    overwrite: bool = True
+
+    @model_validator(mode="after")
+    def validate_pattern(self):
+        if (self.user_ids is None) == (self.department_id is None):
+            raise ValueError("exactly one of user_ids and department_id is required")
+        if self.source_start > self.source_end:
+            raise ValueError("source_start must be <= source_end")
+        if ((self.source_end - self.source_start).days + 1) % 7:
+            raise ValueError("source period must span whole weeks")
+        return self
+
 # --------------------------------
 # -------| SERVICE REQUEST |-------
 # --------------------------------
@@ -199,6 +374,7 @@ class ServiceRequestOut(BaseModel):
     end_date: date
     status: str
     created_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
@@ -213,4 +389,118 @@ class ServiceRequestOut(BaseModel):
         return data
 
 class ServiceRequestUpdateStatusIn(BaseModel):
-    status: Literal["approved", "rejected"]
\ No newline at end of file
+    status: Literal["approved", "rejected"]
+
+class ServiceRequestBatchStatusIn(BaseModel):
+    request_ids: list[int] = Field(min_length=1, max_length=5000)
+    status: Literal["approved", "rejected"]
+
+# --------------------------------
+# ------------| JOBS |------------
+# --------------------------------
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: float
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# --------------------------------
+# ------------| SYNC |------------
+# --------------------------------
+
+class SyncWorkEntryOut(ScheduleEntryOut):
+    user_id: int
+
+class SyncDeletedWorkEntryOut(BaseModel):
+    user_id: int
+    date: date
+
+class SyncOut(BaseModel):
+    # Непрозорий курсор "txid:id" - передається назад як since
+    cursor: str
+    has_more: bool
+    work_entries: list[SyncWorkEntryOut]
+    deleted_work_entries: list[SyncDeletedWorkEntryOut]
+    service_requests: list[ServiceRequestOut]
+    deleted_service_requests: list[int]
+
+# --------------------------------
+# ------------| LEAVE |-----------
+# --------------------------------
+
+class LeaveBalanceOut(BaseModel):
+    user_id: int
+    full_name: Optional[str] = None
+    department_id: Optional[int] = None
+    year: int
+    entitlement: float
+    adjustments: float
+    used: float
+    pending: float
+    balance: float
+    available: float
+
+class LeaveReportOut(BaseModel):
+    year: int
+    items: list[LeaveBalanceOut]
+
+class LeaveAdjustmentIn(BaseModel):
+    year: int = Field(ge=2000, le=2100)
+    days: float = Field(ge=-366, le=366)
+    note: Optional[str] = None
+
+    @field_validator("days")
+    @classmethod
+    def non_zero(cls, v: float) -> float:
+        if v == 0:
+            raise ValueError("days must not be 0")
+        return v
+
+class HolidayIn(BaseModel):
+    date: date
+    name: str = Field(min_length=1, max_length=200)
+
+class HolidayOut(BaseModel):
+    date: date
+    name: str
+
+    class Config:
+        from_attributes = True
+
+# --------------------------------
+# ----------| CALENDAR |----------
+# --------------------------------
+
+class CalendarFeedOut(BaseModel):
+    url: str
+    window_start: date
+    window_end: date
+
+# --------------------------------
+# ----------| ABSENCES |----------
+# --------------------------------
+
+class AbsenceOut(BaseModel):
+    user_id: int
+    full_name: Optional[str] = None
+    department_id: Optional[int] = None
+    start_date: date
+    end_date: date
+    type: str
+    source: Literal["request", "manual"]
+    status: Literal["approved", "pending"]
+    service_request_id: Optional[int] = None
+
+class AbsenceListOut(BaseModel):
+    date_from: date
+    date_to: date
+    items: list[AbsenceOut]
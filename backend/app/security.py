@@ -13,13 +13,14 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
 
-def create_access_token(*, sub: str, role: str, uid: int) -> str:
+def create_access_token(*, sub: str, role: str, uid: int, tid: str) -> str:
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MIN)
     payload = {
         "sub": sub,
         "role": role,
         "uid": uid,
+        "tid": tid,
         "iat": int(now.timestamp()),
         "exp": int(exp.timestamp()),
     }
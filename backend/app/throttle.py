@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol
+
+from starlette.requests import Request
+
+from .config import settings
+
+
+class ThrottleBackend(Protocol):
+    """
+    Сховище token bucket. Спільна реалізація (наприклад, на Redis або в БД)
+    дозволяє рахувати спроби для кількох воркерів разом.
+    """
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Забирає один токен. Повертає 0, якщо дозволено, інакше - секунди до наступного токена."""
+        ...
+
+    def reset(self, key: str) -> None: ...
+
+    def size(self) -> int: ...
+
+
+class InMemoryThrottleBackend:
+    """
+    Кошики в пам'яті процесу. Понад max_keys витісняється кошик, якого
+    найдовше не торкались (LRU), - за O(1) і незалежно від налаштувань
+    обмежувача, якому він належить.
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0 if allowed else (1 - tokens) / rate
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+def _trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(net, strict=False) for net in settings.TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """
+    IP клієнта для обмежень. За довіреним проксі (TRUSTED_PROXIES) береться
+    найправіша адреса X-Forwarded-For, що не належить довіреним проксі:
+    ліву частину заголовка клієнт може підробити.
+    """
+    host: Optional[str] = request.client.host if request.client else None
+    if host is None:
+        return "unknown"
+    if not _trusted(host):
+        return host
+    forwarded = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    for candidate in reversed(forwarded):
+        if not _trusted(candidate):
+            return candidate
+    return forwarded[0] if forwarded else host
+
+
+class LoginThrottle:
+    """
+    Обмеження спроб входу за акаунтом і за IP клієнта.
+    Перевіряється до пошуку користувача і bcrypt, тож вартість
+    відхиленої спроби не залежить від кількості атак.
+    """
+
+    def __init__(self, backend: ThrottleBackend) -> None:
+        self.backend = backend
+        self.allowed = 0
+        self.throttled_ip = 0
+        self.throttled_account = 0
+
+    def check(self, email: str, client_ip: str) -> float:
+        retry_after = self.backend.take(
+            f"ip:{client_ip}",
+            settings.LOGIN_IP_PER_MINUTE / 60,
+            settings.LOGIN_IP_BURST,
+        )
+        if retry_after:
+            self.throttled_ip += 1
+            return retry_after
+
+        retry_after = self.backend.take(
+            f"account:{email.lower()}",
+            settings.LOGIN_ACCOUNT_PER_MINUTE / 60,
+            settings.LOGIN_ACCOUNT_BURST,
+        )
+        if retry_after:
+            self.throttled_account += 1
+            return retry_after
+
+        self.allowed += 1
+        return 0.0
+
+    def succeeded(self, email: str) -> None:
+        self.backend.reset(f"account:{email.lower()}")
+
+    def stats(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "throttled_ip": self.throttled_ip,
+            "throttled_account": self.throttled_account,
+            "tracked_keys": self.backend.size(),
+        }
+
+
+login_throttle = LoginThrottle(InMemoryThrottleBackend())
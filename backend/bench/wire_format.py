@@ -0,0 +1,92 @@
+"""
+Порівняння розміру і часу кодування відповідей розкладу та заявок
+для різних форматів (JSON, колонковий JSON, MessagePack) і стиснення.
+
+Запуск з каталогу backend:
+    python -m bench.wire_format [--requests 200] [--repeat 200]
+"""
+import argparse
+import os
+import time
+from datetime import date, time as dtime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "bench")
+
+from app.encoding import (  # noqa: E402
+    MSGPACK_MEDIA_TYPE,
+    available_media_types,
+    brotli,
+    compress_body,
+    encode_body,
+)
+
+TITLES = {"shift": "Зміна", "off": "Вихідний", "vacation": "Відпустка"}
+
+
+def month_payload(month_start: date) -> dict:
+    entries = []
+    for i in range(31):
+        d = month_start + timedelta(days=i)
+        if d.month != month_start.month:
+            break
+        kind = "off" if d.weekday() >= 5 else ("vacation" if 10 <= d.day <= 20 else "shift")
+        entries.append({
+            "date": d.isoformat(),
+            "type": kind,
+            "start_time": dtime(9).isoformat() if kind == "shift" else None,
+            "end_time": dtime(18).isoformat() if kind == "shift" else None,
+            "title": TITLES[kind],
+        })
+    return {"month": month_start.strftime("%Y-%m"), "entries": entries}
+
+
+def requests_payload(count: int) -> list[dict]:
+    start = date(2026, 1, 5)
+    return [
+        {
+            "id": i,
+            "user_id": 1000 + i % 50,
+            "user_email": f"employee{i % 50}@example.com",
+            "user_full_name": f"Працівник {i % 50}",
+            "type": ("vacation", "sick", "off")[i % 3],
+            "start_date": (start + timedelta(days=i)).isoformat(),
+            "end_date": (start + timedelta(days=i + 4)).isoformat(),
+            "status": ("pending", "approved", "rejected")[i % 3],
+            "created_at": "2026-01-01T08:00:00+00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def measure(name: str, data, rows_key, repeat: int) -> None:
+    encodings = [None, "gzip"] + (["br"] if brotli is not None else [])
+    print(f"\n{name}")
+    print(f"{'format':<40}{'encoding':<10}{'bytes':>10}{'us/op':>12}")
+    for media_type in available_media_types():
+        for encoding in encodings:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                body = compress_body(encode_body(data, media_type, rows_key), encoding)
+            elapsed = (time.perf_counter() - started) / repeat * 1e6
+            print(f"{media_type:<40}{encoding or '-':<10}{len(body):>10}{elapsed:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    measure("GET /schedule/me (один місяць)", month_payload(date(2026, 3, 1)), "entries", args.repeat)
+    measure(f"GET /service-requests ({args.requests} заявок)", requests_payload(args.requests), None, args.repeat)
+
+    missing = {MSGPACK_MEDIA_TYPE} - set(available_media_types())
+    if missing:
+        print(f"\nпропущено (не встановлено msgpack): {', '.join(missing)}")
+    if brotli is None:
+        print("пропущено br (не встановлено brotli)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# Налаштування без .env: тести самі створюють потрібні з'єднання. Без
+# TEST_DATABASE_URL застосунок працює з тимчасовою базою SQLite
+os.environ.setdefault(
+    "DATABASE_URL",
+    os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp(prefix='hrm-tests-')}/hrm.db",
+)
+os.environ.setdefault("JWT_SECRET", "test-secret")
+# Фоновий диспетчер outbox тестам не потрібен
+os.environ.setdefault("OUTBOX_DISPATCHER_ENABLED", "false")
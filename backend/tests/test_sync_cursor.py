@@ -0,0 +1,73 @@
+"""
+Курсор /sync не повинен пропускати зміни транзакцій, що закомітились не в
+порядку своїх id. Потрібен PostgreSQL: TEST_DATABASE_URL=postgresql://...
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine, true
+from sqlalchemy.orm import Session
+
+from app.db.changes import record_changes, service_request_change
+from app.db.models.change_log import ChangeLogEntry
+from app.routers.sync import committed_changes, parse_cursor
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not (TEST_DATABASE_URL or "").startswith("postgresql"),
+    reason="TEST_DATABASE_URL is not a PostgreSQL database",
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    table = ChangeLogEntry.__table__
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+    yield engine
+    table.drop(engine)
+    engine.dispose()
+
+
+def _sync(engine, cursor):
+    with Session(engine) as db:
+        return committed_changes(db, cursor, true(), 100)
+
+
+def test_interleaved_transactions_are_not_skipped(engine):
+    first = engine.connect()
+    second = engine.connect()
+    try:
+        # Перша транзакція отримує менший id, але комітиться останньою
+        first.begin()
+        record_changes(first, [service_request_change(1, 10, "upsert")])
+        second.begin()
+        record_changes(second, [service_request_change(2, 10, "upsert")])
+        second.commit()
+
+        # Поки перша транзакція відкрита, зміна другої ще не віддається
+        assert _sync(engine, parse_cursor("0")) == []
+
+        first.commit()
+        changes = _sync(engine, parse_cursor("0"))
+        assert [c.entity_id for c in changes] == [1, 2]
+        last = changes[-1]
+        assert _sync(engine, (last.txid, last.id)) == []
+    finally:
+        first.close()
+        second.close()
+
+
+def test_cursor_resumes_after_partial_page(engine):
+    with engine.begin() as conn:
+        record_changes(conn, [service_request_change(1, 10, "upsert")])
+    with engine.begin() as conn:
+        record_changes(conn, [service_request_change(2, 10, "upsert"), service_request_change(3, 10, "delete")])
+
+    with Session(engine) as db:
+        page = committed_changes(db, parse_cursor("0"), true(), 2)
+    assert [c.entity_id for c in page] == [1, 2]
+    rest = _sync(engine, (page[-1].txid, page[-1].id))
+    assert [c.entity_id for c in rest] == [3]
@@ -0,0 +1,153 @@
+"""
+Орендарі спільної бази не бачать даних одне одного. ORM-запити обмежує
+фільтр у do_orm_execute, а Core-запити (індекс відсутностей, тижневі години,
+історія, копіювання розкладу, архів) покладаються на те, що id користувачів
+унікальні в межах бази, - тож перевіряємо через API всі ці шляхи.
+"""
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.database import SessionLocal
+from app.db.models.user import User
+from app.db.tenant import current_tenant
+from app.main import app
+from app.onboarding import create_manager
+from app.security import hash_password
+
+PASSWORD = "secret1"
+MONTH = "2026-10"
+
+
+class Tenant:
+    def __init__(self, client: TestClient, tenant_id: str) -> None:
+        self.client = client
+        self.tenant_id = tenant_id
+        self.manager_id = 0
+        self.employee_id = 0
+        self.department_id = 0
+        self.headers: dict[str, str] = {}
+        self.employee_headers: dict[str, str] = {}
+
+    def login(self, email: str) -> dict[str, str]:
+        r = self.client.post(
+            "/auth/login", json={"email": email, "password": PASSWORD}, headers={"X-Tenant-ID": self.tenant_id}
+        )
+        assert r.status_code == 200, r.text
+        return {"Authorization": f"Bearer {r.json()['accessToken']}"}
+
+    def get(self, url: str, **params):
+        r = self.client.get(url, params=params, headers=self.headers)
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    def write(self, method: str, url: str, payload: dict, headers=None):
+        r = self.client.request(method, url, json=payload, headers=headers or self.headers)
+        assert r.status_code in (200, 201), r.text
+        return r.json()
+
+
+def _populate(tenant: Tenant, suffix: str) -> None:
+    # Менеджер і працівник - напряму в БД, як після --create-manager
+    manager_email, employee_email = f"manager-{suffix}@example.com", f"employee-{suffix}@example.com"
+    token = current_tenant.set(tenant.tenant_id)
+    try:
+        with SessionLocal() as db:
+            tenant.manager_id = create_manager(db, manager_email, PASSWORD).id
+            employee = User(email=employee_email, password_hash=hash_password(PASSWORD), role="employee")
+            db.add(employee)
+            db.commit()
+            tenant.employee_id = employee.id
+    finally:
+        current_tenant.reset(token)
+    tenant.headers = tenant.login(manager_email)
+    tenant.employee_headers = tenant.login(employee_email)
+
+    tenant.department_id = tenant.write("POST", "/department/create", {
+        "name": f"Shared {suffix}", "manager_user_id": tenant.manager_id,
+    })["id"]
+    # Однакові імена в обох орендарях: пошук не повинен знаходити чужих
+    tenant.write("PUT", f"/employee/profile/add/{tenant.employee_id}", {
+        "full_name": "Shared Name", "employee_number": "1", "position": "dev",
+        "department_id": tenant.department_id, "work_start_date": "2020-01-01",
+    })
+    tenant.write("PUT", f"/schedule/range/{tenant.employee_id}", {
+        "start_date": "2026-10-05", "end_date": "2026-10-09",
+        "type": "shift", "start_time": "09:00", "end_time": "17:00",
+    })
+    request_id = tenant.write("POST", "/service-requests", {
+        "type": "vacation", "start_date": "2026-10-19", "end_date": "2026-10-23",
+    }, headers=tenant.employee_headers)["id"]
+    tenant.write("PATCH", f"/service-requests/{request_id}", {"status": "approved"})
+
+
+@pytest.fixture(scope="module")
+def tenants():
+    suffix = uuid.uuid4().hex[:8]
+    with TestClient(app) as client:
+        first, second = Tenant(client, f"first-{suffix}"), Tenant(client, f"second-{suffix}")
+        _populate(first, f"a-{suffix}")
+        _populate(second, f"b-{suffix}")
+        yield first, second
+
+
+def _own_user_ids(tenant: Tenant) -> set[int]:
+    return {tenant.manager_id, tenant.employee_id}
+
+
+def test_search_finds_only_own_employees(tenants):
+    for tenant in tenants:
+        found = tenant.get("/employee/search", q="Shared", all_departments=True)["items"]
+        assert [item["user_id"] for item in found] == [tenant.employee_id]
+
+
+def test_absences_are_per_tenant(tenants):
+    for tenant in tenants:
+        items = tenant.get("/absences", **{"from": "2026-10-01", "to": "2026-10-31", "all_departments": True})["items"]
+        assert {item["user_id"] for item in items} == {tenant.employee_id}
+
+
+def test_schedule_of_other_tenant_is_not_readable(tenants):
+    first, second = tenants
+    for reader, owner in ((first, second), (second, first)):
+        for url in (f"/schedule/{owner.employee_id}", f"/schedule/{owner.employee_id}/range"):
+            params = {"month": MONTH} if url.endswith(str(owner.employee_id)) else {"from": "2026-10-01", "to": "2026-10-31"}
+            r = reader.client.get(url, params=params, headers=reader.headers)
+            assert r.status_code in (403, 404), r.text
+        own = reader.get(f"/schedule/{reader.employee_id}", month=MONTH)["entries"]
+        assert len(own) == 10  # 5 змін і 5 днів відпустки
+
+
+def test_sync_returns_only_own_changes(tenants):
+    for tenant in tenants:
+        for headers in (tenant.headers, tenant.employee_headers):
+            r = tenant.client.get("/sync", params={"since": "0"}, headers=headers)
+            assert r.status_code == 200, r.text
+            body = r.json()
+            assert body["work_entries"]
+            assert {e["user_id"] for e in body["work_entries"]} <= _own_user_ids(tenant)
+            assert {s["user_id"] for s in body["service_requests"]} <= _own_user_ids(tenant)
+
+
+def test_copy_does_not_cross_tenants(tenants):
+    first, second = tenants
+    r = first.client.post("/schedule/copy/employee", json={
+        "source_user_id": second.employee_id, "target_user_ids": [first.employee_id],
+        "start_date": "2026-10-05", "end_date": "2026-10-09", "target_start": "2026-11-02",
+    }, headers=first.headers)
+    assert r.status_code in (403, 404), r.text
+
+    r = first.client.post("/schedule/copy/period", json={
+        "source_start": "2026-10-05", "source_end": "2026-10-11", "target_start": "2026-11-09",
+        "user_ids": [second.employee_id],
+    }, headers=first.headers)
+    assert r.status_code in (403, 404), r.text
+
+    # Копіювання цілого підрозділу зачіпає лише власних працівників
+    result = first.write("POST", "/schedule/copy/period", {
+        "source_start": "2026-10-05", "source_end": "2026-10-11", "target_start": "2026-11-16",
+        "department_id": first.department_id,
+    })
+    assert result["created"] == 5
+    assert second.get(f"/schedule/{second.employee_id}", month="2026-11")["entries"] == []
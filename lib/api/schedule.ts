@@ -30,6 +30,37 @@ export async function getEmployeeSchedule(
     return data.entries ?? [];
 }
 
+export async function getMyScheduleRange(
+    base: string,
+    token: string,
+    from: string,
+    to: string,
+    signal?: AbortSignal
+) {
+    const data = await fetchJson<{ entries: ScheduleEntry[] }>(
+        `${base}/schedule/me/range?from=${from}&to=${to}`,
+        token,
+        signal
+    );
+    return data.entries ?? [];
+}
+
+export async function getEmployeeScheduleRange(
+    base: string,
+    token: string,
+    employeeId: number,
+    from: string,
+    to: string,
+    signal?: AbortSignal
+) {
+    const data = await fetchJson<{ entries: ScheduleEntry[] }>(
+        `${base}/schedule/${employeeId}/range?from=${from}&to=${to}`,
+        token,
+        signal
+    );
+    return data.entries ?? [];
+}
+
 export async function getDeptEmployees(
     base: string,
     token: string,
@@ -42,6 +73,22 @@ export async function getDeptEmployees(
     );
 }
 
+export async function searchEmployees(
+    base: string,
+    token: string,
+    query: string,
+    cursor?: string | null,
+    signal?: AbortSignal
+) {
+    const params = new URLSearchParams({ q: query });
+    if (cursor) params.set("cursor", cursor);
+    return fetchJson<{ items: (DeptEmployee & { employee_number?: string; position?: string })[]; next_cursor: string | null }>(
+        `${base}/employee/search?${params.toString()}`,
+        token,
+        signal
+    );
+}
+
 export async function upsertDaySchedule(
     base: string,
     token: string,
@@ -99,3 +146,35 @@ export async function deleteDaySchedule(
 
     return res.json();
 }
+
+export type ScheduleBatchItem = {
+    op?: "upsert" | "delete";
+    user_id?: number | null;
+    date: string;
+    type?: string;
+    start_time?: string | null;
+    end_time?: string | null;
+    title?: string | null;
+};
+
+export async function applyScheduleBatch(
+    base: string,
+    token: string,
+    items: ScheduleBatchItem[]
+) {
+    const res = await fetch(`${base}/schedule/batch`, {
+        method: "POST",
+        headers: {
+            Authorization: `Bearer ${token}`,
+            "Content-Type": "application/json",
+            Accept: "application/json",
+        },
+        body: JSON.stringify({ items }),
+    });
+
+    if (!res.ok) {
+        await handleResponseError(res);
+    }
+
+    return res.json();
+}